@@ -38,6 +38,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -136,4 +137,109 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTHENTICATION_BACKENDS = [
     'accounts.backends.EmailBackend',  # Your custom backend
     # 'django.contrib.auth.backends.ModelBackend',  # Fallback to default
-]
\ No newline at end of file
+]
+
+# Seconds EmailBackend.get_user may serve a user from the cache. Saving the
+# user or profile drops the entry, but only from the cache of the process that
+# saved it: with the per-process LocMemCache below, other workers keep
+# authenticating a deactivated user, or checking sessions against an old
+# password hash, for up to this long. Keep it to a few seconds unless CACHES
+# points at a cache shared by every process (memcached, Redis), where it may be
+# raised to minutes.
+AUTH_USER_CACHE_TIMEOUT = 5
+
+# Catalog search backend (see books/search). Defaults to the SQLite FTS5
+# index on SQLite and to the icontains backend on other databases.
+# BOOK_SEARCH_BACKEND = 'books.search.backends.sqlite_fts.SQLiteFTSBackend'
+
+# In-process background tasks (core/tasks.py), e.g. cover thumbnail rendering
+BACKGROUND_TASK_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# Seconds a rendered dashboard fragment may live in the cache. Fragments are
+# keyed by version stamps bumped on writes, so this only bounds memory use.
+DASHBOARD_CACHE_TIMEOUT = 600
+
+# Session storage. 'core.sessions' keeps decoded sessions in a per-process LRU
+# in front of the core_session table and batches expiry-only writes (see
+# core/sessions.py). Set it to 'django.contrib.sessions.backends.db' to go back
+# to the stock engine (existing sessions are not carried over either way).
+SESSION_ENGINE = 'core.sessions'
+SESSION_LRU_SIZE = 10000          # decoded sessions kept per process
+SESSION_LRU_TTL = 5               # seconds before a cached session is revalidated (and a logout elsewhere is seen)
+SESSION_TOUCH_FLUSH_INTERVAL = 30 # seconds a queued expiry write may wait
+SESSION_TOUCH_BATCH = 500
+
+# Bulk approvals of more profiles than this run as a background ApprovalJob
+# (accounts/approvals.py) instead of inside the admin request
+APPROVAL_BACKGROUND_THRESHOLD = 500
+
+# Days a student has to collect a copy set aside for their hold before it
+# passes to the next in line (run `manage.py expire_holds` periodically)
+HOLD_PICKUP_DAYS = 3
+
+# Loans are due LOAN_PERIOD_DAYS after issue. `manage.py process_overdue`
+# (daily) charges FINE_PER_DAY per copy and overdue day, up to
+# FINE_MAX_PER_LOAN per copy (None for no cap).
+LOAN_PERIOD_DAYS = 14
+FINE_PER_DAY = '0.50'
+FINE_MAX_PER_LOAN = '20.00'
+
+# Email. Approval/rejection emails go through the outbox table and are sent
+# by `manage.py send_outbox` (see core/outbox.py). Use the SMTP backend in
+# production; the console, locmem and filebased backends work for testing.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'Library Management System <library@localhost>'
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60           # seconds, doubled after every failure
+OUTBOX_MAX_RETRY_DELAY = 3600
+
+# Serve the dashboards from the async views, which run their independent
+# queries concurrently (accounts/async_views.py). Meant for ASGI; see the
+# 'Root App.settings_asgi' profile. /user/async/... always serves them.
+ASYNC_DASHBOARDS = False
+
+# Read replicas (core/db_routers.py). Dashboard and catalog reads go to the
+# aliases in REPLICA_DATABASES (add them to DATABASES too); with none, all
+# traffic stays on 'default'. See the 'Root App.settings_replica' profile.
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+REPLICA_DATABASES = []
+REPLICA_MAX_LAG = 10              # seconds; staler replicas fall back to default
+REPLICA_LAG_CHECK_INTERVAL = 2    # seconds between lag checks per replica
+REPLICA_PIN_SECONDS = 5           # reads stay on default this long after a write
+
+# PRAGMAs run on every new SQLite connection, in order (core/sqlite.py).
+# Empty keeps SQLite's defaults; the 'Root App.settings_production' profile
+# enables WAL, memory mapping and a busy timeout.
+SQLITE_PRAGMAS = {}
+
+# Caches. 'default' holds the version stamps, the cached catalog queries
+# (books/cache.py) and the dashboard fragments. LocMemCache is per process:
+# with several worker processes use a shared backend so every process sees
+# version bumps at once, e.g. memcached:
+#     'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+#     'LOCATION': '127.0.0.1:11211',
+# or, on a single host without memcached, the file-based cache:
+#     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#     'LOCATION': BASE_DIR / 'cache',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'library',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Cached queries (core/cache.py) are refreshed after QUERY_CACHE_TIMEOUT
+# seconds by one caller while the others are served the old value for up
+# to QUERY_CACHE_STALE_GRACE more seconds. Callers finding nothing cached
+# wait up to QUERY_CACHE_LOCK_TIMEOUT seconds for the one computing it.
+QUERY_CACHE_TIMEOUT = 300
+QUERY_CACHE_STALE_GRACE = 30
+QUERY_CACHE_LOCK_TIMEOUT = 10
+
+# Reports read daily rollups refreshed by `manage.py rollup_circulation`
+# (every few minutes). Each run re-reads loans changed this many seconds
+# before its watermark, to catch transactions that committed late.
+ROLLUP_WATERMARK_OVERLAP = 300
@@ -0,0 +1,23 @@
+"""
+ASGI deployment profile.
+
+Serves the async dashboards (accounts/async_views.py) under an ASGI server:
+
+    DJANGO_SETTINGS_MODULE="Root App.settings_asgi" \
+        uvicorn "Root App.asgi:application" --workers 4
+
+(daphne or hypercorn work the same way.) Everything not set here comes
+from settings.py.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+ASYNC_DASHBOARDS = True
+
+# The async views read on several worker threads at once, each with its own
+# connection; keep those connections between requests instead of reopening
+# them, and check them before reuse.
+for _database in DATABASES.values():
+    _database.setdefault("CONN_MAX_AGE", 60)
+    _database.setdefault("CONN_HEALTH_CHECKS", True)
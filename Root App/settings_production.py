@@ -0,0 +1,32 @@
+"""
+Production SQLite profile.
+
+    DJANGO_SETTINGS_MODULE="Root App.settings_production" gunicorn "Root App.wsgi"
+
+* WAL journal, memory-mapped reads and a busy timeout on every connection
+  (``core.sqlite.PRODUCTION_PRAGMAS``), so readers and the writer stop
+  blocking each other and a briefly locked database is waited for.
+* Connections are kept between requests (and checked before reuse) instead
+  of being reopened, and re-running the PRAGMAs, on every request.
+* Transactions start with ``BEGIN IMMEDIATE``: a write transaction takes
+  the write lock up front and waits for it under the busy timeout. With
+  the default deferred BEGIN, a transaction that reads before writing
+  fails at once with "database is locked" when another writer is active.
+
+``manage.py bench_database`` compares this profile with the stock one.
+Everything not set here comes from settings.py.
+"""
+
+from core.sqlite import PRODUCTION_PRAGMAS
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+SQLITE_PRAGMAS = PRODUCTION_PRAGMAS
+
+for _database in DATABASES.values():
+    if _database["ENGINE"] != "django.db.backends.sqlite3":
+        continue
+    _database.setdefault("CONN_MAX_AGE", 600)
+    _database.setdefault("CONN_HEALTH_CHECKS", True)
+    _database.setdefault("OPTIONS", {}).setdefault("transaction_mode", "IMMEDIATE")
@@ -0,0 +1,20 @@
+"""
+Local read-replica profile: a second SQLite file serves dashboard reads.
+
+    DJANGO_SETTINGS_MODULE="Root App.settings_replica" python manage.py migrate
+    DJANGO_SETTINGS_MODULE="Root App.settings_replica" python manage.py sync_replicas --loop
+
+The replica is a copy of db.sqlite3 refreshed by ``sync_replicas``; stop
+the copy loop to watch lag-aware fallback send reads back to the primary.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES["replica"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / "db.replica.sqlite3",
+    "TEST": {"MIRROR": "default"},
+}
+
+REPLICA_DATABASES = ["replica"]
@@ -0,0 +1,15 @@
+"""
+Test profile for the app test suites.
+
+    python manage.py test --settings="Root App.settings_test"
+
+The legacy ``accounts.CustomUser`` model still clashes with ``auth.User``
+(fields.E304) and has an absolute ``upload_to`` (fields.E202); those checks
+are silenced here so the suites can run until that model is removed.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+SILENCED_SYSTEM_CHECKS = ["fields.E304", "fields.E202"]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -1,7 +1,12 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.urls import reverse
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import UserProfile
+from . import approvals, notifications
+from .models import ApprovalJob, UserProfile
+
+User = get_user_model()
 
 
 # @admin.register(Book)
@@ -149,43 +154,56 @@ class UserProfileAdmin(admin.ModelAdmin):
 
     department_info.short_description = "Department"
 
+    def _change_status(self, request, queryset, status, verb, **kwargs):
+        """Apply a status change, reporting background jobs; returns the count if inline"""
+        count, job = approvals.change_status(
+            queryset, status, changed_by=request.user, **kwargs
+        )
+        if job is None:
+            return count
+        self.message_user(
+            request,
+            format_html(
+                '⏳ {} user(s) are being {} in the background. <a href="{}">Track progress</a>',
+                count,
+                verb,
+                reverse("admin:accounts_approvaljob_change", args=[job.pk]),
+            ),
+        )
+        return None
+
     def approve_users(self, request, queryset):
         """Bulk approve selected users"""
-        count = 0
-        for profile in queryset.filter(status="pending"):
-            # Activate the user account when approving
-            profile.user.is_active = True
-            profile.user.save()
-            profile.approve(request.user)
-            count += 1
-
-        self.message_user(request, f"✅ {count} user(s) successfully approved.")
+        count = self._change_status(
+            request, queryset, "approved", "approved", source_status="pending"
+        )
+        if count is not None:
+            self.message_user(request, f"✅ {count} user(s) successfully approved.")
 
     approve_users.short_description = "✅ Approve selected users"
 
     def reject_users(self, request, queryset):
         """Bulk reject selected users"""
-        count = 0
-        for profile in queryset.filter(status="pending"):
-            profile.reject(request.user, reason="Rejected by admin")
-            count += 1
-
-        self.message_user(
-            request, f"❌ {count} user(s) successfully rejected.", level="warning"
+        count = self._change_status(
+            request,
+            queryset,
+            "rejected",
+            "rejected",
+            source_status="pending",
+            reason="Rejected by admin",
         )
+        if count is not None:
+            self.message_user(
+                request, f"❌ {count} user(s) successfully rejected.", level="warning"
+            )
 
     reject_users.short_description = "❌ Reject selected users"
 
     def mark_as_pending(self, request, queryset):
         """Reset status to pending"""
-        count = queryset.update(
-            status="pending",
-            approval_date=None,
-            rejection_date=None,
-            approved_by=None,
-        )
-
-        self.message_user(request, f"⏳ {count} user(s) marked as pending.")
+        count = self._change_status(request, queryset, "pending", "marked as pending")
+        if count is not None:
+            self.message_user(request, f"⏳ {count} user(s) marked as pending.")
 
     mark_as_pending.short_description = "⏳ Mark as pending"
 
@@ -196,12 +214,66 @@ class UserProfileAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         """Handle user activation when status changes"""
+        super().save_model(request, obj, form, change)
+
         if change:  # If editing existing profile
-            if obj.status == "approved" and not obj.user.is_active:
-                obj.user.is_active = True
-                obj.user.save()
-            elif obj.status in ["pending", "rejected"] and obj.user.is_active:
-                obj.user.is_active = False
-                obj.user.save()
+            # Approved accounts are active, pending/rejected ones are not. One
+            # UPDATE that only matches the user if it is out of step; the
+            # profile save above already drops the cached user.
+            active = obj.status == "approved"
+            User.objects.filter(pk=obj.user_id).exclude(is_active=active).update(
+                is_active=active
+            )
+            if "status" in form.changed_data:
+                # Same transaction as the save; sent by `manage.py send_outbox`
+                notifications.queue_status_emails(
+                    [obj.pk], obj.status, obj.rejection_reason
+                )
 
-        super().save_model(request, obj, form, change)
+
+@admin.register(ApprovalJob)
+class ApprovalJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "action",
+        "status",
+        "progress_bar",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("action", "status")
+    readonly_fields = (
+        "action",
+        "status",
+        "source_status",
+        "total",
+        "processed",
+        "progress_bar",
+        "reason",
+        "requested_by",
+        "error",
+        "created_at",
+        "finished_at",
+    )
+    exclude = ("profile_ids",)
+    ordering = ("-created_at",)
+
+    def progress_bar(self, obj):
+        """Processed / total profiles"""
+        return format_html(
+            '<progress value="{}" max="{}"></progress> {} / {} ({}%)',
+            obj.processed,
+            obj.total or 1,
+            obj.processed,
+            obj.total,
+            obj.progress,
+        )
+
+    progress_bar.short_description = "Progress"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,156 @@
+"""
+Set-based approval workflow for student and librarian accounts.
+
+Changing the status of N profiles costs a fixed number of statements (lock
+the rows, UPDATE the profiles, UPDATE ``auth_user.is_active``, apply the
+statistics delta) instead of two saves per profile. Batches larger than
+``APPROVAL_BACKGROUND_THRESHOLD`` are recorded as an ``ApprovalJob`` and
+processed in chunks on a background thread, reporting progress on the job.
+
+Approval and rejection emails are written to the outbox in the same
+transaction (``accounts.notifications``) and sent later by ``manage.py
+send_outbox``. Once it commits, ``profiles_status_changed`` is sent with the
+affected profile ids; receivers should queue their work rather than do it
+inline.
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from books import stats
+from core.tasks import run_in_background
+
+from .auth import forget_users
+from .notifications import queue_status_emails
+from .models import ApprovalJob, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Profiles changed per transaction by background jobs
+APPROVAL_CHUNK_SIZE = 500
+
+# Sent after commit with profile_ids, status, changed_by and reason
+profiles_status_changed = Signal()
+
+
+def _status_values(status, changed_by, reason, now):
+    """Column values for moving a profile to ``status`` (as UserProfile.approve/reject)"""
+    values = {"status": status, "updated_at": now}
+    if status == "approved":
+        values.update(
+            approved_by=changed_by,
+            approval_date=now,
+            rejection_reason="",
+            rejection_date=None,
+        )
+    elif status == "rejected":
+        values.update(
+            approved_by=changed_by, rejection_reason=reason, rejection_date=now
+        )
+    else:
+        values.update(approved_by=None, approval_date=None, rejection_date=None)
+    return values
+
+
+def set_status(queryset, status, changed_by=None, reason=""):
+    """
+    Move every profile in ``queryset`` to ``status`` in one transaction.
+
+    Approved accounts are activated and all others deactivated, matching the
+    admin's edit form. Returns the number of profiles changed.
+    """
+    User = get_user_model()
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list("pk", "user_id"))
+        if not rows:
+            return 0
+        profile_ids = [pk for pk, _ in rows]
+        user_ids = [user_id for _, user_id in rows]
+
+        targets = UserProfile.objects.filter(pk__in=profile_ids)
+        # queryset.update() skips model signals, so report the counter
+        # change for the library statistics and drop cached users explicitly
+        delta = stats.apply_profile_status_change(targets, status)
+        count = targets.update(
+            **_status_values(status, changed_by, reason, timezone.now())
+        )
+        active = status == "approved"
+        User.objects.filter(pk__in=user_ids).exclude(is_active=active).update(
+            is_active=active
+        )
+        stats.apply_delta(delta)
+        forget_users(*user_ids)
+        queue_status_emails(profile_ids, status, reason)
+
+        transaction.on_commit(
+            lambda: profiles_status_changed.send(
+                sender=UserProfile,
+                profile_ids=profile_ids,
+                status=status,
+                changed_by=changed_by,
+                reason=reason,
+            )
+        )
+    return count
+
+
+def change_status(queryset, status, changed_by=None, reason="", source_status=""):
+    """
+    Change the status of ``queryset`` now, or in the background if it is large.
+
+    Only profiles currently in ``source_status`` are changed, if given.
+    Returns ``(count, job)``; ``job`` is ``None`` when the change was applied
+    inline, otherwise ``count`` is the number of profiles queued.
+    """
+    if source_status:
+        queryset = queryset.filter(status=source_status)
+    profile_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+
+    if len(profile_ids) <= getattr(settings, "APPROVAL_BACKGROUND_THRESHOLD", 500):
+        return set_status(queryset, status, changed_by, reason), None
+
+    job = ApprovalJob.objects.create(
+        action=status,
+        source_status=source_status,
+        profile_ids=profile_ids,
+        total=len(profile_ids),
+        reason=reason,
+        requested_by=changed_by,
+    )
+    run_in_background(run_job, job.pk)
+    return len(profile_ids), job
+
+
+def run_job(job_id):
+    """Process an ApprovalJob chunk by chunk, resuming after ``processed``"""
+    job = ApprovalJob.objects.select_related("requested_by").get(pk=job_id)
+    if job.status == "done":
+        return
+    ApprovalJob.objects.filter(pk=job.pk).update(status="running")
+
+    try:
+        for start in range(job.processed, job.total, APPROVAL_CHUNK_SIZE):
+            chunk = job.profile_ids[start : start + APPROVAL_CHUNK_SIZE]
+            targets = UserProfile.objects.filter(pk__in=chunk)
+            if job.source_status:
+                targets = targets.filter(status=job.source_status)
+            with transaction.atomic():
+                set_status(targets, job.action, job.requested_by, job.reason)
+                ApprovalJob.objects.filter(pk=job.pk).update(
+                    processed=start + len(chunk)
+                )
+    except Exception as exc:
+        logger.exception("Approval job %s failed", job.pk)
+        ApprovalJob.objects.filter(pk=job.pk).update(
+            status="failed", error=str(exc), finished_at=timezone.now()
+        )
+        return
+
+    ApprovalJob.objects.filter(pk=job.pk).update(
+        status="done", finished_at=timezone.now()
+    )
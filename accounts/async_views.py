@@ -0,0 +1,88 @@
+"""
+Async versions of the dashboards, enabled with ``ASYNC_DASHBOARDS = True``.
+
+They render the same templates from the same data as ``accounts.views``.
+The difference is that the queries a page needs are independent of one
+another and run concurrently (``core.aio.gather_queries``), so a page costs
+roughly its slowest query rather than the sum of all of them. Data behind
+a warm ``{% cache %}`` fragment is left lazy and never queried, as in the
+sync views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.shortcuts import render
+
+from core.aio import gather_queries
+from core.db_routers import read_from_replica
+
+from . import views
+
+
+def _fragment_cache():
+    # The cache the {% cache %} tag writes to
+    try:
+        return caches["template_fragments"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def _cold_fragments(fragments):
+    """Names of the ``{name: vary_on}`` fragments that are not cached"""
+    # The template passes each fragment's vary_on list as a single argument
+    keys = {
+        make_template_fragment_key(name, [vary_on]): name
+        for name, vary_on in fragments.items()
+    }
+    cached = _fragment_cache().get_many(list(keys))
+    return {name for key, name in keys.items() if key not in cached}
+
+
+async def _render(request, template, context):
+    # Thread-sensitive, like a sync view: anything still lazy in the
+    # context (data for fragments that expired meanwhile) may query safely
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required(login_url="librarian_login")
+@read_from_replica
+async def librarian_dashboard(request):
+    """Librarian dashboard; statistics and lists are read concurrently"""
+    profile, denied = await sync_to_async(views.dashboard_profile)(
+        request, "librarian"
+    )
+    if denied:
+        return denied
+
+    data = await gather_queries(**views.librarian_dashboard_loaders())
+    context = views.librarian_dashboard_context(profile, data)
+    return await _render(request, "accounts/librarian_dashboard.html", context)
+
+
+@login_required(login_url="login")
+@read_from_replica
+async def student_dashboard(request):
+    """Student dashboard; only the queries behind cold fragments run, concurrently"""
+    profile, denied = await sync_to_async(views.dashboard_profile)(
+        request, "student"
+    )
+    if denied:
+        return denied
+
+    params = views.student_dashboard_params(request)
+    versions = await sync_to_async(views.student_dashboard_versions)(profile)
+    cold = await sync_to_async(_cold_fragments)(
+        views.student_dashboard_fragment_keys(profile, params, versions)
+    )
+
+    loaders = views.student_dashboard_loaders(profile, params)
+    needed = []
+    for fragment in cold:
+        needed.extend(views.STUDENT_DASHBOARD_FRAGMENTS[fragment]["data"])
+    data = views.lazy(loaders)
+    data.update(await gather_queries(**{name: loaders[name] for name in needed}))
+
+    context = views.student_dashboard_context(profile, params, data, versions)
+    return await _render(request, "accounts/student_dashboard.html", context)
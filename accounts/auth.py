@@ -0,0 +1,74 @@
+"""
+The login pipeline shared by ``EmailBackend`` and the login forms.
+
+Accounts are looked up by the indexed ``UserProfile.email_normalized`` column
+with the profile joined in, so one query returns everything a login needs
+(password hash, ``is_active``, role and approval status). Staff accounts
+created with ``createsuperuser`` have no profile and fall back to a lookup on
+``auth_user.email``.
+
+``get_user`` runs on every authenticated request, so its result is cached
+per user id and dropped whenever the user or their profile is saved (see
+``accounts.signals``). Code that changes profiles with ``QuerySet.update()``
+must call ``forget_users`` itself. Dropping only reaches other processes
+through a shared cache; with a per-process one, ``AUTH_USER_CACHE_TIMEOUT``
+is how long they may serve the old user, so it defaults to a few seconds.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import UserProfile
+
+USER_CACHE_PREFIX = "auth:user:"
+
+
+def _users():
+    return get_user_model().objects.select_related("profile")
+
+
+def find_user(email):
+    """The account registered under ``email`` (any case), or ``None``"""
+    normalized = UserProfile.normalize_email(email)
+    if not normalized:
+        return None
+
+    user = _users().filter(profile__email_normalized=normalized).first()
+    if user is None:
+        user = _users().filter(email__iexact=normalized, profile__isnull=True).first()
+    return user
+
+
+def check_credentials(email, password):
+    """The account for ``email`` if ``password`` matches it, else ``None``"""
+    user = find_user(email)
+    if user is None:
+        # Run the hasher anyway so unknown emails take as long as bad passwords
+        get_user_model()().set_password(password)
+        return None
+    return user if user.check_password(password) else None
+
+
+def user_cache_key(user_id):
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+
+def get_cached_user(user_id):
+    """``User`` with its profile loaded, served from the cache when possible"""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = _users().filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 5))
+    return user
+
+
+def forget_users(*user_ids):
+    """Drop cached users, after the current transaction commits"""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,26 +1,18 @@
 from django.contrib.auth.backends import ModelBackend
-from django.contrib.auth import get_user_model
 
-User = get_user_model()
+from .auth import check_credentials, get_cached_user
 
 class EmailBackend(ModelBackend):
     """
     Custom authentication backend that allows users to login with email instead of username
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            # Try to find user by email
-            user = User.objects.get(email=username)
-        except User.DoesNotExist:
-            return None
-        
-        # Check password
-        if user.check_password(password) and self.user_can_authenticate(user):
+        # One query: user, password hash and profile (role / approval status)
+        user = check_credentials(username, password)
+        if user is not None and self.user_can_authenticate(user):
             return user
         return None
-    
+
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
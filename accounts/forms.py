@@ -1,12 +1,47 @@
+import re
+
 from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from .auth import check_credentials
 from .models import UserProfile
 
+# Leaves room for a numeric suffix within User.username's 150 characters
+USERNAME_BASE_LENGTH = 140
+USERNAME_ATTEMPTS = 5
+
+
+def next_free_username(base):
+    """
+    ``base`` if it is free, otherwise ``base`` plus one more than the highest
+    numeric suffix in use (``john``, ``john1``, ``john2``...), in one query.
+
+    The range condition keeps the scan on the username index to names
+    starting with ``base``.
+    """
+    suffix = Substr("username", len(base) + 1)
+    taken = User.objects.filter(
+        username__gte=base, username__lt=base + "\U0010ffff"
+    ).aggregate(
+        exact=Count("pk", filter=Q(username=base)),
+        highest=Max(
+            Cast(suffix, IntegerField()),
+            filter=Q(username__regex=rf"^{re.escape(base)}[0-9]{{1,9}}$"),
+        ),
+    )
+    if not taken["exact"]:
+        return base
+    return f"{base}{(taken['highest'] or 0) + 1}"
+
 
 class BaseRegistrationForm(forms.Form):
     """Base form with common registration fields"""
 
+    role = None  # "student" or "librarian", set by subclasses
+
     email = forms.EmailField(
         label="Email Address",
         widget=forms.EmailInput(
@@ -62,9 +97,12 @@ class BaseRegistrationForm(forms.Form):
 
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        if User.objects.filter(email=email).exists():
-            raise forms.ValidationError("Email already registered. Please use another.")
-        if UserProfile.objects.filter(email=email).exists():
+        # One query covering accounts and profiles (profiles match any case)
+        taken = User.objects.filter(
+            Q(email__iexact=email)
+            | Q(profile__email_normalized=UserProfile.normalize_email(email))
+        ).exists()
+        if taken:
             raise forms.ValidationError("Email already registered. Please use another.")
         return email
 
@@ -91,9 +129,54 @@ class BaseRegistrationForm(forms.Form):
 
         return cleaned_data
 
+    def profile_fields(self):
+        """Extra UserProfile fields for this kind of account"""
+        return {}
+
+    def save(self):
+        """Create the User and its UserProfile in one transaction"""
+        email = self.cleaned_data["email"]
+        name = self.cleaned_data["name"]
+        password = self.cleaned_data["password1"]
+
+        # Create username from email
+        base_username = email.split("@")[0][:USERNAME_BASE_LENGTH]
+
+        for attempt in range(USERNAME_ATTEMPTS):
+            username = next_free_username(base_username)
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(
+                        username=username,
+                        email=email,
+                        password=password,
+                        first_name=name.split()[0] if name else "",
+                        last_name=" ".join(name.split()[1:]) if len(name.split()) > 1 else "",
+                    )
+                    profile = UserProfile.objects.create(
+                        user=user,
+                        role=self.role,
+                        name=name,
+                        email=email,
+                        phone_number=self.cleaned_data["phone_number"],
+                        status="pending",  # Awaiting approval
+                        **self.profile_fields(),
+                    )
+            except IntegrityError:
+                # Only a concurrent registration taking the same username is
+                # worth retrying; anything else (e.g. a duplicate email) is not
+                if attempt + 1 == USERNAME_ATTEMPTS or not User.objects.filter(
+                    username=username
+                ).exists():
+                    raise
+                continue
+            return user, profile
+
 class StudentRegistrationForm(BaseRegistrationForm):
     """Student registration form with student-specific fields"""
 
+    role = "student"
+
     id_number = forms.CharField(
         max_length=20,
         label="Student ID Number",
@@ -119,84 +202,16 @@ class StudentRegistrationForm(BaseRegistrationForm):
             )
         return id_number
 
-    def save(self):
-        """Create User and UserProfile for student"""
-        email = self.cleaned_data["email"]
-        name = self.cleaned_data["name"]
-        password = self.cleaned_data["password1"]
-
-        # Create username from email
-        username = email.split("@")[0]
-
-        # Ensure unique username
-        base_username = username
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-
-        # Create User
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-            first_name=name.split()[0] if name else "",
-            last_name=" ".join(name.split()[1:]) if len(name.split()) > 1 else "",
-        )
-
-        # Create UserProfile
-        profile = UserProfile.objects.create(
-            user=user,
-            role="student",
-            name=name,
-            email=email,
-            phone_number=self.cleaned_data["phone_number"],
-            id_number=self.cleaned_data["id_number"],
-            department=self.cleaned_data["department"],
-            status="pending",  # Awaiting approval
-        )
-
-        return user, profile
+    def profile_fields(self):
+        return {
+            "id_number": self.cleaned_data["id_number"],
+            "department": self.cleaned_data["department"],
+        }
 
 class LibrarianRegistrationForm(BaseRegistrationForm):
     """Librarian registration form without student-specific fields"""
 
-    def save(self):
-        """Create User and UserProfile for librarian"""
-        email = self.cleaned_data["email"]
-        name = self.cleaned_data["name"]
-        password = self.cleaned_data["password1"]
-
-        # Create username from email
-        username = email.split("@")[0]
-
-        # Ensure unique username
-        base_username = username
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-
-        # Create User
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-            first_name=name.split()[0] if name else "",
-            last_name=" ".join(name.split()[1:]) if len(name.split()) > 1 else "",
-        )
-
-        # Create UserProfile
-        profile = UserProfile.objects.create(
-            user=user,
-            role="librarian",
-            name=name,
-            email=email,
-            phone_number=self.cleaned_data["phone_number"],
-            status="pending",  # Awaiting approval
-        )
-
-        return user, profile
+    role = "librarian"
 
 class LoginForm(forms.Form):
     """Universal login form for both students and librarians"""
@@ -236,31 +251,30 @@ class LoginForm(forms.Form):
         password = cleaned_data.get("password")
 
         if email and password:
-            try:
-                user = User.objects.get(email=email)
-                if not user.check_password(password):
-                    raise forms.ValidationError("Invalid email or password.")
-
-                # Check if user has a profile
-                if not hasattr(user, "profile"):
-                    raise forms.ValidationError(
-                        "User profile not found. Please contact admin."
-                    )
+            # Same lookup as EmailBackend: one query for user and profile.
+            # Inactive accounts get through so the approval checks below
+            # can explain why they cannot log in yet.
+            user = check_credentials(email, password)
+            if user is None:
+                raise forms.ValidationError("Invalid email or password.")
 
-                # Check if user is approved
-                if user.profile.status == "pending":
-                    raise forms.ValidationError(
-                        "Your account is pending approval. Please wait for admin approval."
-                    )
-                elif user.profile.status == "rejected":
-                    raise forms.ValidationError(
-                        "Your account has been rejected. Please contact admin for more information."
-                    )
+            # Check if user has a profile
+            if not hasattr(user, "profile"):
+                raise forms.ValidationError(
+                    "User profile not found. Please contact admin."
+                )
 
-                cleaned_data["user"] = user
+            # Check if user is approved
+            if user.profile.status == "pending":
+                raise forms.ValidationError(
+                    "Your account is pending approval. Please wait for admin approval."
+                )
+            elif user.profile.status == "rejected":
+                raise forms.ValidationError(
+                    "Your account has been rejected. Please contact admin for more information."
+                )
 
-            except User.DoesNotExist:
-                raise forms.ValidationError("Invalid email or password.")
+            cleaned_data["user"] = user
 
         return cleaned_data
 
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from books import cache as dashboard_cache
+from core.benchmarks import dump, run_concurrently, summarize
+from core.cache import bump_version
+
+SCENARIOS = {
+    # role: (sync WSGI url name, async ASGI url name)
+    "student": ("student_dashboard", "async_student_dashboard"),
+    "librarian": ("librarian_dashboard", "async_librarian_dashboard"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the student and librarian dashboards through the sync views "
+        "under the WSGI handler and the async views under the ASGI handler, "
+        "and report latency percentiles for both as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30, help="Requests per client")
+        parser.add_argument(
+            "--concurrency", type=int, default=1, help="Clients requesting at the same time"
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Invalidate the dashboard fragment cache before every request",
+        )
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+
+    def _user(self, role):
+        profile = (
+            UserProfile.objects.filter(role=role, status="approved")
+            .select_related("user")
+            .order_by("pk")
+            .first()
+        )
+        if profile is None:
+            raise CommandError(f"No approved {role} found; run seed_library first.")
+        return profile
+
+    def handle(self, *args, **options):
+        if getattr(settings, "ASYNC_DASHBOARDS", False):
+            raise CommandError("Run with ASYNC_DASHBOARDS = False so both paths are measured.")
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        report = {
+            "iterations": options["iterations"],
+            "concurrency": options["concurrency"],
+            "cold": options["cold"],
+            "scenarios": {},
+        }
+        for role, (sync_name, async_name) in SCENARIOS.items():
+            profile = self._user(role)
+            report["scenarios"][role] = {
+                "wsgi": self._measure_sync(profile, reverse(sync_name), options),
+                "asgi": asyncio.run(
+                    self._measure_async(profile, reverse(async_name), options)
+                ),
+            }
+            self.stderr.write(f"  {role}: done")
+
+        output = dump(report)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output)
+
+    def _invalidate(self, profile, options):
+        if options["cold"]:
+            bump_version(dashboard_cache.student_namespace(profile.pk))
+            bump_version(dashboard_cache.CATALOG)
+
+    def _check(self, response, path):
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}")
+
+    def _measure_sync(self, profile, path, options):
+        def worker(_):
+            client = Client()
+            client.force_login(profile.user)
+            self._check(client.get(path), path)  # warm-up
+            latencies = []
+            for _ in range(options["iterations"]):
+                self._invalidate(profile, options)
+                started = time.perf_counter()
+                response = client.get(path)
+                latencies.append(time.perf_counter() - started)
+                self._check(response, path)
+            return latencies
+
+        results, elapsed = run_concurrently(worker, options["concurrency"])
+        return self._summary(results, elapsed)
+
+    async def _measure_async(self, profile, path, options):
+        async def worker():
+            client = AsyncClient()
+            await client.aforce_login(profile.user)
+            self._check(await client.get(path), path)  # warm-up
+            latencies = []
+            for _ in range(options["iterations"]):
+                self._invalidate(profile, options)
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                self._check(response, path)
+            return latencies
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[worker() for _ in range(options["concurrency"])])
+        return self._summary(results, time.perf_counter() - started)
+
+    def _summary(self, results, elapsed):
+        latencies = [sample for samples in results for sample in samples]
+        result = summarize(latencies)
+        result["requests_per_second"] = round(len(latencies) / elapsed, 1)
+        return result
@@ -0,0 +1,108 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from core.benchmarks import dump, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive login, the student and librarian dashboards and catalog search "
+        "through the test client and report latency percentiles, query counts "
+        "and peak Python memory per scenario as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--student", help="Student email (defaults to the first approved student)")
+        parser.add_argument("--librarian", help="Librarian email (defaults to the first approved librarian)")
+        parser.add_argument("--password", default="library-seed-1", help="Password of both accounts")
+        parser.add_argument("--search", default="algorithm", help="Catalog search term")
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+
+    def _account(self, role, email):
+        profiles = UserProfile.objects.filter(role=role, status="approved").select_related("user")
+        profile = profiles.filter(email=email).first() if email else profiles.order_by("pk").first()
+        if profile is None:
+            raise CommandError(f"No approved {role} found; run seed_library first.")
+        return profile.email
+
+    def handle(self, *args, **options):
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        password = options["password"]
+        student_email = self._account("student", options["student"])
+        librarian_email = self._account("librarian", options["librarian"])
+
+        student = Client()
+        librarian = Client()
+        for client, email in ((student, student_email), (librarian, librarian_email)):
+            response = client.post(reverse("login"), {"email": email, "password": password})
+            if "_auth_user_id" not in client.session:
+                raise CommandError(f"Could not log in as {email} (status {response.status_code}).")
+
+        def login():
+            return Client().post(
+                reverse("login"), {"email": student_email, "password": password}
+            )
+
+        scenarios = {
+            "login": login,
+            "student_dashboard": lambda: student.get(reverse("student_dashboard")),
+            "search": lambda: student.get(
+                reverse("student_dashboard"), {"search": options["search"], "tab": "browse"}
+            ),
+            "librarian_dashboard": lambda: librarian.get(reverse("librarian_dashboard")),
+        }
+
+        report = {"iterations": options["iterations"], "scenarios": {}}
+        for name, request in scenarios.items():
+            report["scenarios"][name] = self._measure(
+                request, options["iterations"], options["warmup"]
+            )
+            self.stderr.write(f"  {name}: done")
+
+        output = dump(report)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output)
+
+    def _measure(self, request, iterations, warmup):
+        for _ in range(warmup):
+            request()
+
+        latencies, queries, statuses = [], [], set()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request()
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+
+        # Memory is measured on a separate pass: tracing skews the timings
+        tracemalloc.start()
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = summarize(latencies)
+        result.update(
+            {
+                "queries_min": min(queries),
+                "queries_max": max(queries),
+                "peak_memory_kb": round(peak / 1024, 1),
+                "status_codes": sorted(statuses),
+            }
+        )
+        return result
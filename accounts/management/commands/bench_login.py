@@ -0,0 +1,94 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.backends import EmailBackend
+from accounts.models import UserProfile
+from core.benchmarks import dump, run_concurrently, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a login storm: many approved students log in at the same moment "
+        "through the login view, then make authenticated requests. Reports latency "
+        "percentiles, throughput and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent clients")
+        parser.add_argument("--logins", type=int, default=5, help="Logins per client")
+        parser.add_argument(
+            "--requests", type=int, default=20, help="Authenticated user lookups per client"
+        )
+        parser.add_argument("--password", default="library-seed-1", help="Password of the students")
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        workers, password = options["workers"], options["password"]
+        emails = list(
+            UserProfile.objects.filter(role="student", status="approved")
+            .order_by("pk")
+            .values_list("email", flat=True)[:workers]
+        )
+        if len(emails) < workers:
+            raise CommandError(
+                f"Need {workers} approved students, found {len(emails)}; run seed_library first."
+            )
+
+        backend = EmailBackend()
+
+        def worker(index):
+            # Mixed-case address: lookups go through the normalized column
+            email = emails[index].upper()
+            logins, lookups, queries, failures = [], [], [], 0
+            user_id = None
+            for _ in range(options["logins"]):
+                client = Client()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    client.post(reverse("login"), {"email": email, "password": password})
+                    logins.append(time.perf_counter() - started)
+                queries.append(len(captured))
+                user_id = client.session.get("_auth_user_id")
+                if user_id is None:
+                    failures += 1
+
+            # What every authenticated request pays: AuthenticationMiddleware
+            # resolving the session's user id through the backend
+            if user_id is not None:
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    backend.get_user(int(user_id))
+                    lookups.append(time.perf_counter() - started)
+            return logins, lookups, queries, failures
+
+        results, elapsed = run_concurrently(worker, workers)
+
+        logins = [sample for result in results for sample in result[0]]
+        lookups = [sample for result in results for sample in result[1]]
+        queries = [count for result in results for count in result[2]]
+        failures = sum(result[3] for result in results)
+
+        report = {
+            "workers": workers,
+            "elapsed_s": round(elapsed, 3),
+            "logins_per_s": round(len(logins) / elapsed, 1) if elapsed else None,
+            "failed_logins": failures,
+            "login": summarize(logins),
+            "login_queries_min": min(queries),
+            "login_queries_max": max(queries),
+            "get_user": summarize(lookups),
+        }
+        output = dump(report)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output)
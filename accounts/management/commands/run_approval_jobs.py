@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.approvals import run_job
+from accounts.models import ApprovalJob
+
+
+class Command(BaseCommand):
+    help = "Run queued approval jobs, and resume ones interrupted by a restart"
+
+    def handle(self, *args, **options):
+        jobs = ApprovalJob.objects.filter(status__in=["queued", "running"]).order_by("pk")
+        for job in jobs:
+            self.stdout.write(f"Job #{job.pk}: {job} from {job.processed}/{job.total}")
+            run_job(job.pk)
+            job.refresh_from_db()
+            style = self.style.SUCCESS if job.status == "done" else self.style.ERROR
+            self.stdout.write(style(f"  {job.get_status_display()} {job.error}".rstrip()))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2025-12-09 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_book_issuedbook'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', 'status', '-created_at', '-id'], name='profile_role_created_idx'),
+        ),
+    ]
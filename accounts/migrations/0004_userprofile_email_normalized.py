@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2025-12-10 09:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_email_normalized(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    profiles = UserProfile.objects.only('pk', 'email')
+    batch = []
+    for profile in profiles.iterator(chunk_size=2000):
+        profile.email_normalized = profile.email.strip().lower()
+        batch.append(profile)
+        if len(batch) >= 2000:
+            UserProfile.objects.bulk_update(batch, ['email_normalized'])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ['email_normalized'])
+
+
+def check_email_duplicates(apps, schema_editor):
+    # Emails differing only by case would fail the unique constraint below
+    # halfway through; list them so they can be merged or changed first
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    duplicates = (
+        UserProfile.objects.values('email_normalized')
+        .annotate(profiles=Count('pk'))
+        .filter(profiles__gt=1)
+        .order_by('email_normalized')
+    )
+    conflicts = []
+    for row in duplicates:
+        ids = UserProfile.objects.filter(
+            email_normalized=row['email_normalized']
+        ).values_list('pk', flat=True)
+        conflicts.append(f"  {row['email_normalized']}: profiles {', '.join(map(str, ids))}")
+    if conflicts:
+        raise RuntimeError(
+            'Some profiles share an email address up to case, which logins can no '
+            'longer tell apart. Change or merge these before migrating:\n'
+            + '\n'.join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_userprofile_role_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='email_normalized',
+            field=models.CharField(default='', editable=False, max_length=254),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+        migrations.RunPython(check_email_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, unique=True),
+        ),
+    ]
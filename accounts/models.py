@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User , AbstractUser
 from core.models.time_stamp import TimestampedModel
 
@@ -36,4 +38,204 @@ class CustomUser(TimestampedModel , AbstractUser ):
     def __str__(self):
         if self.role == "student":
             return f"{self.name} ({self.institute})"
-        return f"Librarian {self.name} -- {self.email}"
\ No newline at end of file
+        return f"Librarian {self.name} -- {self.email}"
+
+
+class UserProfile(models.Model):
+    """Library profile attached to every student and librarian account"""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("approved", "Approved"),
+        ("rejected", "Rejected"),
+    ]
+
+    ROLE_CHOICES = [
+        ("student", "Student"),
+        ("librarian", "Librarian"),
+    ]
+
+    DEPARTMENT_CHOICES = [
+        ("CSE", "Computer Science & Engineering"),
+        ("EEE", "Electrical & Electronic Engineering"),
+        ("ICT", "Information & Communication Technology"),
+        ("Robotics", "Robotics & Automation"),
+        ("Cyber_Security", "Cyber Security"),
+    ]
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Approval workflow
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="pending", db_index=True
+    )
+    approved_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="%(class)s_approvals",
+    )
+    approval_date = models.DateTimeField(null=True, blank=True)
+    rejection_reason = models.TextField(blank=True, default="")
+    rejection_date = models.DateTimeField(null=True, blank=True)
+
+    # Profile information
+    role = models.CharField(
+        max_length=20, choices=ROLE_CHOICES, default="student", db_index=True
+    )
+    name = models.CharField(max_length=200, db_index=True)
+    email = models.EmailField(unique=True, db_index=True)
+    # Lower-cased copy of ``email`` used for case-insensitive login lookups
+    email_normalized = models.CharField(max_length=254, unique=True, editable=False)
+    phone_number = models.CharField(max_length=20)
+
+    # Student-only information
+    id_number = models.CharField(
+        max_length=20,
+        unique=True,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Required for students",
+    )
+    department = models.CharField(
+        max_length=20,
+        choices=DEPARTMENT_CHOICES,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Required for students",
+    )
+
+    class Meta:
+        verbose_name = "User Profile"
+        verbose_name_plural = "User Profiles"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["role", "status"], name="accounts_us_role_4a0da6_idx"),
+            models.Index(
+                fields=["department", "status"], name="accounts_us_departm_109414_idx"
+            ),
+            # Approved-student listings ordered newest first
+            models.Index(
+                fields=["role", "status", "-created_at", "-id"],
+                name="profile_role_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_role_display()})"
+
+    @staticmethod
+    def normalize_email(email):
+        """Canonical form of an email address for lookups"""
+        return (email or "").strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = self.normalize_email(self.email)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "email" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "email_normalized"}
+        super().save(*args, **kwargs)
+
+    @property
+    def is_student(self):
+        return self.role == "student"
+
+    @property
+    def is_librarian(self):
+        return self.role == "librarian"
+
+    def is_approved(self):
+        return self.status == "approved"
+
+    def is_pending(self):
+        return self.status == "pending"
+
+    def is_rejected(self):
+        return self.status == "rejected"
+
+    def approve(self, approved_by=None):
+        """Mark the profile as approved"""
+        self.status = "approved"
+        self.approved_by = approved_by
+        self.approval_date = timezone.now()
+        self.rejection_reason = ""
+        self.rejection_date = None
+        self.save()
+
+    def reject(self, rejected_by=None, reason=""):
+        """Mark the profile as rejected"""
+        self.status = "rejected"
+        self.approved_by = rejected_by
+        self.rejection_reason = reason
+        self.rejection_date = timezone.now()
+        self.save()
+
+    def get_full_info(self):
+        """Summary used by the dashboards"""
+        info = {
+            "name": self.name,
+            "email": self.email,
+            "phone_number": self.phone_number,
+            "role": self.get_role_display(),
+            "status": self.get_status_display(),
+        }
+        if self.is_student:
+            info["id_number"] = self.id_number
+            info["department"] = self.get_department_display()
+        return info
+
+
+class ApprovalJob(models.Model):
+    """Bulk approval, rejection or reset too large to run inside a request"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    ACTION_CHOICES = [
+        ("approved", "Approve"),
+        ("rejected", "Reject"),
+        ("pending", "Mark as pending"),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True
+    )
+    # Only profiles still in this status are changed ("" = any status)
+    source_status = models.CharField(max_length=20, blank=True, default="")
+    profile_ids = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    reason = models.TextField(blank=True, default="")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="approval_jobs",
+    )
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.total} profile(s) ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """Percentage of profiles processed so far"""
+        return round(100 * self.processed / self.total) if self.total else 100
@@ -0,0 +1,43 @@
+"""
+Account status emails.
+
+Rendered and written to the outbox (``core.outbox``) inside the transaction
+that changes the status, so the admin never waits on SMTP and an email is
+only ever sent for a change that committed.
+"""
+
+from django.template.loader import render_to_string
+
+from core import outbox
+
+from .models import UserProfile
+
+# Statuses that notify the account holder, and the template for each
+STATUS_TEMPLATES = {
+    "approved": "accounts/emails/approved",
+    "rejected": "accounts/emails/rejected",
+}
+
+
+def render_status_email(profile, status, reason=""):
+    """``(recipient, subject, body)`` telling ``profile`` about its new status"""
+    template = STATUS_TEMPLATES[status]
+    context = {"profile": profile, "reason": reason}
+    subject = render_to_string(f"{template}_subject.txt", context)
+    body = render_to_string(f"{template}.txt", context).strip() + "\n"
+    return profile.email, " ".join(subject.split()), body
+
+
+def queue_status_emails(profile_ids, status, reason=""):
+    """Queue one email per profile moved to ``status``; returns how many"""
+    if status not in STATUS_TEMPLATES:
+        return 0
+    profiles = UserProfile.objects.filter(pk__in=profile_ids).only(
+        "pk", "name", "email", "role"
+    )
+    return len(
+        outbox.enqueue(
+            render_status_email(profile, status, reason)
+            for profile in profiles.iterator(chunk_size=500)
+        )
+    )
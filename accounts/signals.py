@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_users
+from .models import UserProfile
+
+User = get_user_model()
+
+
+# ============= AUTH USER CACHE =============
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_saved_user(sender, instance, **kwargs):
+    """Drop the cached copy served by EmailBackend.get_user"""
+    forget_users(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_profile_user(sender, instance, **kwargs):
+    """Cached users carry their profile, so profile writes invalidate them too"""
+    forget_users(instance.user_id)
@@ -1,3 +1,268 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from books import stats
+
+from . import approvals
+from .auth import check_credentials, find_user, get_cached_user
+from .backends import EmailBackend
+from .forms import StudentRegistrationForm, next_free_username
+from .models import ApprovalJob, UserProfile
+
+User = get_user_model()
+
+
+def make_account(username, email, password="secret123", status="approved"):
+    user = User.objects.create_user(username=username, email=email, password=password)
+    UserProfile.objects.create(
+        user=user,
+        role="student",
+        status=status,
+        name=username.title(),
+        email=email,
+        phone_number="01700000000",
+        id_number=username,
+        department="CSE",
+    )
+    return user
+
+
+def registration(email, id_number, **fields):
+    return StudentRegistrationForm(
+        {
+            "email": email,
+            "name": "John Smith",
+            "phone_number": "01700000000",
+            "password1": "secret123",
+            "password2": "secret123",
+            "id_number": id_number,
+            "department": "CSE",
+            **fields,
+        }
+    )
+
+
+class LoginLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_account("alice", "Alice@Example.com")
+
+    def test_email_lookup_ignores_case_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = find_user("  alice@EXAMPLE.com ")
+            self.assertEqual(user.profile.status, "approved")
+        self.assertEqual(user, self.user)
+
+    def test_accounts_without_a_profile_match_on_the_user_email(self):
+        admin = User.objects.create_superuser("admin", "Admin@Example.com", "secret123")
+
+        self.assertEqual(find_user("admin@example.com"), admin)
+
+    def test_credentials(self):
+        self.assertEqual(check_credentials("alice@example.com", "secret123"), self.user)
+        self.assertIsNone(check_credentials("alice@example.com", "wrong"))
+        self.assertIsNone(check_credentials("nobody@example.com", "secret123"))
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_account("alice", "alice@example.com")
+
+    def test_users_are_served_from_the_cache_with_their_profile(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.user.pk).profile.status, "approved")
+
+    def test_profile_saves_drop_the_cached_user(self):
+        get_cached_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile.status = "rejected"
+            self.user.profile.save()
+
+        self.assertEqual(get_cached_user(self.user.pk).profile.status, "rejected")
+
+    def test_deactivated_users_are_not_served(self):
+        backend = EmailBackend()
+        self.assertEqual(backend.get_user(self.user.pk), self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertIsNone(backend.get_user(self.user.pk))
+        self.assertIsNone(backend.get_user(0))
+
+
+class NextFreeUsernameTests(TestCase):
+    def test_free_base_is_used_as_is(self):
+        self.assertEqual(next_free_username("john"), "john")
+
+    def test_suffix_follows_the_highest_in_use(self):
+        for username in ("john", "john1", "john7", "johnny", "john_2", "john8x"):
+            User.objects.create_user(username=username)
+
+        self.assertEqual(next_free_username("john"), "john8")
+
+    def test_suffixes_need_the_base_itself_taken(self):
+        User.objects.create_user(username="john3")
+
+        self.assertEqual(next_free_username("john"), "john")
+
+    def test_regex_characters_in_the_base_are_literal(self):
+        User.objects.create_user(username="j.doe")
+        User.objects.create_user(username="jxdoe5")
+
+        self.assertEqual(next_free_username("j.doe"), "j.doe1")
+
+
+class RegistrationUsernameTests(TestCase):
+    def test_username_comes_from_the_email(self):
+        User.objects.create_user(username="john")
+        form = registration("john@example.com", "S-1")
+        self.assertTrue(form.is_valid(), form.errors)
+
+        user, profile = form.save()
+
+        self.assertEqual(user.username, "john1")
+        self.assertEqual(profile.status, "pending")
+
+    def test_retries_when_a_concurrent_registration_takes_the_name(self):
+        User.objects.create_user(username="john")
+        # The first lookup ran before the other registration committed
+        stale = ["john"]
+
+        def racing(base):
+            return stale.pop() if stale else next_free_username(base)
+
+        form = registration("john@example.com", "S-1")
+        self.assertTrue(form.is_valid(), form.errors)
+        with mock.patch("accounts.forms.next_free_username", side_effect=racing):
+            user, _ = form.save()
+
+        self.assertEqual(user.username, "john1")
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        first = registration("john@example.com", "S-1")
+        form = registration("john@example.com", "S-2")
+        self.assertTrue(first.is_valid(), first.errors)
+        self.assertTrue(form.is_valid(), form.errors)
+        # Both validated before either saved
+        first.save()
+
+        with self.assertRaises(IntegrityError):
+            form.save()
+        self.assertEqual(User.objects.filter(username__startswith="john").count(), 1)
+
+
+class ApprovalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.librarian = User.objects.create_user("librarian")
+        self.pending = [
+            make_account(f"student{n}", f"student{n}@example.com", status="pending")
+            for n in range(4)
+        ]
+        self.approved = make_account("approved", "approved@example.com")
+        stats.reconcile()
+
+    def profiles(self, users):
+        return UserProfile.objects.filter(user__in=users)
+
+    def test_approval_changes_status_activation_and_counters(self):
+        count, job = approvals.change_status(
+            UserProfile.objects.all(), "approved", self.librarian, source_status="pending"
+        )
+
+        self.assertEqual((count, job), (4, None))
+        self.assertEqual(
+            set(self.profiles(self.pending).values_list("status", "approved_by")),
+            {("approved", self.librarian.pk)},
+        )
+        self.assertEqual(
+            set(User.objects.filter(pk__in=[user.pk for user in self.pending]).values_list(
+                "is_active", flat=True
+            )),
+            {True},
+        )
+        counters = stats.LibraryStats.load()
+        self.assertEqual(
+            {field: getattr(counters, field) for field in stats.COUNTER_FIELDS},
+            stats.compute_counts(),
+        )
+
+    def test_statement_count_does_not_grow_with_the_batch(self):
+        def statements(users, status):
+            with CaptureQueriesContext(connection) as queries:
+                approvals.set_status(self.profiles(users), status)
+            return len(queries)
+
+        self.assertEqual(
+            statements(self.pending[:1], "rejected"), statements(self.pending[1:], "rejected")
+        )
+
+    def test_rejection_deactivates_and_drops_cached_users(self):
+        user = self.approved
+        get_cached_user(user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            approvals.set_status(self.profiles([user]), "rejected", reason="Duplicate")
+
+        cached = get_cached_user(user.pk)
+        self.assertFalse(cached.is_active)
+        self.assertEqual(
+            (cached.profile.status, cached.profile.rejection_reason), ("rejected", "Duplicate")
+        )
+
+    def test_receivers_hear_about_committed_changes_only(self):
+        received = []
+
+        def receiver(**kwargs):
+            received.append((sorted(kwargs["profile_ids"]), kwargs["status"]))
+
+        approvals.profiles_status_changed.connect(receiver)
+        self.addCleanup(approvals.profiles_status_changed.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            approvals.set_status(self.profiles(self.pending[:2]), "approved")
+            self.assertEqual(received, [])
+        for callback in callbacks:
+            callback()
+
+        ids = sorted(profile.pk for profile in self.profiles(self.pending[:2]))
+        self.assertEqual(received, [(ids, "approved")])
+
+    @override_settings(APPROVAL_BACKGROUND_THRESHOLD=2, BACKGROUND_TASKS_EAGER=True)
+    def test_large_batches_run_as_a_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            count, job = approvals.change_status(
+                UserProfile.objects.all(), "approved", source_status="pending"
+            )
+
+        job.refresh_from_db()
+        self.assertEqual((count, job.status, job.processed, job.total), (4, "done", 4, 4))
+        self.assertFalse(UserProfile.objects.filter(status="pending").exists())
+
+    def test_jobs_resume_after_the_processed_rows(self):
+        ids = sorted(profile.pk for profile in self.profiles(self.pending))
+        job = ApprovalJob.objects.create(
+            action="approved", profile_ids=ids, total=len(ids), processed=1
+        )
+
+        approvals.run_job(job.pk)
+
+        self.assertEqual(
+            list(UserProfile.objects.filter(pk__in=ids).order_by("pk").values_list(
+                "status", flat=True
+            )),
+            ["pending", "approved", "approved", "approved"],
+        )
 
-# Create your tests here.
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.urls import path
+
+from . import async_views
 from .views import (
     register,
     student_register,
@@ -11,6 +14,11 @@ from .views import (
     logout_view
 )
 
+if getattr(settings, "ASYNC_DASHBOARDS", False):
+    # Serve the dashboards from the async views (best under ASGI)
+    student_dashboard = async_views.student_dashboard
+    librarian_dashboard = async_views.librarian_dashboard
+
 
 urlpatterns = [
     path("register/", register, name="register"),
@@ -24,7 +32,11 @@ urlpatterns = [
     path("logout/", logout_view, name="logout"),
 
     path("student_dashboard/" , student_dashboard , name="student_dashboard"),
-    path("librarian_dashboard/" , librarian_dashboard , name="librarian_dashboard")
+    path("librarian_dashboard/" , librarian_dashboard , name="librarian_dashboard"),
+
+    # Always-async variants (for side-by-side benchmarks)
+    path("async/student_dashboard/", async_views.student_dashboard, name="async_student_dashboard"),
+    path("async/librarian_dashboard/", async_views.librarian_dashboard, name="async_librarian_dashboard"),
 ]
 
 
@@ -3,7 +3,14 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required 
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.conf import settings
+from django.http import QueryDict
+from django.utils.functional import SimpleLazyObject
+from books import cache as dashboard_cache
+from books import queries
+from books.models import Book, IssuedBook, LibraryStats
+from core.db_routers import fragment_timeout, read_from_replica
+from core.pagination import KeysetPaginator
 from .models import UserProfile
 from .forms import (
     StudentRegistrationForm,
@@ -14,7 +21,30 @@ from .forms import (
 from .models import UserProfile
 
 
-
+# Page sizes for the keyset-paginated dashboard lists
+BOOKS_PER_PAGE = 24
+HISTORY_PER_PAGE = 20
+# Active loans a student may have at once
+MAX_BORROWED_BOOKS = 5
+
+# The student dashboard's {% cache %} fragments: the context values each key
+# varies on, and the data each renders. The template keys every fragment on
+# ``fragment_keys.<name>`` (built from "vary_on"), and the async view skips
+# the "data" of fragments that are cached, so both follow edits made here.
+STUDENT_DASHBOARD_FRAGMENTS = {
+    "student_stats": {
+        "vary_on": ("profile_id", "loans_version"),
+        "data": ("current_borrowed_count", "total_borrowed_count", "overdue"),
+    },
+    "student_loans": {
+        "vary_on": ("profile_id", "loans_version", "history_cursor"),
+        "data": ("current_borrowed", "history_page", "holds"),
+    },
+    "catalog": {
+        "vary_on": ("catalog_version", "filter_status", "search_query", "books_cursor"),
+        "data": ("all_books",),
+    },
+}
 
 
 # ============= REGISTRATION VIEWS =============
@@ -307,89 +337,90 @@ def logout_view(request):
 #     return JsonResponse({'error': 'Profile not found'}, status=404)
 
 
-@login_required(login_url="librarian_login")
-def librarian_dashboard(request):
-    """Librarian dashboard showing library statistics and management options"""
+def dashboard_profile(request, role):
+    """
+    ``(profile, None)`` if the user is an approved ``role``, else ``(None, redirect)``.
 
+    Shared by the sync dashboards and the async ones in ``accounts.async_views``.
+    """
     # Check if user has a profile
     if not hasattr(request.user, "profile"):
         messages.error(
             request,
             "❌ No profile found for your account. Please contact the administrator.",
         )
-        return redirect("home")
+        return None, redirect("home")
 
     profile = request.user.profile
 
-    # Check if user is a librarian
-    if not profile.is_librarian:
+    # Check the role
+    if profile.role != role:
         messages.warning(
-            request, "⚠️ Access denied. This dashboard is only for librarians."
+            request, f"⚠️ Access denied. This dashboard is only for {role}s."
         )
-        return redirect("home")
+        return None, redirect("home")
 
-    # Check if librarian is approved
+    # Check if the account is approved
     if not profile.is_approved():
         messages.warning(
             request,
             "⏳ Your account is still pending approval. Please wait for admin approval.",
         )
-        return redirect("home")
+        return None, redirect("home")
 
-    # Get all students
-    students = UserProfile.objects.filter(role="student", status="approved")
+    return profile, None
 
-    # Get all books
-    books = Book.objects.all()
 
-    # Get active issued books
-    active_issued = IssuedBook.objects.filter(is_returned=False).select_related(
-        "book", "student", "student__user"
-    )
+def lazy(loaders):
+    """Wrap every loader in a SimpleLazyObject, so it only runs if used"""
+    return {name: SimpleLazyObject(load) for name, load in loaders.items()}
 
-    # Get all issued books
-    all_issued = (
-        IssuedBook.objects.all()
-        .select_related("book", "student", "student__user")
-        .order_by("-issue_date")
-    )
 
-    # Statistics
-    total_books = books.count()
-    total_students = students.count()
-    total_active_borrowed = active_issued.count()
-    total_returned = IssuedBook.objects.filter(is_returned=True).count()
-    available_books = books.filter(quantity__gt=0).count()
-    unavailable_books = books.filter(quantity=0).count()
-
-    # Pending approvals
-    pending_approvals = UserProfile.objects.filter(status="pending").count()
-
-    # Recent activities
-    recent_issued = (
-        IssuedBook.objects.all()
-        .select_related("book", "student")
-        .order_by("-issue_date")[:10]
-    )
+def librarian_dashboard_loaders():
+    """Independent reads behind the librarian dashboard, by context name"""
+    return {
+        # Statistics (one primary-key read of the maintained counters)
+        "stats": LibraryStats.load,
+        # Recent activities
+        "recent_issued": lambda: list(queries.recent_loans(10)),
+        # Overdue loans, as materialized by `manage.py process_overdue`
+        "overdue_loans": lambda: list(queries.overdue_loans(10)),
+        "total_overdue": queries.overdue_loans().count,
+    }
 
-    context = {
+
+def librarian_dashboard_context(profile, data):
+    stats = data["stats"]
+    return {
         "profile": profile,
         "librarian": profile,  # For backward compatibility
-        "total_books": total_books,
-        "total_students": total_students,
-        "total_active_borrowed": total_active_borrowed,
-        "total_returned": total_returned,
-        "available_books": available_books,
-        "unavailable_books": unavailable_books,
-        "pending_approvals": pending_approvals,
-        "recent_issued": recent_issued,
-        "active_issued": active_issued,
-        "all_issued": all_issued,
-        "students": students,
-        "books": books,
+        "total_books": stats.total_books,
+        "total_students": stats.total_students,
+        "total_active_borrowed": stats.active_borrowed,
+        "total_returned": stats.total_returned,
+        "available_books": stats.available_books,
+        "unavailable_books": stats.unavailable_books,
+        "pending_approvals": stats.pending_approvals,
+        "recent_issued": data["recent_issued"],
+        "active_issued": queries.active_loans(),
+        "all_issued": queries.all_loans(),
+        "students": queries.approved_students(),
+        "books": queries.catalog().order_by(*queries.CATALOG_ORDERING),
+        "overdue_loans": data["overdue_loans"],
+        "total_overdue": data["total_overdue"],
     }
 
-    return render(request, "myapp/librarian_dashboard.html", context)
+
+@login_required(login_url="librarian_login")
+@read_from_replica
+def librarian_dashboard(request):
+    """Librarian dashboard showing library statistics and management options"""
+    profile, denied = dashboard_profile(request, "librarian")
+    if denied:
+        return denied
+
+    context = librarian_dashboard_context(profile, lazy(librarian_dashboard_loaders()))
+    return render(request, "accounts/librarian_dashboard.html", context)
 
 
 # @login_required(login_url="login")
@@ -550,99 +581,137 @@ def librarian_dashboard(request):
 #     return render(request, "myapp/reject_user.html", {"user_id": user_id})
 
 
-@login_required(login_url="login")
-def student_dashboard(request):
-    """Student dashboard showing borrowed books and library books"""
-
-    # Check if user has a profile
-    if not hasattr(request.user, "profile"):
-        messages.error(
-            request,
-            "❌ No profile found for your account. Please contact the administrator.",
-        )
-        return redirect("home")
+def student_dashboard_params(request):
+    """Filters and cursors of the student dashboard, from the query string"""
+    return {
+        "filter_status": request.GET.get("status", "all"),
+        "search_query": request.GET.get("search", "").strip(),
+        "books_cursor": request.GET.get("cursor", ""),
+        "history_cursor": request.GET.get("history_cursor", ""),
+    }
 
-    profile = request.user.profile
 
-    # Check if user is a student
-    if not profile.is_student:
-        messages.warning(
-            request, "⚠️ Access denied. This dashboard is only for students."
-        )
-        return redirect("home")
-
-    # Check if student is approved
-    if not profile.is_approved():
-        messages.warning(
-            request,
-            "⏳ Your account is still pending approval. Please wait for admin approval.",
-        )
-        return redirect("home")
+def pager_query(**params):
+    """
+    Query string base for pager links inside a cached fragment.
 
-    # Get student's borrowed books
-    active_borrowed = (
-        IssuedBook.objects.filter(student=profile, is_returned=False)
-        .select_related("book")
-        .order_by("-issue_date")
-    )
+    ``{% querystring %}`` would otherwise copy every parameter of the request
+    that filled the cache (e.g. another student's history cursor) into HTML
+    shared with everyone hitting the same key, so the links carry only the
+    given parameters, which must all be part of the fragment's key.
+    """
+    query = QueryDict(mutable=True)
+    query.update({name: value for name, value in params.items() if value})
+    return query
 
-    borrowed_history = (
-        IssuedBook.objects.filter(student=profile)
-        .select_related("book")
-        .order_by("-issue_date")
-    )
 
-    # Get all books with search and filter
-    books = Book.objects.all()
+def student_dashboard_loaders(profile, params):
+    """
+    Independent reads behind the student dashboard, by context name.
 
-    # Get filter and search parameters
-    filter_status = request.GET.get("status", "all")
-    search_query = request.GET.get("search", "").strip()
+    The template wraps most of them in {% cache %} fragments keyed by version
+    stamps, so on a cache hit those never run.
+    """
+    # Get student's borrowed books
+    active_borrowed = queries.student_active_loans(profile)
+    borrowed_history = queries.student_history(profile)
+
+    # Search through the catalog index (ranked by relevance, capped by the
+    # backend), otherwise page through books by creation date (newest first).
+    # Both are cached under the catalog version, filtered by availability.
+    if params["search_query"]:
+        def load_books():
+            return dashboard_cache.search_results(
+                params["filter_status"], params["search_query"]
+            )
+    else:
+        def load_books():
+            return dashboard_cache.catalog_page(
+                params["filter_status"], params["books_cursor"], BOOKS_PER_PAGE
+            )
+
+    def load_history():
+        return KeysetPaginator(
+            borrowed_history, queries.LOAN_ORDERING, per_page=HISTORY_PER_PAGE
+        ).page_or_first(params["history_cursor"])
+
+    return {
+        "current_borrowed": lambda: list(active_borrowed),
+        "history_page": load_history,
+        "all_books": load_books,
+        "holds": lambda: list(queries.student_holds(profile)),
+        "overdue": lambda: list(queries.student_overdue(profile)),
+        # Count statistics
+        "current_borrowed_count": active_borrowed.count,
+        "total_borrowed_count": borrowed_history.count,
+        "returned_count": borrowed_history.filter(is_returned=True).count,
+        "available_books_count": lambda: dashboard_cache.availability_counts()["available"],
+        # Calculate if student can borrow more books (e.g., limit to 5 active borrowed books)
+        "can_borrow_more": lambda: active_borrowed.count() < MAX_BORROWED_BOOKS,
+    }
 
-    # Search functionality
-    if search_query:
-        books = books.filter(
-            Q(title__icontains=search_query)
-            | Q(author__icontains=search_query)
-            | Q(isbn__icontains=search_query)
-        )
 
-    # Filter by availability
-    if filter_status == "available":
-        books = books.filter(quantity__gt=0)
-    elif filter_status == "unavailable":
-        books = books.filter(quantity=0)
+def student_dashboard_versions(profile):
+    """Version stamps the dashboard's fragment cache keys are built from"""
+    return {
+        "loans_version": dashboard_cache.student_version(profile.pk),
+        "catalog_version": dashboard_cache.catalog_version(),
+    }
 
-    # Order books by creation date (newest first)
-    books = books.order_by("-created_at")
 
-    # Count statistics
-    current_borrowed_count = active_borrowed.count()
-    total_borrowed_count = borrowed_history.count()
-    returned_count = borrowed_history.filter(is_returned=True).count()
-    available_books_count = Book.objects.filter(quantity__gt=0).count()
+def student_dashboard_fragment_keys(profile, params, versions):
+    """``{fragment: vary_on values}`` for the student dashboard's fragments"""
+    values = {"profile_id": profile.pk, **params, **versions}
+    return {
+        name: [values[key] for key in fragment["vary_on"]]
+        for name, fragment in STUDENT_DASHBOARD_FRAGMENTS.items()
+    }
 
-    # Calculate if student can borrow more books (e.g., limit to 5 active borrowed books)
-    MAX_BORROWED_BOOKS = 5
-    can_borrow_more = current_borrowed_count < MAX_BORROWED_BOOKS
 
-    context = {
+def student_dashboard_context(profile, params, data, versions=None):
+    versions = versions or student_dashboard_versions(profile)
+    return {
         "profile": profile,
         "student": profile,  # For backward compatibility
-        "current_borrowed": active_borrowed,
-        "borrowing_history": borrowed_history,
-        "all_books": books,
-        "filter_status": filter_status,
-        "search_query": search_query,
-        "current_borrowed_count": current_borrowed_count,
-        "total_borrowed_count": total_borrowed_count,
-        "returned_count": returned_count,
-        "available_books_count": available_books_count,
-        "can_borrow_more": can_borrow_more,
+        "current_borrowed": data["current_borrowed"],
+        "borrowing_history": data["history_page"],
+        "history_page": data["history_page"],
+        "holds": data["holds"],
+        "overdue": data["overdue"],
+        "fines_due": SimpleLazyObject(lambda: sum(loan.fine for loan in data["overdue"])),
+        "all_books": data["all_books"],
+        "books_page": None if params["search_query"] else data["all_books"],
+        **params,
+        "catalog_query": pager_query(
+            status=params["filter_status"], search=params["search_query"]
+        ),
+        "history_query": pager_query(),
+        "current_borrowed_count": data["current_borrowed_count"],
+        "total_borrowed_count": data["total_borrowed_count"],
+        "returned_count": data["returned_count"],
+        "available_books_count": data["available_books_count"],
+        "can_borrow_more": data["can_borrow_more"],
         "max_borrowed_books": MAX_BORROWED_BOOKS,
         "student_info": profile.get_full_info(),
+        # Fragment cache keys
+        "cache_timeout": fragment_timeout(settings.DASHBOARD_CACHE_TIMEOUT),
+        "fragment_keys": student_dashboard_fragment_keys(profile, params, versions),
+        **versions,
     }
 
+
+@login_required(login_url="login")
+@read_from_replica
+def student_dashboard(request):
+    """Student dashboard showing borrowed books and library books"""
+    profile, denied = dashboard_profile(request, "student")
+    if denied:
+        return denied
+
+    params = student_dashboard_params(request)
+    context = student_dashboard_context(
+        profile, params, lazy(student_dashboard_loaders(profile, params))
+    )
     return render(request, "accounts/student_dashboard.html", context)
 
 
@@ -0,0 +1,123 @@
+"""
+Cache namespaces for data derived from books and loans.
+
+``catalog`` covers anything built from ``Book`` rows; ``student:<id>``
+covers one student's loans. Both are bumped on commit by the model signals
+and by the set-based circulation code, which bypasses those signals.
+
+The catalog queries below (search results, catalog pages, availability
+counts and single book rows) are cached under the ``catalog`` version, so
+any book write makes them miss.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+
+from core.cache import bump_version_on_commit, cached, cached_many, get_version, store_many
+from core.pagination import KeysetPage, KeysetPaginator
+
+from . import queries
+from .models import Book, LibraryStats
+from .search import search_books
+
+CATALOG = "catalog"
+
+
+def student_namespace(student_id):
+    return f"student:{student_id}"
+
+
+def catalog_version():
+    return get_version(CATALOG)
+
+
+def student_version(student_id):
+    return get_version(student_namespace(student_id))
+
+
+def catalog_changed():
+    bump_version_on_commit(CATALOG)
+
+
+def loans_changed(*student_ids):
+    bump_version_on_commit(*[student_namespace(pk) for pk in student_ids])
+
+
+# ============= CACHED CATALOG QUERIES =============
+
+
+def _digest(*parts):
+    # User input goes into the key: hash it to keep keys short and safe
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def _remember_books(books):
+    """Cache the rows of ``books`` (already loaded) and return their ids"""
+    store_many(CATALOG, {f"book:{book.pk}": book for book in books})
+    return [book.pk for book in books]
+
+
+def books_by_id(ids):
+    """``Book`` rows for ``ids`` in the same order; each row is cached on its own"""
+
+    def load(keys):
+        books = Book.objects.in_bulk([int(key.split(":")[1]) for key in keys])
+        return {f"book:{pk}": book for pk, book in books.items()}
+
+    rows = cached_many(CATALOG, [f"book:{pk}" for pk in ids], load)
+    return [rows[f"book:{pk}"] for pk in ids if f"book:{pk}" in rows]
+
+
+def search_results(filter_status, query, limit=None):
+    """Ranked ``search_books`` matches in the filtered catalog"""
+    ids = cached(
+        CATALOG,
+        f"search:{_digest(filter_status, query, limit)}",
+        lambda: _remember_books(
+            search_books(queries.catalog(filter_status), query, limit=limit)
+        ),
+    )
+    return books_by_id(ids)
+
+
+def catalog_page(filter_status, cursor, per_page):
+    """One ``KeysetPage`` of the filtered catalog, newest books first"""
+
+    def load():
+        page = KeysetPaginator(
+            queries.catalog(filter_status), queries.CATALOG_ORDERING, per_page=per_page
+        ).page_or_first(cursor)
+        return _remember_books(page), page.next_cursor, page.previous_cursor
+
+    ids, next_cursor, previous_cursor = cached(
+        CATALOG, f"page:{_digest(filter_status, cursor, per_page)}", load
+    )
+    return KeysetPage(books_by_id(ids), next_cursor, previous_cursor)
+
+
+def availability_counts():
+    """Books in the catalog, on the shelf and fully loaned out"""
+
+    def load():
+        stats = LibraryStats.load()
+        return {
+            "total": stats.total_books,
+            "available": stats.available_books,
+            "unavailable": stats.unavailable_books,
+        }
+
+    return cached(CATALOG, "availability", load)
+
+
+def catalog_fingerprint(filter_status, query):
+    """``(max updated_at, count)`` of the filtered catalog, as for ETags"""
+    def load():
+        books = queries.catalog(filter_status)
+        if query:
+            books = search_books(books, query)
+        return books.order_by().aggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+
+    return cached(CATALOG, f"fingerprint:{_digest(filter_status, query)}", load)
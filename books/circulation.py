@@ -0,0 +1,773 @@
+"""
+Checkout and return of books.
+
+Stock is never validated in Python and written back: every change is a
+single conditional UPDATE (``... WHERE quantity >= n``) inside one
+transaction, so concurrent checkouts of the same title cannot oversell or
+lose updates. On SQLite and PostgreSQL the new values come back through
+``UPDATE ... RETURNING`` so no re-read is needed.
+
+Returned copies of a book with a hold queue are handed to the head of the
+queue in the same transaction instead of going back on the shelf.
+
+At the desk, copies are scanned (``checkout_copy``, ``return_copy``): the
+same stock updates run, and the ``BookCopy`` row records where that copy
+is. Paths that only carry quantities (self-service, bulk API) pick the
+copies themselves: checkouts take copies from the shelf, and returns put
+the loan's copies back on the shelf, or on the hold shelf when a hold
+claims them. Books without ``BookCopy`` rows only have counts.
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Case, DateField, F, Value, When
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from . import cache, overdue, stats
+from .models import Book, BookCopy, Hold, IssuedBook
+
+RETURNING_VENDORS = {"sqlite", "postgresql"}
+
+# Result statuses
+OK = "ok"
+INVALID_QUANTITY = "invalid_quantity"
+INSUFFICIENT_STOCK = "insufficient_stock"
+ALREADY_RETURNED = "already_returned"
+OVER_RETURN = "over_return"
+
+
+@dataclass(frozen=True)
+class CheckoutResult:
+    status: str
+    loan: IssuedBook = None
+    remaining: int = None
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+
+@dataclass(frozen=True)
+class ReturnResult:
+    status: str
+    loan: IssuedBook = None
+    returned: int = 0
+    still_borrowed: int = None
+    shelf_quantity: int = None
+    # Returned copies set aside for the hold queue instead of shelved
+    reserved: int = 0
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+
+def _update_returning(model, pk, filters, values, returning):
+    """
+    Conditionally update one row and return the ``returning`` columns.
+
+    Returns ``None`` when the row does not match ``filters``.
+    """
+    queryset = model._base_manager.filter(pk=pk, **filters)
+    connection = connections[queryset.db]
+
+    if connection.vendor not in RETURNING_VENDORS:
+        if not queryset.update(**values):
+            return None
+        return model._base_manager.filter(pk=pk).values_list(*returning).get()
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in returning
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        return cursor.fetchone()
+
+
+def _adjust_stock(book_id, change):
+    """Add ``change`` copies to the shelf; ``None`` if that would go negative"""
+    filters = {"quantity__gte": -change} if change < 0 else {}
+    row = _update_returning(
+        Book,
+        book_id,
+        filters,
+        {"quantity": F("quantity") + change, "updated_at": timezone.now()},
+        ("quantity",),
+    )
+    if row is None:
+        return None
+
+    quantity = row[0]
+    cache.catalog_changed()
+    stats.apply_delta(
+        stats.diff(stats.book_counters(quantity - change), stats.book_counters(quantity))
+    )
+    return quantity
+
+
+def _shelf_copies(wanted):
+    """
+    Up to ``wanted[book_id]`` copies on the shelf per book, as ``{book_id: [copy ids]}``.
+
+    Call it after taking the stock: that update locks the book rows, so
+    concurrent checkouts cannot pick the same copies.
+    """
+    shelf = defaultdict(list)
+    for pk, book_id in (
+        BookCopy.objects.filter(book_id__in=wanted, status=BookCopy.AVAILABLE)
+        .order_by("pk")
+        .values_list("pk", "book_id")
+    ):
+        if len(shelf[book_id]) < wanted[book_id]:
+            shelf[book_id].append(pk)
+    return shelf
+
+
+def _lend_copies(lent):
+    """Mark copies as out on loans, ``lent`` being ``{copy_id: loan_id}``, in one UPDATE"""
+    if lent:
+        BookCopy.objects.filter(pk__in=lent).update(
+            status=BookCopy.ON_LOAN,
+            current_loan=Case(
+                *[When(pk=pk, then=Value(loan_id)) for pk, loan_id in lent.items()]
+            ),
+            updated_at=timezone.now(),
+        )
+
+
+def _check_in_copies(returned, reserved):
+    """
+    Put back the copies of returned loans.
+
+    ``returned`` is ``{loan_id: copies returned}`` and ``reserved``
+    ``{book_id: copies set aside for holds}``: that many of a book's copies
+    go on the hold shelf, the others back on the shelf.
+    """
+    out = defaultdict(list)
+    for pk, loan_id, book_id in (
+        BookCopy.objects.filter(current_loan__in=returned, status=BookCopy.ON_LOAN)
+        .order_by("pk")
+        .values_list("pk", "current_loan_id", "book_id")
+    ):
+        out[loan_id].append((pk, book_id))
+
+    reserved, moved = Counter(reserved), {BookCopy.HELD: [], BookCopy.AVAILABLE: []}
+    for loan_id, count in returned.items():
+        for pk, book_id in out[loan_id][:count]:
+            if reserved[book_id] > 0:
+                reserved[book_id] -= 1
+                moved[BookCopy.HELD].append(pk)
+            else:
+                moved[BookCopy.AVAILABLE].append(pk)
+    now = timezone.now()
+    for status, copies in moved.items():
+        if copies:
+            BookCopy.objects.filter(pk__in=copies).update(
+                status=status, current_loan=None, updated_at=now
+            )
+
+
+def checkout(student, book, qty=1):
+    """Issue ``qty`` copies of ``book`` to ``student``"""
+    if qty < 1:
+        return CheckoutResult(INVALID_QUANTITY)
+
+    with transaction.atomic():
+        remaining = _adjust_stock(book.pk, -qty)
+        if remaining is None:
+            return CheckoutResult(INSUFFICIENT_STOCK)
+        copies = _shelf_copies({book.pk: qty})[book.pk]
+        loan = IssuedBook.objects.create(
+            student=student,
+            book=book,
+            quantity=qty,
+            copy_id=copies[0] if qty == 1 and copies else None,
+        )
+        _lend_copies(dict.fromkeys(copies, loan.pk))
+
+    book.quantity = remaining
+    return CheckoutResult(OK, loan=loan, remaining=remaining)
+
+
+def return_(loan, qty=None):
+    """Return ``qty`` copies of ``loan`` (all outstanding copies by default)"""
+    return _return(loan, qty)
+
+
+def _return(loan, qty, copy=None):
+    """``return_``, checking in the scanned ``copy`` rather than any of the loan's copies"""
+    qty = loan.quantity if qty is None else qty
+    if qty < 1:
+        return ReturnResult(INVALID_QUANTITY, loan=loan)
+
+    today = timezone.localdate()
+    fully_returned = When(quantity=qty, then=Value(True))
+
+    with transaction.atomic():
+        row = _update_returning(
+            IssuedBook,
+            loan.pk,
+            {"is_returned": False, "quantity__gte": qty},
+            {
+                "quantity": F("quantity") - qty,
+                "is_returned": Case(fully_returned, default=Value(False)),
+                "return_date": Case(
+                    When(quantity=qty, then=Value(today)),
+                    default=F("return_date"),
+                    output_field=DateField(),
+                ),
+                "updated_at": timezone.now(),
+            },
+            ("quantity",),
+        )
+        if row is None:
+            status = ALREADY_RETURNED if loan.is_returned else OVER_RETURN
+            return ReturnResult(status, loan=loan)
+
+        still_borrowed = row[0]
+        cache.loans_changed(loan.student_id)
+        if still_borrowed == 0:
+            stats.apply_delta(
+                stats.diff(stats.loan_counters(False), stats.loan_counters(True))
+            )
+            # Only loans already past due can have an overdue row
+            if loan.due_date < today:
+                overdue.settle([loan.pk], today)
+        reserved = _allocate_holds(loan.book_id, qty)
+        shelf_quantity = _adjust_stock(loan.book_id, qty - reserved)
+        if copy is None:
+            _check_in_copies({loan.pk: qty}, {loan.book_id: reserved})
+        elif not _claim_copy(
+            copy,
+            BookCopy.ON_LOAN,
+            status=BookCopy.HELD if reserved else BookCopy.AVAILABLE,
+            current_loan=None,
+        ):
+            transaction.set_rollback(True)
+            return ReturnResult(NOT_ON_LOAN, loan=loan)
+
+    loan.quantity = still_borrowed
+    if still_borrowed == 0:
+        loan.is_returned = True
+        loan.return_date = today
+    return ReturnResult(
+        OK,
+        loan=loan,
+        returned=qty,
+        still_borrowed=still_borrowed,
+        shelf_quantity=shelf_quantity,
+        reserved=reserved,
+    )
+
+
+# ============= BULK CIRCULATION =============
+
+UNKNOWN_STUDENT = "unknown_student"
+UNKNOWN_BOOK = "unknown_book"
+UNKNOWN_LOAN = "unknown_loan"
+
+
+@dataclass(frozen=True)
+class BulkRowResult:
+    row: int
+    status: str
+    loan_id: int = None
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+
+def _availability_delta(before, after):
+    """Counter delta for books whose shelf quantity moved from before to after"""
+    delta = Counter()
+    for book_id, quantity in after.items():
+        delta.update(
+            stats.diff(stats.book_counters(before[book_id]), stats.book_counters(quantity))
+        )
+    return delta
+
+
+def _shift_quantities(model, changes, **extra):
+    """One UPDATE adding a per-row amount to ``quantity`` (plus shared ``extra`` values)"""
+    if not changes:
+        return
+    model._base_manager.filter(pk__in=changes).update(
+        quantity=Case(
+            *[When(pk=pk, then=F("quantity") + change) for pk, change in changes.items()],
+            default=F("quantity"),
+        ),
+        updated_at=timezone.now(),
+        **extra,
+    )
+
+
+def bulk_checkout(rows):
+    """
+    Issue many loans at once.
+
+    ``rows`` is a sequence of ``(student_id, book_id, qty)``. Stock is
+    checked for every row in one pass (rows are served in order, so later
+    rows for a title see the copies taken by earlier ones), then all loans
+    are inserted with ``bulk_create`` and every book is decremented by a
+    single UPDATE. Returns one ``BulkRowResult`` per input row.
+    """
+    from accounts.models import UserProfile
+
+    rows = list(rows)
+    student_ids = {student_id for student_id, _, _ in rows}
+    book_ids = {book_id for _, book_id, _ in rows}
+
+    students = set(
+        UserProfile.objects.filter(
+            pk__in=student_ids, role="student", status="approved"
+        ).values_list("pk", flat=True)
+    )
+
+    with transaction.atomic():
+        before = dict(
+            Book.objects.select_for_update()
+            .filter(pk__in=book_ids)
+            .values_list("pk", "quantity")
+        )
+        shelf = dict(before)
+
+        results, loans = [None] * len(rows), []
+        for index, (student_id, book_id, qty) in enumerate(rows):
+            if qty < 1:
+                status = INVALID_QUANTITY
+            elif student_id not in students:
+                status = UNKNOWN_STUDENT
+            elif book_id not in shelf:
+                status = UNKNOWN_BOOK
+            elif shelf[book_id] < qty:
+                status = INSUFFICIENT_STOCK
+            else:
+                shelf[book_id] -= qty
+                loans.append(
+                    (index, IssuedBook(student_id=student_id, book_id=book_id, quantity=qty))
+                )
+                continue
+            results[index] = BulkRowResult(index, status)
+
+        wanted = Counter()
+        for _, loan in loans:
+            wanted[loan.book_id] += loan.quantity
+        shelf_copies = _shelf_copies(wanted)
+        loan_copies = []
+        for _, loan in loans:
+            copies = shelf_copies[loan.book_id][: loan.quantity]
+            del shelf_copies[loan.book_id][: loan.quantity]
+            if loan.quantity == 1 and copies:
+                loan.copy_id = copies[0]
+            loan_copies.append(copies)
+
+        IssuedBook.objects.bulk_create([loan for _, loan in loans])
+        _lend_copies(
+            {
+                pk: loan.pk
+                for (_, loan), copies in zip(loans, loan_copies)
+                for pk in copies
+            }
+        )
+        cache.loans_changed(*{loan.student_id for _, loan in loans})
+
+        changed = {pk: qty for pk, qty in shelf.items() if qty != before[pk]}
+        _shift_quantities(Book, {pk: qty - before[pk] for pk, qty in changed.items()})
+        if changed:
+            cache.catalog_changed()
+
+        delta = _availability_delta(before, changed)
+        delta["active_borrowed"] += len(loans)
+        stats.apply_delta(delta)
+
+    for index, loan in loans:
+        results[index] = BulkRowResult(index, OK, loan_id=loan.pk)
+    return results
+
+
+def bulk_return(rows):
+    """
+    Return many loans at once.
+
+    ``rows`` is a sequence of ``(loan_id, qty)``; ``qty=None`` returns every
+    outstanding copy. Loans and books are each updated with one UPDATE.
+    """
+    rows = list(rows)
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        loans, students = {}, {}
+        for pk, book_id, student_id, quantity, is_returned in (
+            IssuedBook.objects.select_for_update()
+            .filter(pk__in={loan_id for loan_id, _ in rows})
+            .values_list("pk", "book_id", "student_id", "quantity", "is_returned")
+        ):
+            loans[pk] = (book_id, quantity, is_returned)
+            students[pk] = student_id
+        outstanding = {pk: quantity for pk, (_, quantity, _) in loans.items()}
+
+        results, returned, returned_by_loan = [], {}, Counter()
+        for index, (loan_id, qty) in enumerate(rows):
+            if loan_id not in loans:
+                results.append(BulkRowResult(index, UNKNOWN_LOAN))
+                continue
+            book_id, _, is_returned = loans[loan_id]
+            qty = outstanding[loan_id] if qty is None else qty
+            if is_returned or outstanding[loan_id] == 0:
+                status = ALREADY_RETURNED
+            elif qty < 1:
+                status = INVALID_QUANTITY
+            elif qty > outstanding[loan_id]:
+                status = OVER_RETURN
+            else:
+                outstanding[loan_id] -= qty
+                returned[book_id] = returned.get(book_id, 0) + qty
+                returned_by_loan[loan_id] += qty
+                status = OK
+            results.append(BulkRowResult(index, status, loan_id=loan_id))
+
+        changed = {
+            pk: quantity for pk, quantity in outstanding.items() if quantity != loans[pk][1]
+        }
+        finished = [pk for pk, quantity in changed.items() if quantity == 0]
+        cache.loans_changed(*{students[pk] for pk in changed})
+        _shift_quantities(
+            IssuedBook,
+            {pk: quantity - loans[pk][1] for pk, quantity in changed.items()},
+            is_returned=Case(When(pk__in=finished, then=Value(True)), default=F("is_returned")),
+            return_date=Case(
+                When(pk__in=finished, then=Value(today)),
+                default=F("return_date"),
+                output_field=DateField(),
+            ),
+        )
+        overdue.settle(finished, today)
+
+        before = dict(
+            Book.objects.select_for_update()
+            .filter(pk__in=returned)
+            .values_list("pk", "quantity")
+        )
+        # Copies wanted by a hold queue skip the shelf
+        reserved = {}
+        for book_id in Book.objects.filter(pk__in=before, holds_waiting__gt=0).values_list(
+            "pk", flat=True
+        ):
+            reserved[book_id] = _allocate_holds(book_id, returned[book_id])
+            returned[book_id] -= reserved[book_id]
+        _check_in_copies(returned_by_loan, reserved)
+        after = {pk: before[pk] + qty for pk, qty in returned.items() if pk in before}
+        _shift_quantities(Book, {pk: returned[pk] for pk in after if returned[pk]})
+        if after:
+            cache.catalog_changed()
+
+        delta = _availability_delta(before, after)
+        delta["active_borrowed"] -= len(finished)
+        delta["total_returned"] += len(finished)
+        stats.apply_delta(delta)
+
+    return results
+
+
+# ============= HOLDS =============
+
+ALREADY_HOLDING = "already_holding"
+AVAILABLE = "available"
+NOT_ACTIVE = "not_active"
+NOT_READY = "not_ready"
+
+
+@dataclass(frozen=True)
+class HoldResult:
+    status: str
+    hold: Hold = None
+    position: int = None
+    loan: IssuedBook = None
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+
+def _pickup_deadline(now):
+    return now + timedelta(days=getattr(settings, "HOLD_PICKUP_DAYS", 3))
+
+
+def _queue_changed(book_id, *student_ids):
+    """Invalidate the dashboards of ``student_ids`` and of everyone waiting for ``book_id``"""
+    waiting = Hold.objects.filter(book_id=book_id, status=Hold.WAITING).values_list(
+        "student_id", flat=True
+    )
+    cache.loans_changed(*student_ids, *waiting)
+
+
+def _allocate_holds(book_id, copies):
+    """
+    Set aside up to ``copies`` returned copies for the head of the book's queue.
+
+    Returns how many were set aside; the caller keeps them off the shelf.
+    Books without a queue cost one primary-key read, and serving the head is
+    an index lookup on ``queue_rank`` rather than a scan of the holds.
+    """
+    waiting = (
+        Book.objects.select_for_update()
+        .filter(pk=book_id, holds_waiting__gt=0)
+        .values_list("holds_waiting", flat=True)
+        .first()
+    )
+    if not waiting:
+        return 0
+
+    served = min(copies, waiting)
+    now = timezone.now()
+    # Everyone in the queue either gets a copy or moves up
+    _queue_changed(book_id)
+    queue = Hold.objects.filter(book_id=book_id, status=Hold.WAITING)
+    queue.filter(queue_rank__lte=served).update(
+        status=Hold.READY,
+        queue_rank=0,
+        ready_at=now,
+        expires_at=_pickup_deadline(now),
+        updated_at=now,
+    )
+    queue.filter(queue_rank__gt=served).update(queue_rank=F("queue_rank") - served)
+    Book.objects.filter(pk=book_id).update(holds_waiting=F("holds_waiting") - served)
+    cache.catalog_changed()
+    return served
+
+
+def _shelve_held_copies(book_id, count):
+    """Move ``count`` of the book's copies from the hold shelf back to the shelf"""
+    held = list(
+        BookCopy.objects.filter(book_id=book_id, status=BookCopy.HELD)
+        .order_by("updated_at", "pk")
+        .values_list("pk", flat=True)[:count]
+    )
+    if held:
+        BookCopy.objects.filter(pk__in=held, status=BookCopy.HELD).update(
+            status=BookCopy.AVAILABLE, updated_at=timezone.now()
+        )
+
+
+def _release_copies(book_id, copies):
+    """Copies set aside for holds that will not be collected: next in line, else shelf"""
+    remaining = copies - _allocate_holds(book_id, copies)
+    if remaining:
+        _adjust_stock(book_id, remaining)
+        # Copies passed to the next hold stay on the hold shelf
+        _shelve_held_copies(book_id, remaining)
+
+
+def place_hold(student, book):
+    """Join the queue for ``book``; only possible while no copy is on the shelf"""
+    try:
+        with transaction.atomic():
+            row = _update_returning(
+                Book,
+                book.pk,
+                {"quantity__lte": 0},
+                {"holds_waiting": F("holds_waiting") + 1},
+                ("holds_waiting",),
+            )
+            if row is None:
+                return HoldResult(AVAILABLE)
+            # The new hold joins at the back: its rank is the queue length
+            hold = Hold.objects.create(book=book, student=student, queue_rank=row[0])
+            cache.catalog_changed()
+    except IntegrityError:
+        return HoldResult(ALREADY_HOLDING)
+
+    book.holds_waiting = row[0]
+    return HoldResult(OK, hold=hold, position=hold.queue_rank)
+
+
+def cancel_hold(hold):
+    """Leave the queue, or give up a copy that is waiting for pickup"""
+    with transaction.atomic():
+        current = (
+            Hold.objects.select_for_update()
+            .filter(pk=hold.pk, status__in=Hold.ACTIVE_STATUSES)
+            .values_list("status", "queue_rank")
+            .first()
+        )
+        if current is None:
+            return HoldResult(NOT_ACTIVE, hold=hold)
+        status, rank = current
+
+        Hold.objects.filter(pk=hold.pk).update(
+            status=Hold.CANCELLED, queue_rank=0, updated_at=timezone.now()
+        )
+        if status == Hold.WAITING:
+            Hold.objects.filter(
+                book_id=hold.book_id, status=Hold.WAITING, queue_rank__gt=rank
+            ).update(queue_rank=F("queue_rank") - 1)
+            Book.objects.filter(pk=hold.book_id).update(
+                holds_waiting=F("holds_waiting") - 1
+            )
+            cache.catalog_changed()
+            _queue_changed(hold.book_id, hold.student_id)
+        else:
+            cache.loans_changed(hold.student_id)
+            _release_copies(hold.book_id, 1)
+
+    hold.status, hold.queue_rank = Hold.CANCELLED, 0
+    return HoldResult(OK, hold=hold)
+
+
+def collect_hold(hold, copy=None):
+    """
+    Issue the copy set aside for a ready hold to its student.
+
+    That is the scanned ``copy`` at the desk; otherwise a copy on the hold
+    shelf, if the book has copies, goes out on the loan.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        held = None
+        if copy is None:
+            held = (
+                BookCopy.objects.select_for_update()
+                .filter(book_id=hold.book_id, status=BookCopy.HELD)
+                .order_by("updated_at", "pk")
+                .first()
+            )
+        # The copy is already off the shelf, so stock is not touched
+        loan = IssuedBook.objects.create(
+            student_id=hold.student_id, book_id=hold.book_id, quantity=1, copy=copy or held
+        )
+        claimed = Hold.objects.filter(
+            pk=hold.pk, status=Hold.READY, expires_at__gt=now
+        ).update(status=Hold.FULFILLED, loan=loan, updated_at=now)
+        if not claimed:
+            transaction.set_rollback(True)
+            return HoldResult(NOT_READY, hold=hold)
+        if held is not None:
+            _claim_copy(held, BookCopy.HELD, status=BookCopy.ON_LOAN, current_loan=loan)
+
+    hold.status, hold.loan = Hold.FULFILLED, loan
+    return HoldResult(OK, hold=hold, loan=loan)
+
+
+def expire_holds(now=None, batch_size=500):
+    """
+    Expire ready holds whose pickup deadline has passed.
+
+    Each copy goes to the next student in line, or back on the shelf. Works
+    through the pickup index in batches; returns the number of holds expired.
+    Holds made ready by this run are left for the next one.
+    """
+    started = timezone.now()
+    now = now or started
+    expired = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Hold.objects.select_for_update()
+                .filter(status=Hold.READY, expires_at__lte=now, ready_at__lt=started)
+                .order_by("expires_at")
+                .values_list("pk", "book_id")[:batch_size]
+            )
+            if not batch:
+                return expired
+            expiring = Hold.objects.filter(pk__in=[pk for pk, _ in batch])
+            cache.loans_changed(*expiring.values_list("student_id", flat=True))
+            expiring.update(status=Hold.EXPIRED, updated_at=now)
+            for book_id, copies in Counter(book_id for _, book_id in batch).items():
+                _release_copies(book_id, copies)
+        expired += len(batch)
+
+
+# ============= DESK SCANS =============
+
+COPY_UNAVAILABLE = "copy_unavailable"
+COPY_HELD = "copy_held"
+NOT_ON_LOAN = "not_on_loan"
+
+
+def _claim_copy(copy, current_status, **values):
+    """Move ``copy`` out of ``current_status``; ``False`` if someone else moved it first"""
+    return bool(
+        BookCopy.objects.filter(pk=copy.pk, status=current_status).update(
+            updated_at=timezone.now(), **values
+        )
+    )
+
+
+def checkout_copy(student, copy):
+    """
+    Issue the scanned ``copy`` to ``student``.
+
+    A student with a ready hold for the book collects it with any copy they
+    bring: a copy from the hold shelf, or one from the shelf, in which case
+    a copy on the hold shelf goes back on the shelf in its place. Without a
+    ready hold a copy needs a copy's worth of stock on the shelf, like any
+    checkout, and copies on the hold shelf are refused: they are someone
+    else's.
+    """
+    if copy.status not in (BookCopy.AVAILABLE, BookCopy.HELD):
+        return CheckoutResult(COPY_UNAVAILABLE)
+
+    hold = (
+        Hold.objects.filter(
+            book_id=copy.book_id,
+            student=student,
+            status=Hold.READY,
+            expires_at__gt=timezone.now(),
+        )
+        .order_by("ready_at")
+        .first()
+    )
+    if hold is None and copy.status == BookCopy.HELD:
+        return CheckoutResult(COPY_HELD)
+
+    with transaction.atomic():
+        remaining = None
+        if hold is not None:
+            result = collect_hold(hold, copy=copy)
+            if not result.ok:
+                return CheckoutResult(result.status)
+            loan = result.loan
+            if copy.status == BookCopy.AVAILABLE:
+                # Stock is unchanged: the shelf copy taken swaps with the held one
+                _shelve_held_copies(copy.book_id, 1)
+        else:
+            remaining = _adjust_stock(copy.book_id, -1)
+            if remaining is None:
+                return CheckoutResult(INSUFFICIENT_STOCK)
+            loan = IssuedBook.objects.create(
+                student=student, book_id=copy.book_id, quantity=1, copy=copy
+            )
+        if not _claim_copy(copy, copy.status, status=BookCopy.ON_LOAN, current_loan=loan):
+            transaction.set_rollback(True)
+            return CheckoutResult(COPY_UNAVAILABLE)
+
+    copy.status, copy.current_loan = BookCopy.ON_LOAN, loan
+    return CheckoutResult(OK, loan=loan, remaining=remaining)
+
+
+def return_copy(copy):
+    """
+    Return the scanned ``copy`` (one copy of its current loan).
+
+    The copy goes back on the shelf, or on the hold shelf when the return
+    served the head of the book's hold queue.
+    """
+    loan = copy.current_loan
+    if copy.status != BookCopy.ON_LOAN or loan is None:
+        return ReturnResult(NOT_ON_LOAN)
+
+    result = _return(loan, 1, copy=copy)
+    if result.ok:
+        copy.status = BookCopy.HELD if result.reserved else BookCopy.AVAILABLE
+        copy.current_loan = None
+    return result
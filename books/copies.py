@@ -0,0 +1,103 @@
+"""
+Physical copies (``BookCopy``) for books that only have counts.
+
+``backfill`` (run once by ``manage.py backfill_copies``, and again after
+bulk imports) gives every book without copies one ``BookCopy`` per copy it
+accounts for: one on loan per outstanding loaned copy, one on the hold
+shelf per ready hold, and one available per copy on the shelf. Loans of a
+single copy are pointed at theirs. Counts are not touched.
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from .models import Book, BookCopy, Hold, IssuedBook
+
+
+@dataclass(frozen=True)
+class BackfillSummary:
+    books: int = 0
+    copies: int = 0
+    chunks: int = 0
+
+
+def barcode_for(book_id, number):
+    """Label of copy ``number`` of a book: book id and copy number, digits only"""
+    return f"{book_id:08d}{number:04d}"
+
+
+def _copies_for(books):
+    """Unsaved copies for ``{book_id: quantity}``, plus loans to link by copy index"""
+    loans = defaultdict(list)
+    for pk, book_id, quantity in IssuedBook.objects.filter(
+        book_id__in=books, is_returned=False
+    ).values_list("pk", "book_id", "quantity"):
+        loans[book_id].append((pk, quantity))
+    held = Counter(
+        Hold.objects.filter(book_id__in=books, status=Hold.READY).values_list(
+            "book_id", flat=True
+        )
+    )
+
+    copies, single_loans = [], {}
+    for book_id, shelved in books.items():
+        states = []
+        for loan_id, quantity in loans[book_id]:
+            if quantity == 1:
+                single_loans[len(copies) + len(states)] = loan_id
+            states.extend([(BookCopy.ON_LOAN, loan_id)] * quantity)
+        states.extend([(BookCopy.HELD, None)] * held[book_id])
+        states.extend([(BookCopy.AVAILABLE, None)] * max(shelved, 0))
+        copies.extend(
+            BookCopy(
+                book_id=book_id,
+                barcode=barcode_for(book_id, number),
+                status=status,
+                current_loan_id=loan_id,
+            )
+            for number, (status, loan_id) in enumerate(states, start=1)
+        )
+    return copies, single_loans
+
+
+def backfill(batch_size=500):
+    """Create the copies of every book that has none, ``batch_size`` books per transaction"""
+    books_done = created = chunks = 0
+    after = 0
+    while True:
+        batch = list(
+            Book.objects.filter(pk__gt=after)
+            .order_by("pk")
+            .values_list("pk", "quantity")[:batch_size]
+        )
+        if not batch:
+            break
+        after = batch[-1][0]
+
+        with transaction.atomic():
+            have_copies = set(
+                BookCopy.objects.filter(book_id__in=[pk for pk, _ in batch])
+                .values_list("book_id", flat=True)
+                .distinct()
+            )
+            books = {pk: quantity for pk, quantity in batch if pk not in have_copies}
+            if books:
+                copies, single_loans = _copies_for(books)
+                BookCopy.objects.bulk_create(copies, batch_size=1000)
+                IssuedBook.objects.bulk_update(
+                    [
+                        IssuedBook(pk=loan_id, copy_id=copies[index].pk)
+                        for index, loan_id in single_loans.items()
+                    ],
+                    ["copy"],
+                    batch_size=500,
+                )
+                books_done += len({copy.book_id for copy in copies})
+                created += len(copies)
+        chunks += 1
+        if len(batch) < batch_size:
+            break
+
+    return BackfillSummary(books=books_done, copies=created, chunks=chunks)
@@ -0,0 +1,107 @@
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, transaction
+from django.db.models import Sum
+
+from accounts.models import UserProfile
+from books import circulation
+from books.models import Book, IssuedBook
+from core.benchmarks import dump, run_concurrently, summarize
+
+
+def naive_checkout(student, book_id, qty):
+    """The old read-validate-write issue flow, kept for comparison"""
+    book = Book.objects.get(pk=book_id)
+    if qty > book.quantity:
+        return False
+    IssuedBook.objects.create(student=student, book=book, quantity=qty)
+    book.quantity -= qty
+    book.save()
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent checkouts of a single hot title. Creates a "
+        "throwaway book and student, hammers them from many threads and "
+        "reports throughput, latency and whether any copies were oversold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=50)
+        parser.add_argument("--attempts", type=int, default=20, help="Checkouts per worker")
+        parser.add_argument("--copies", type=int, default=500, help="Copies of the hot title")
+        parser.add_argument(
+            "--strategy",
+            choices=["atomic", "naive"],
+            default="atomic",
+            help="'atomic' uses books.circulation, 'naive' the old read-modify-write",
+        )
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:10]
+        with transaction.atomic():
+            user = User.objects.create_user(username=f"bench-{tag}", email=f"{tag}@bench.invalid")
+            student = UserProfile.objects.create(
+                user=user,
+                role="student",
+                status="approved",
+                name="Benchmark Student",
+                email=f"{tag}@bench.invalid",
+                phone_number="0",
+            )
+            book = Book.objects.create(
+                title=f"Benchmark title {tag}", author="Bench", isbn=tag, quantity=options["copies"]
+            )
+
+        strategy = options["strategy"]
+
+        def worker(index):
+            latencies, granted, refused, locked = [], 0, 0, 0
+            for _ in range(options["attempts"]):
+                started = time.perf_counter()
+                try:
+                    if strategy == "atomic":
+                        ok = circulation.checkout(student, Book(pk=book.pk), 1).ok
+                    else:
+                        ok = naive_checkout(student, book.pk, 1)
+                except OperationalError:
+                    locked += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                granted += ok
+                refused += not ok
+            return latencies, granted, refused, locked
+
+        try:
+            results, elapsed = run_concurrently(worker, options["workers"])
+
+            latencies = [sample for result in results for sample in result[0]]
+            granted = sum(result[1] for result in results)
+            shelf = Book.objects.get(pk=book.pk).quantity
+            loaned = IssuedBook.objects.filter(book=book).aggregate(total=Sum("quantity"))["total"] or 0
+
+            report = {
+                "strategy": strategy,
+                "workers": options["workers"],
+                "attempts": options["workers"] * options["attempts"],
+                "granted": granted,
+                "refused": sum(result[2] for result in results),
+                "lock_errors": sum(result[3] for result in results),
+                "elapsed_s": round(elapsed, 3),
+                "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+                "latency": summarize(latencies),
+                "copies": options["copies"],
+                "shelf_after": shelf,
+                "loaned_after": loaned,
+                # shelf + loaned must equal the starting copies, and every
+                # granted checkout must have a loan row
+                "consistent": shelf + loaned == options["copies"] and loaned == granted,
+            }
+            self.stdout.write(dump(report))
+        finally:
+            book.delete()
+            user.delete()
@@ -0,0 +1,187 @@
+import copy
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from accounts.models import UserProfile
+from books import circulation, queries
+from books.models import Book, IssuedBook
+from core.benchmarks import dump, run_concurrently, summarize
+from core.sqlite import PRODUCTION_PRAGMAS
+
+PROFILES = {
+    # Django's defaults. The journal mode is set explicitly because it is
+    # stored in the file, which may already be in WAL mode.
+    "stock": {
+        "pragmas": {"journal_mode": "DELETE"},
+        "database": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}},
+    },
+    # 'Root App.settings_production'
+    "production": {
+        "pragmas": PRODUCTION_PRAGMAS,
+        "database": {
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        },
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a mixed read/write workload (dashboard reads, checkouts and "
+        "returns) from many threads against a copy of the SQLite database, "
+        "once with the stock settings and once with the production profile, "
+        "and report lock errors and latency percentiles as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--operations", type=int, default=50, help="Requests per worker")
+        parser.add_argument(
+            "--write-ratio", type=float, default=0.3, help="Share of requests that write"
+        )
+        parser.add_argument(
+            "--profile",
+            choices=[*PROFILES, "both"],
+            default="both",
+            help="Settings to measure",
+        )
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_database compares SQLite settings; 'default' is not SQLite.")
+
+        students = list(queries.approved_students().values_list("pk", flat=True)[: options["workers"]])
+        book_ids = list(Book.objects.filter(quantity__gt=0).values_list("pk", flat=True)[:200])
+        if not students or not book_ids:
+            raise CommandError("Need approved students and books on the shelf; run seed_library first.")
+
+        profiles = list(PROFILES) if options["profile"] == "both" else [options["profile"]]
+        report = {
+            "workers": options["workers"],
+            "operations": options["workers"] * options["operations"],
+            "write_ratio": options["write_ratio"],
+            "profiles": {},
+        }
+        workdir = tempfile.mkdtemp(prefix="bench-database-")
+        try:
+            for name in profiles:
+                path = os.path.join(workdir, f"{name}.sqlite3")
+                self._copy_database(str(connection.settings_dict["NAME"]), path)
+                report["profiles"][name] = self._measure(
+                    PROFILES[name], path, students, book_ids, options
+                )
+                self.stderr.write(f"  {name}: done")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        output = dump(report)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output)
+
+    def _copy_database(self, source, target):
+        # Consistent snapshot even while the site keeps writing
+        src, dst = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+
+    def _measure(self, profile, path, students, book_ids, options):
+        # Connections read their settings dict when they connect, so
+        # changing it in place reconfigures every connection opened below
+        database = connections.settings[DEFAULT_DB_ALIAS]
+        original = copy.deepcopy(database)
+        connections.close_all()
+        database.update(copy.deepcopy(profile["database"]), NAME=path)
+
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        try:
+            with override_settings(SQLITE_PRAGMAS=profile["pragmas"]):
+                results, elapsed = run_concurrently(
+                    lambda index: self._work(index, students, book_ids, options),
+                    options["workers"],
+                )
+        finally:
+            connection_created.disconnect(count_connection)
+            connections.close_all()
+            database.clear()
+            database.update(original)
+
+        reads = [sample for result in results for sample in result["reads"]]
+        writes = [sample for result in results for sample in result["writes"]]
+        return {
+            "lock_errors": sum(result["lock_errors"] for result in results),
+            "connections_opened": len(opened),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round((len(reads) + len(writes)) / elapsed, 1),
+            "reads": summarize(reads),
+            "writes": summarize(writes),
+            "all": summarize(reads + writes),
+        }
+
+    def _work(self, index, students, book_ids, options):
+        # Seeded per worker, so every profile replays the same requests
+        rng = random.Random(index)
+        student = students[index % len(students)]
+        loans = []
+        result = {"reads": [], "writes": [], "lock_errors": 0}
+
+        for _ in range(options["operations"]):
+            writing = rng.random() < options["write_ratio"]
+            book_id = rng.choice(book_ids)
+            # Connections are opened and closed around requests as under
+            # a real server, which is where CONN_MAX_AGE applies
+            request_started.send(sender=self.__class__)
+            started = time.perf_counter()
+            try:
+                if not writing:
+                    self._read(student)
+                elif loans:
+                    circulation.return_(loans.pop())
+                else:
+                    checkout = circulation.checkout(
+                        UserProfile(pk=student), Book(pk=book_id), 1
+                    )
+                    if checkout.ok:
+                        loans.append(checkout.loan)
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                result["lock_errors"] += 1
+            else:
+                result["writes" if writing else "reads"].append(time.perf_counter() - started)
+            finally:
+                request_finished.send(sender=self.__class__)
+        return result
+
+    def _read(self, student):
+        """The queries of a student dashboard"""
+        list(queries.student_active_loans(student)[:10])
+        list(queries.student_overdue(student)[:10])
+        list(queries.catalog("available").order_by(*queries.CATALOG_ORDERING)[:20])
+        IssuedBook.objects.filter(student=student).count()
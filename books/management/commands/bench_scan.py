@@ -0,0 +1,90 @@
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from books.models import BookCopy
+from core.benchmarks import dump, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Time barcode scans at the circulation desk: check copies out to a "
+        "throwaway student and back in through the scan endpoint, and report "
+        "scan-to-confirmation latency as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scans", type=int, default=200, help="Copies checked out and back in")
+
+    def handle(self, *args, **options):
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+        librarian = (
+            UserProfile.objects.filter(role="librarian", status="approved")
+            .select_related("user")
+            .order_by("pk")
+            .first()
+        )
+        if librarian is None:
+            raise CommandError("No approved librarian found; run seed_library first.")
+        # One copy per title, so every checkout finds stock on the shelf
+        barcodes = list(
+            BookCopy.objects.filter(status=BookCopy.AVAILABLE, book__quantity__gt=0)
+            .order_by("book_id", "pk")
+            .values_list("barcode", "book_id")
+        )
+        seen, picked = set(), []
+        for barcode, book_id in barcodes:
+            if book_id not in seen:
+                seen.add(book_id)
+                picked.append(barcode)
+        picked = picked[: options["scans"]]
+        if not picked:
+            raise CommandError("No copies on the shelf; run backfill_copies first.")
+
+        tag = uuid.uuid4().hex[:10]
+        with transaction.atomic():
+            user = User.objects.create_user(username=f"bench-{tag}", email=f"{tag}@bench.invalid")
+            student = UserProfile.objects.create(
+                user=user,
+                role="student",
+                status="approved",
+                name="Benchmark Student",
+                email=f"{tag}@bench.invalid",
+                phone_number="0",
+            )
+
+        client = Client()
+        client.force_login(librarian.user)
+        path = reverse("scan")
+
+        def scan(barcode, **extra):
+            started = time.perf_counter()
+            response = client.post(
+                path, json.dumps({"barcode": barcode, **extra}), content_type="application/json"
+            )
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f"Scan of {barcode} failed: {response.content.decode()}")
+            return elapsed
+
+        try:
+            checkouts = [scan(barcode, student=student.pk) for barcode in picked]
+            returns = [scan(barcode) for barcode in picked]
+            report = {
+                "copies_in_table": BookCopy.objects.count(),
+                "scans": len(picked),
+                "checkout": summarize(checkouts),
+                "return": summarize(returns),
+            }
+            self.stdout.write(dump(report))
+        finally:
+            user.delete()
@@ -0,0 +1,129 @@
+import re
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from books import overdue, queries, rollups
+from books.models import DailyBookCirculation, DailyDepartmentCirculation, IssuedBook
+from core.pagination import KeysetPaginator
+
+# Plan steps that mean a dashboard query is not using an index
+FULL_SCAN = re.compile(r"^SCAN (?!.*\bUSING\b)(?!.*VIRTUAL TABLE)(?!CONSTANT ROW)")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the dashboard and catalog queries and fail on full scans or sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print the plan of every query, not only the failing ones",
+        )
+
+    def targets(self):
+        """(label, queryset) pairs, built exactly as the views build them"""
+        # Unsaved profile: only its pk is used in the WHERE clause
+        student = UserProfile(pk=0)
+        seek_date = timezone.make_aware(datetime(2025, 1, 1))
+
+        for status in ("all", "available", "unavailable"):
+            paginator = KeysetPaginator(
+                queries.catalog(status), queries.CATALOG_ORDERING, per_page=24
+            )
+            yield f"catalog[{status}] first page", paginator.page_queryset()
+            yield f"catalog[{status}] next page", paginator.page_queryset(
+                "next", [seek_date, 100]
+            )
+            yield f"catalog[{status}] previous page", paginator.page_queryset(
+                "prev", [seek_date, 100]
+            )
+
+        history = KeysetPaginator(
+            queries.student_history(student), queries.LOAN_ORDERING, per_page=20
+        )
+        yield "student active loans", queries.student_active_loans(student)
+        yield "student history first page", history.page_queryset()
+        yield "student history next page", history.page_queryset(
+            "next", [seek_date, 100]
+        )
+        yield "student history count", queries.student_history(student).order_by()
+        yield "student returned count", (
+            queries.student_history(student).filter(is_returned=True).order_by()
+        )
+
+        yield "student holds", queries.student_holds(student)
+        yield "student overdue", queries.student_overdue(student)
+
+        yield "librarian approved students", queries.approved_students()
+        yield "librarian books", queries.catalog().order_by(*queries.CATALOG_ORDERING)
+        yield "librarian active loans", queries.active_loans()
+        yield "librarian all loans", queries.all_loans()
+        yield "librarian recent loans", queries.recent_loans(10)
+        yield "librarian overdue loans", queries.overdue_loans(10)
+        yield "librarian overdue count", queries.overdue_loans().order_by()
+
+        yield "desk scan", queries.copy_by_barcode("000000010001")
+
+        yield "overdue job next chunk", KeysetPaginator(
+            IssuedBook.objects.filter(is_returned=False, due_date__lt=seek_date.date()),
+            overdue.OVERDUE_ORDERING,
+            per_page=1000,
+        ).page_queryset("next", [seek_date.date(), 100])
+
+        yield "rollup job changed loans", KeysetPaginator(
+            IssuedBook.objects.filter(updated_at__gte=seek_date),
+            rollups.CHANGED_ORDERING,
+            per_page=2000,
+        ).page_queryset("next", [seek_date, 100])
+
+        report_range = (seek_date.date(), seek_date.date() + timedelta(days=364))
+        yield "report circulation", DailyDepartmentCirculation.objects.filter(
+            day__range=report_range
+        )
+        yield "report department", DailyDepartmentCirculation.objects.filter(
+            department="CSE", day__range=report_range
+        )
+        yield "report book", DailyBookCirculation.objects.filter(
+            book_id=100, day__range=report_range
+        )
+
+    def explain(self, connection, queryset):
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                f"check_query_plans understands SQLite plans only (got {connection.vendor})"
+            )
+
+        failures = []
+        for label, queryset in self.targets():
+            plan = self.explain(connection, queryset)
+            problems = [
+                step for step in plan if FULL_SCAN.match(step) or TEMP_SORT in step
+            ]
+            if problems:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"✗ {label}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {label}"))
+            if problems or options["verbose_plans"]:
+                for step in plan:
+                    self.stdout.write(f"    {step}")
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} quer{'y' if len(failures) == 1 else 'ies'} "
+                "without a usable index"
+            )
+        self.stdout.write(self.style.SUCCESS("All dashboard queries use an index"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from books import circulation
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire ready holds past their pickup deadline, passing each copy to "
+        "the next student in line or back to the shelf. Run it periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Holds expired per transaction"
+        )
+
+    def handle(self, *args, **options):
+        expired = circulation.expire_holds(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} hold(s)"))
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from books import exports
+
+
+def date_argument(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise CommandError(f"Invalid date: {value}")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Stream the circulation history (IssuedBook) to CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(exports.EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (defaults to stdout)")
+        parser.add_argument("--from", dest="date_from", type=date_argument, help="Issued on or after YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date_argument, help="Issued on or before YYYY-MM-DD")
+        parser.add_argument("--student", dest="student_id", type=int, help="Student profile id")
+        parser.add_argument("--department", help="Department code, e.g. CSE")
+        parser.add_argument("--chunk-size", type=int, default=exports.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines, _ = exports.EXPORT_FORMATS[options["format"]]
+        loans = exports.filtered_loans(
+            date_from=options["date_from"],
+            date_to=options["date_to"],
+            student_id=options["student_id"],
+            department=options["department"],
+        )
+        rows = exports.iter_rows(loans, chunk_size=options["chunk_size"])
+
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            count = -1 if options["format"] == "csv" else 0  # CSV header line
+            for line in lines(rows):
+                output.write(line)
+                count += 1
+        finally:
+            if options["output"]:
+                output.close()
+
+        if options["output"]:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} loans to {options['output']}"))
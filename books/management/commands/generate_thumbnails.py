@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from books.models import Book
+from books.thumbnails import process_cover
+
+
+class Command(BaseCommand):
+    help = "Backfill cover thumbnails for books that do not have them yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate thumbnails for every cover, even existing ones",
+        )
+
+    def handle(self, *args, **options):
+        books = Book.objects.exclude(cover_image="").exclude(cover_image__isnull=True)
+        if not options["force"]:
+            books = books.filter(thumbnails_ready=False)
+
+        # Covers are shared between books (e.g. the default cover), so work
+        # per distinct file rather than per book
+        names = books.order_by().values_list("cover_image", flat=True).distinct()
+
+        done = failed = 0
+        for name in names.iterator():
+            try:
+                built = process_cover(name, force=options["force"])
+            except OSError as exc:
+                failed += 1
+                self.stderr.write(f"  {name}: {exc}")
+                continue
+            if not built:
+                failed += 1
+                self.stderr.write(f"  {name}: file not found")
+                continue
+            done += 1
+            if done % 100 == 0:
+                self.stdout.write(f"  {done} covers processed")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated thumbnails for {done} cover(s), {failed} failed")
+        )
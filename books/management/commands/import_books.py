@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from books import cache, stats
+from books.models import Book
+from books.search import get_backend
+
+# ``quantity`` is shelf stock that checkouts and holds move, so the file's
+# value only seeds new books; updating it would undo outstanding loans
+UPDATE_FIELDS = ["title", "author", "updated_at"]
+
+
+def read_rows(path, fmt):
+    """Yield ``(row_number, dict)`` from a CSV or JSON Lines file, one at a time"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(handle), start=1):
+                yield number, row
+        else:
+            number = 0
+            for line in handle:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+
+
+def clean_row(row, default_quantity):
+    """Validate one input row; returns ``(Book, None)`` or ``(None, reason)``"""
+    if not isinstance(row, dict):
+        return None, "unparseable row"
+    isbn = str(row.get("isbn") or "").replace("-", "").replace(" ", "").strip()
+    title = str(row.get("title") or "").strip()
+    author = str(row.get("author") or "").strip()
+    if not isbn or len(isbn) > 13:
+        return None, "missing or invalid isbn"
+    if not title or not author:
+        return None, "missing title or author"
+    try:
+        quantity = int(row.get("quantity") or default_quantity)
+    except (TypeError, ValueError):
+        return None, "invalid quantity"
+    if quantity < 0:
+        return None, "negative quantity"
+    return Book(isbn=isbn, title=title[:200], author=author[:200], quantity=quantity), None
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV or JSON Lines catalog dump into Book, upserting on ISBN in "
+        "batches. Progress is checkpointed so an interrupted import can resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="CSV (header: isbn,title,author,quantity) or .jsonl file; "
+            "quantity is only used for books not in the catalog yet",
+        )
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--default-quantity", type=int, default=1)
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (defaults to <path>.checkpoint)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the rows already committed according to the checkpoint",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+        batch_size = options["batch_size"]
+
+        offset = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as handle:
+                offset = json.load(handle)["offset"]
+            self.stdout.write(f"Resuming after row {offset}")
+
+        # Loaded once: tells inserts from updates and catches in-file duplicates
+        existing = set(Book.objects.values_list("isbn", flat=True).iterator(chunk_size=20000))
+        seen = set()
+        totals = {"inserted": 0, "updated": 0, "skipped": 0, "duplicates": 0}
+
+        started = time.perf_counter()
+        batch, consumed = [], offset
+        for number, row in read_rows(path, fmt):
+            if number <= offset:
+                continue
+            consumed = number
+
+            book, error = clean_row(row, options["default_quantity"])
+            if error:
+                totals["skipped"] += 1
+                self.stderr.write(f"  row {number}: {error}")
+                continue
+            if book.isbn in seen:
+                totals["duplicates"] += 1
+                continue
+            seen.add(book.isbn)
+
+            batch.append(book)
+            if len(batch) >= batch_size:
+                self._flush(batch, existing, totals)
+                self._save_checkpoint(checkpoint_path, consumed)
+                self._progress(consumed - offset, started, totals)
+                batch = []
+
+        if batch:
+            self._flush(batch, existing, totals)
+        self._save_checkpoint(checkpoint_path, consumed)
+
+        # Upserts bypass model signals: recount the book tiles and drop cached
+        # catalog fragments once at the end
+        stats.reconcile()
+        cache.catalog_changed()
+        os.remove(checkpoint_path)
+
+        elapsed = time.perf_counter() - started
+        rate = (consumed - offset) / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {consumed - offset} rows in {elapsed:.1f}s ({rate:,.0f} rows/s): "
+                + ", ".join(f"{key}={value}" for key, value in totals.items())
+            )
+        )
+
+    def _flush(self, batch, existing, totals):
+        with transaction.atomic():
+            Book.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["isbn"],
+                update_fields=UPDATE_FIELDS,
+            )
+            if any(book.pk is None for book in batch):
+                batch = list(
+                    Book.objects.filter(isbn__in=[book.isbn for book in batch]).only(
+                        "id", "title", "author", "isbn"
+                    )
+                )
+            get_backend().index(batch)
+
+        for book in batch:
+            if book.isbn in existing:
+                totals["updated"] += 1
+            else:
+                totals["inserted"] += 1
+                existing.add(book.isbn)
+
+    def _save_checkpoint(self, checkpoint_path, offset):
+        temporary = f"{checkpoint_path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"offset": offset}, handle)
+        os.replace(temporary, checkpoint_path)
+
+    def _progress(self, processed, started, totals):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {processed:,} rows, {processed / elapsed:,.0f} rows/s "
+            f"(inserted={totals['inserted']}, updated={totals['updated']})"
+        )
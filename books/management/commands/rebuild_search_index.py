@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from books.models import Book
+from books.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the catalog search index from the Book table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Books indexed per batch when the backend indexes incrementally",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        started = time.perf_counter()
+
+        backend.rebuild(Book.objects.all(), batch_size=options["batch_size"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {backend.__class__.__name__} index "
+                f"for {Book.objects.count()} books in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from books.models import LibraryStats
+from books.stats import COUNTER_FIELDS, compute_counts, reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the LibraryStats counters from the Book, IssuedBook and profile tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift between the stored and recomputed counters",
+        )
+
+    def handle(self, *args, **options):
+        stored = LibraryStats.objects.filter(pk=LibraryStats.SINGLETON_ID).first()
+        fresh = compute_counts()
+
+        drift = {
+            field: (getattr(stored, field) if stored else None, fresh[field])
+            for field in COUNTER_FIELDS
+            if stored is None or getattr(stored, field) != fresh[field]
+        }
+        for field, (old, new) in drift.items():
+            self.stdout.write(f"  {field}: stored={old} actual={new}")
+
+        if options["check"]:
+            if drift:
+                self.stdout.write(self.style.WARNING(f"{len(drift)} counter(s) drifted"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Counters are up to date"))
+            return
+
+        reconcile()
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled library statistics ({len(drift)} corrected)")
+        )
@@ -0,0 +1,232 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import UserProfile
+from books import cache, stats
+from books.models import Book, IssuedBook
+from books.search import get_backend
+
+# Fixed anchor so the same seed always yields the same rows
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+SPAN_DAYS = 730
+LOAN_PERIOD = timedelta(days=14)
+
+ADJECTIVES = [
+    "Silent", "Hidden", "Broken", "Golden", "Lost", "Quantum", "Digital", "Ancient",
+    "Crimson", "Electric", "Final", "Forgotten", "Infinite", "Modern", "Secret", "Wild",
+]
+NOUNS = [
+    "Algorithm", "Kingdom", "Circuit", "River", "Code", "Empire", "Network", "Garden",
+    "Machine", "Ocean", "Signal", "Theorem", "Voyage", "Archive", "Compiler", "Horizon",
+]
+SUBJECTS = [
+    "Data Structures", "Operating Systems", "Signals and Systems", "Robotics",
+    "Cryptography", "Databases", "Computer Networks", "Control Theory",
+    "Machine Learning", "Digital Logic", "Power Electronics", "Compilers",
+]
+FIRST_NAMES = [
+    "Rahim", "Karim", "Ayesha", "Fatima", "John", "Maria", "Arif", "Nusrat",
+    "Tanvir", "Sadia", "David", "Emma", "Imran", "Farhana", "Omar", "Lina",
+]
+LAST_NAMES = [
+    "Ahmed", "Hossain", "Rahman", "Islam", "Khan", "Smith", "Chowdhury", "Das",
+    "Uddin", "Akter", "Brown", "Sarkar", "Miah", "Roy", "Karim", "Haque",
+]
+DEPARTMENTS = [code for code, _ in UserProfile.DEPARTMENT_CHOICES]
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk inserts carry their own auto_now/auto_now_add values"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-sized library (books, students, "
+        "loans) with bulk inserts. Intended for benchmarking on a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=500_000)
+        parser.add_argument("--students", type=int, default=100_000)
+        parser.add_argument("--loans", type=int, default=5_000_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--password",
+            default="library-seed-1",
+            help="Password given to every seeded account (hashed once)",
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith="seed-").exists():
+            raise CommandError("This database already contains seeded accounts.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        started = time.perf_counter()
+
+        with manual_timestamps(Book, IssuedBook, UserProfile):
+            book_ids = self._seed_books(options["books"])
+            student_ids = self._seed_accounts(options["students"], options["password"])
+            self._seed_loans(options["loans"], book_ids, student_ids)
+
+        self.stdout.write("Rebuilding search index and statistics...")
+        get_backend().rebuild(Book.objects.all())
+        stats.reconcile()
+        cache.catalog_changed()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded library in {time.perf_counter() - started:.1f}s")
+        )
+
+    def _moment(self):
+        return EPOCH + timedelta(seconds=self.rng.randrange(SPAN_DAYS * 86400))
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def _report(self, label, done, total, started):
+        rate = done / (time.perf_counter() - started)
+        self.stdout.write(f"  {label}: {done:,}/{total:,} ({rate:,.0f}/s)")
+
+    def _seed_books(self, total):
+        rng, started = self.rng, time.perf_counter()
+        for start, end in self._batches(total):
+            books = []
+            for index in range(start, end):
+                created = self._moment()
+                if rng.random() < 0.4:
+                    title = f"{rng.choice(SUBJECTS)}, Vol. {index % 7 + 1}"
+                else:
+                    title = f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+                books.append(
+                    Book(
+                        title=f"{title} #{index}",
+                        author=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                        isbn=f"978{index:010d}",
+                        quantity=rng.choice((0, 1, 1, 2, 3, 5, 8)),
+                        created_at=created,
+                        updated_at=created,
+                    )
+                )
+            with transaction.atomic():
+                Book.objects.bulk_create(books)
+            self._report("books", end, total, started)
+        return list(Book.objects.order_by("pk").values_list("pk", flat=True))
+
+    def _seed_accounts(self, total, password):
+        rng, started = self.rng, time.perf_counter()
+        encoded = make_password(password)
+
+        librarian = User.objects.create(
+            username="seed-librarian", email="librarian@seed.library", password=encoded
+        )
+        UserProfile.objects.create(
+            user=librarian,
+            role="librarian",
+            status="approved",
+            name="Seed Librarian",
+            email="librarian@seed.library",
+            phone_number="01700000000",
+            created_at=EPOCH,
+            updated_at=EPOCH,
+        )
+
+        for start, end in self._batches(total):
+            users, profiles = [], []
+            for index in range(start, end):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                email = f"{first.lower()}.{last.lower()}.{index}@seed.library"
+                users.append(
+                    User(
+                        username=f"seed-{index}",
+                        email=email,
+                        password=encoded,
+                        first_name=first,
+                        last_name=last,
+                    )
+                )
+                created = self._moment()
+                profiles.append(
+                    UserProfile(
+                        role="student",
+                        status="pending" if rng.random() < 0.02 else "approved",
+                        name=f"{first} {last}",
+                        email=email,
+                        # bulk_create skips UserProfile.save()
+                        email_normalized=UserProfile.normalize_email(email),
+                        phone_number=f"017{index:08d}",
+                        id_number=f"S{index:07d}",
+                        department=rng.choice(DEPARTMENTS),
+                        created_at=created,
+                        updated_at=created,
+                    )
+                )
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                for user, profile in zip(users, profiles):
+                    profile.user_id = user.pk
+                UserProfile.objects.bulk_create(profiles)
+            self._report("students", end, total, started)
+
+        return list(
+            UserProfile.objects.filter(role="student", status="approved")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def _seed_loans(self, total, book_ids, student_ids):
+        if not book_ids or not student_ids:
+            return
+        rng, started = self.rng, time.perf_counter()
+        cutoff = EPOCH + timedelta(days=SPAN_DAYS - 30)
+
+        for start, end in self._batches(total):
+            loans = []
+            for _ in range(start, end):
+                issued = self._moment()
+                # Everything but the last month's loans has come back
+                returned = issued < cutoff or rng.random() < 0.5
+                return_date = (
+                    (issued + timedelta(days=rng.randint(1, 30))).date() if returned else None
+                )
+                loans.append(
+                    IssuedBook(
+                        student_id=rng.choice(student_ids),
+                        book_id=rng.choice(book_ids),
+                        quantity=1,
+                        issue_date=issued.date(),
+                        due_date=issued.date() + LOAN_PERIOD,
+                        return_date=return_date,
+                        is_returned=returned,
+                        created_at=issued,
+                        updated_at=issued,
+                    )
+                )
+            with transaction.atomic():
+                IssuedBook.objects.bulk_create(loans)
+            if end % (self.batch_size * 20) == 0 or end == total:
+                self._report("loans", end, total, started)
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2025-12-02 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('author', models.CharField(max_length=200)),
+                ('isbn', models.CharField(max_length=13, unique=True)),
+                ('quantity', models.IntegerField(default=1)),
+                ('cover_image', models.ImageField(blank=True, default='book_covers/DaVinciCode.jpg', help_text='Upload a book cover image (JPG, PNG)', null=True, upload_to='book_covers/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IssuedBook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=1)),
+                ('issue_date', models.DateField(auto_now_add=True)),
+                ('return_date', models.DateField(blank=True, null=True)),
+                ('is_returned', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issued_to', to='books.book')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='issued_books', to='accounts.userprofile')),
+            ],
+            options={
+                'ordering': ['-issue_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2025-12-04 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_books', models.IntegerField(default=0)),
+                ('available_books', models.IntegerField(default=0)),
+                ('unavailable_books', models.IntegerField(default=0)),
+                ('total_students', models.IntegerField(default=0)),
+                ('active_borrowed', models.IntegerField(default=0)),
+                ('total_returned', models.IntegerField(default=0)),
+                ('pending_approvals', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Library statistics',
+                'verbose_name_plural': 'Library statistics',
+            },
+        ),
+    ]
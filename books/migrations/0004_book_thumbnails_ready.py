@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2025-12-06 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_librarystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2025-12-09 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_userprofile_role_created_index'),
+        ('books', '0004_book_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-created_at', '-id'], name='book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['-created_at', '-id'], name='book_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('quantity', 0)), fields=['-created_at', '-id'], name='book_unavailable_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(fields=['student', 'is_returned', '-issue_date', '-id'], name='loan_student_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(fields=['student', '-issue_date', '-id'], name='loan_student_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(fields=['-issue_date', '-id'], name='loan_issue_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(condition=models.Q(('is_returned', False)), fields=['-issue_date', '-id'], name='loan_active_idx'),
+        ),
+    ]
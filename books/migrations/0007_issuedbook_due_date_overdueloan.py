@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2025-12-13 10:05
+
+from datetime import timedelta
+
+import books.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_due_date(apps, schema_editor):
+    # One UPDATE per issue date rather than per loan
+    IssuedBook = apps.get_model('books', 'IssuedBook')
+    period = timedelta(days=getattr(settings, 'LOAN_PERIOD_DAYS', 14))
+    issue_dates = IssuedBook.objects.order_by().values_list('issue_date', flat=True).distinct()
+    for issue_date in list(issue_dates):
+        IssuedBook.objects.filter(issue_date=issue_date).update(due_date=issue_date + period)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_approvaljob'),
+        ('books', '0006_book_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueLoan',
+            fields=[
+                ('loan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='overdue', serialize=False, to='books.issuedbook')),
+                ('quantity', models.IntegerField(default=1)),
+                ('due_date', models.DateField()),
+                ('days_overdue', models.PositiveIntegerField(default=0)),
+                ('fine', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['due_date', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='issuedbook',
+            name='due_date',
+            field=models.DateField(default=books.models.default_due_date),
+        ),
+        migrations.RunPython(backfill_due_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(condition=models.Q(('is_returned', False)), fields=['due_date', 'id'], name='loan_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='overdueloan',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overdue_loans', to='books.book'),
+        ),
+        migrations.AddField(
+            model_name='overdueloan',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overdue_loans', to='accounts.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='overdueloan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['due_date', 'loan'], name='overdue_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overdueloan',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['student', 'due_date', 'loan'], name='overdue_student_idx'),
+        ),
+    ]
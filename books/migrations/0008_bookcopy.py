@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2025-12-14 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_issuedbook_due_date_overdueloan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCopy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=32, unique=True)),
+                ('status', models.CharField(choices=[('available', 'On the shelf'), ('on_loan', 'On loan'), ('held', 'On the hold shelf')], default='available', max_length=20)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copies', to='books.book')),
+                ('current_loan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='copies_out', to='books.issuedbook')),
+            ],
+            options={
+                'verbose_name_plural': 'book copies',
+                'ordering': ['barcode'],
+            },
+        ),
+        migrations.AddField(
+            model_name='issuedbook',
+            name='copy',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loans', to='books.bookcopy'),
+        ),
+        migrations.AddIndex(
+            model_name='bookcopy',
+            index=models.Index(fields=['book', 'status'], name='copy_book_status_idx'),
+        ),
+    ]
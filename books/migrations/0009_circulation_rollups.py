@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2025-12-15 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_bookcopy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('checkouts', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('late_returns', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyDepartmentCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('department', models.CharField(max_length=50)),
+                ('checkouts', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('late_returns', models.PositiveIntegerField(default=0)),
+                ('borrowers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'department'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('loans_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(fields=['updated_at', 'id'], name='loan_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbook',
+            index=models.Index(condition=models.Q(('is_returned', True)), fields=['return_date'], name='loan_returned_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailybookcirculation',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_circulation', to='books.book'),
+        ),
+        migrations.AddIndex(
+            model_name='dailydepartmentcirculation',
+            index=models.Index(fields=['department', 'day'], name='daily_department_history_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailydepartmentcirculation',
+            constraint=models.UniqueConstraint(fields=('day', 'department'), name='daily_department_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='dailybookcirculation',
+            index=models.Index(fields=['book', 'day'], name='daily_book_history_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailybookcirculation',
+            constraint=models.UniqueConstraint(fields=('day', 'book'), name='daily_book_unique'),
+        ),
+    ]
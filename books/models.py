@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -12,6 +15,8 @@ class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=200)
     isbn = models.CharField(max_length=13, unique=True)
+    # Copies on the shelf: the denormalized availability count, moved by the
+    # same conditional UPDATEs that issue and return copies
     quantity = models.IntegerField(default=1)
     cover_image = models.ImageField(
         upload_to="book_covers/",
@@ -20,6 +25,10 @@ class Book(models.Model):
         help_text="Upload a book cover image (JPG, PNG)",
         default="book_covers/DaVinciCode.jpg",
     )
+    # Set by the thumbnail worker once every derivative of the cover exists
+    thumbnails_ready = models.BooleanField(default=False)
+    # Students waiting in the hold queue (denormalized from Hold)
+    holds_waiting = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -28,6 +37,72 @@ class Book(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Catalog pages: ORDER BY created_at DESC, id DESC (keyset seek)
+            models.Index(fields=["-created_at", "-id"], name="book_created_idx"),
+            # Same ordering restricted to the availability filters
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(quantity__gt=0),
+                name="book_available_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(quantity=0),
+                name="book_unavailable_idx",
+            ),
+        ]
+
+
+class BookCopy(models.Model):
+    """
+    One physical copy of a book, identified by the barcode on its label.
+
+    Desk circulation scans copies (``books.circulation.checkout_copy`` and
+    ``return_copy``), so the status says where each copy is and
+    ``current_loan`` which loan has it out. ``Book.quantity`` stays the
+    number of copies on the shelf.
+    """
+
+    AVAILABLE = "available"
+    ON_LOAN = "on_loan"
+    HELD = "held"
+
+    STATUS_CHOICES = [
+        (AVAILABLE, "On the shelf"),
+        (ON_LOAN, "On loan"),
+        (HELD, "On the hold shelf"),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="copies")
+    barcode = models.CharField(max_length=32, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=AVAILABLE)
+    location = models.CharField(max_length=100, blank=True)
+    current_loan = models.ForeignKey(
+        "IssuedBook",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="copies_out",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["barcode"]
+        verbose_name_plural = "book copies"
+        indexes = [
+            # Copies of a title by status (inventory, backfill)
+            models.Index(fields=["book", "status"], name="copy_book_status_idx"),
+        ]
+
+    def __str__(self):
+        return self.barcode
+
+
+def default_due_date():
+    """Due date of a loan issued today"""
+    return timezone.localdate() + timedelta(days=getattr(settings, "LOAN_PERIOD_DAYS", 14))
 
 
 class IssuedBook(models.Model):
@@ -38,8 +113,13 @@ class IssuedBook(models.Model):
         limit_choices_to={"role": "student"},  # Ensure only students can be selected
     )
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="issued_to")
+    # The copy out on a loan of one copy (all copies out point back via current_loan)
+    copy = models.ForeignKey(
+        BookCopy, on_delete=models.SET_NULL, null=True, blank=True, related_name="loans"
+    )
     quantity = models.IntegerField(default=1)
     issue_date = models.DateField(auto_now_add=True)
+    due_date = models.DateField(default=default_due_date)
     return_date = models.DateField(null=True, blank=True)
     is_returned = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -48,5 +128,266 @@ class IssuedBook(models.Model):
     def __str__(self):
         return f"{self.book.title} - {self.student.name}"
 
+    @property
+    def is_overdue(self):
+        return not self.is_returned and self.due_date < timezone.localdate()
+
     class Meta:
         ordering = ["-issue_date"]
+        indexes = [
+            # Student dashboard: active loans and history, newest first
+            models.Index(
+                fields=["student", "is_returned", "-issue_date", "-id"],
+                name="loan_student_active_idx",
+            ),
+            models.Index(
+                fields=["student", "-issue_date", "-id"],
+                name="loan_student_history_idx",
+            ),
+            # Librarian dashboard: all / active loans, newest first
+            models.Index(fields=["-issue_date", "-id"], name="loan_issue_date_idx"),
+            models.Index(
+                fields=["-issue_date", "-id"],
+                condition=models.Q(is_returned=False),
+                name="loan_active_idx",
+            ),
+            # Overdue job: active loans past their due date, oldest first
+            # (an (is_returned, due_date) index restricted to is_returned=False)
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(is_returned=False),
+                name="loan_due_idx",
+            ),
+            # Rollup job: loans changed since its watermark, in order
+            models.Index(fields=["updated_at", "id"], name="loan_updated_idx"),
+            # Rollup job: loans returned on given days
+            models.Index(
+                fields=["return_date"],
+                condition=models.Q(is_returned=True),
+                name="loan_returned_idx",
+            ),
+        ]
+
+
+class OverdueLoan(models.Model):
+    """
+    Materialized list of overdue loans and their fines.
+
+    Rebuilt incrementally by ``manage.py process_overdue`` so dashboards
+    read it directly instead of scanning loans. A row stops being active
+    once its loan is returned; the fine accrued until then is kept.
+    """
+
+    loan = models.OneToOneField(
+        IssuedBook, on_delete=models.CASCADE, primary_key=True, related_name="overdue"
+    )
+    student = models.ForeignKey(
+        UserProfile, on_delete=models.CASCADE, related_name="overdue_loans"
+    )
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="overdue_loans")
+    quantity = models.IntegerField(default=1)
+    due_date = models.DateField()
+    days_overdue = models.PositiveIntegerField(default=0)
+    fine = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["due_date", "pk"]
+        indexes = [
+            # Librarian dashboard: everything overdue, longest overdue first
+            models.Index(
+                fields=["due_date", "loan"],
+                condition=models.Q(is_active=True),
+                name="overdue_active_idx",
+            ),
+            # Student dashboard: own overdue loans and outstanding fines
+            models.Index(
+                fields=["student", "due_date", "loan"],
+                condition=models.Q(is_active=True),
+                name="overdue_student_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Loan #{self.loan_id} overdue {self.days_overdue} day(s)"
+
+
+class LibraryStats(models.Model):
+    """
+    Denormalized library-wide counters shown on the librarian dashboard.
+
+    A single row (``pk=1``) kept up to date by the signals in
+    ``books.signals`` and by the bulk code paths through ``books.stats``.
+    ``manage.py reconcile_stats`` recomputes it from the source tables.
+    """
+
+    SINGLETON_ID = 1
+
+    total_books = models.IntegerField(default=0)
+    available_books = models.IntegerField(default=0)
+    unavailable_books = models.IntegerField(default=0)
+    total_students = models.IntegerField(default=0)
+    active_borrowed = models.IntegerField(default=0)
+    total_returned = models.IntegerField(default=0)
+    pending_approvals = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Library statistics"
+        verbose_name_plural = "Library statistics"
+
+    def __str__(self):
+        return f"Library statistics ({self.updated_at:%Y-%m-%d %H:%M})"
+
+    @classmethod
+    def load(cls):
+        """Return the counters row, building it on first use"""
+        stats = cls.objects.filter(pk=cls.SINGLETON_ID).first()
+        if stats is None:
+            from .stats import reconcile
+
+            stats = reconcile()
+        return stats
+
+
+class Hold(models.Model):
+    """
+    A student's place in the FIFO queue for a book with no copy on the shelf.
+
+    Returned copies go straight to the head of the queue (see
+    ``books.circulation``): the hold becomes ``ready`` and the copy is kept
+    off the shelf until it is collected or the pickup deadline passes.
+    """
+
+    WAITING = "waiting"
+    READY = "ready"
+    FULFILLED = "fulfilled"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+    STATUS_CHOICES = [
+        (WAITING, "Waiting"),
+        (READY, "Ready for pickup"),
+        (FULFILLED, "Collected"),
+        (CANCELLED, "Cancelled"),
+        (EXPIRED, "Expired"),
+    ]
+
+    ACTIVE_STATUSES = (WAITING, READY)
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="holds")
+    student = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="holds",
+        limit_choices_to={"role": "student"},
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=WAITING)
+    # Position in the book's queue while waiting (1 = next copy returned);
+    # shifted on every dequeue so showing it never needs a COUNT. 0 otherwise.
+    queue_rank = models.PositiveIntegerField(default=0)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    loan = models.ForeignKey(
+        IssuedBook,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="holds",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.book.title} - {self.student.name} ({self.get_status_display()})"
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # Head of a book's queue, and rank shifts behind it
+            models.Index(fields=["book", "status", "queue_rank"], name="hold_queue_idx"),
+            # Pickup-deadline sweep
+            models.Index(fields=["status", "expires_at"], name="hold_pickup_idx"),
+            # Student dashboard
+            models.Index(
+                fields=["student", "status", "queue_rank"], name="hold_student_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "student"],
+                condition=models.Q(status__in=["waiting", "ready"]),
+                name="hold_one_active_per_student",
+            ),
+        ]
+
+
+class DailyBookCirculation(models.Model):
+    """
+    Loans of one book issued and returned on one day.
+
+    Maintained by ``manage.py rollup_circulation`` (``books.rollups``) so
+    reports read one row per day instead of scanning loans.
+    """
+
+    day = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="daily_circulation")
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+    # Returns after the due date
+    late_returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "pk"]
+        constraints = [
+            # Also the index for date-range reports over all books
+            models.UniqueConstraint(fields=["day", "book"], name="daily_book_unique"),
+        ]
+        indexes = [
+            # One book's history over a date range
+            models.Index(fields=["book", "day"], name="daily_book_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} on {self.day}: {self.checkouts} out, {self.returns} in"
+
+
+class DailyDepartmentCirculation(models.Model):
+    """Loans by students of one department issued and returned on one day"""
+
+    day = models.DateField()
+    department = models.CharField(max_length=50)
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+    late_returns = models.PositiveIntegerField(default=0)
+    # Distinct students who borrowed that day
+    borrowers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "department"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "department"], name="daily_department_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["department", "day"], name="daily_department_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.department} on {self.day}: {self.checkouts} out, {self.returns} in"
+
+
+class RollupWatermark(models.Model):
+    """
+    How far a rollup job has got: loans updated up to ``loans_updated_at``
+    are included in its tables.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    loans_updated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} up to {self.loans_updated_at}"
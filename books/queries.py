@@ -0,0 +1,105 @@
+"""
+Querysets issued by the dashboards and the catalog.
+
+Views build their lists from these functions so that
+``manage.py check_query_plans`` can EXPLAIN exactly the same SQL. Orderings
+always end in ``id`` so they match the composite indexes on ``Book`` and
+``IssuedBook`` (and can be keyset paginated).
+"""
+
+from accounts.models import UserProfile
+
+from .models import Book, BookCopy, Hold, IssuedBook, OverdueLoan
+
+CATALOG_ORDERING = ("-created_at", "-id")
+LOAN_ORDERING = ("-issue_date", "-id")
+
+
+def catalog(filter_status="all"):
+    """Books filtered by availability, as on the student dashboard"""
+    books = Book.objects.all()
+    if filter_status == "available":
+        books = books.filter(quantity__gt=0)
+    elif filter_status == "unavailable":
+        books = books.filter(quantity=0)
+    return books
+
+
+def student_active_loans(student):
+    return (
+        IssuedBook.objects.filter(student=student, is_returned=False)
+        .select_related("book")
+        .order_by(*LOAN_ORDERING)
+    )
+
+
+def student_history(student):
+    return (
+        IssuedBook.objects.filter(student=student)
+        .select_related("book")
+        .order_by(*LOAN_ORDERING)
+    )
+
+
+def student_holds(student):
+    """Active holds: ready ones ("ready" < "waiting") first, then by queue position"""
+    return (
+        Hold.objects.filter(student=student, status__in=Hold.ACTIVE_STATUSES)
+        .select_related("book")
+        .order_by("status", "queue_rank")
+    )
+
+
+def student_overdue(student):
+    return (
+        OverdueLoan.objects.filter(student=student, is_active=True)
+        .select_related("book")
+        .order_by("due_date", "pk")
+    )
+
+
+def approved_students():
+    return UserProfile.objects.filter(role="student", status="approved").order_by(
+        "-created_at", "-id"
+    )
+
+
+def active_loans():
+    return (
+        IssuedBook.objects.filter(is_returned=False)
+        .select_related("book", "student", "student__user")
+        .order_by(*LOAN_ORDERING)
+    )
+
+
+def all_loans():
+    return (
+        IssuedBook.objects.all()
+        .select_related("book", "student", "student__user")
+        .order_by(*LOAN_ORDERING)
+    )
+
+
+def recent_loans(limit=10):
+    return (
+        IssuedBook.objects.all()
+        .select_related("book", "student")
+        .order_by(*LOAN_ORDERING)[:limit]
+    )
+
+
+def overdue_loans(limit=None):
+    """Loans currently overdue, longest overdue first (from the overdue table)"""
+    loans = (
+        OverdueLoan.objects.filter(is_active=True)
+        .select_related("book", "student")
+        .order_by("due_date", "pk")
+    )
+    return loans[:limit] if limit else loans
+
+
+def copy_by_barcode(barcode):
+    """A scanned copy with its book and current loan: one unique-index lookup"""
+    return BookCopy.objects.select_related("book", "current_loan").filter(
+        barcode=barcode
+    )
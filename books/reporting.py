@@ -0,0 +1,132 @@
+"""
+Circulation reports from the daily rollups (``books.rollups``).
+
+Each report is one date-range read of a rollup table; the rows are laid
+out as dense NumPy arrays with one slot per day, and every statistic
+(totals, moving averages, trend lines, percentiles, weekday profile) is
+computed on whole arrays. A year of data is a few thousand rows and a few
+vector operations.
+"""
+
+import numpy as np
+from django.db.models import Sum
+
+from .models import DailyBookCirculation, DailyDepartmentCirculation
+from .rollups import watermark
+
+PERCENTILES = (50, 90, 95, 99)
+MOVING_AVERAGE_DAYS = 7
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _dense(rows, date_from, date_to, fields):
+    """
+    ``{field: array}`` with one slot per day in ``[date_from, date_to]``.
+
+    ``rows`` are ``(day, *values)`` tuples; rows sharing a day are summed.
+    """
+    size = (date_to - date_from).days + 1
+    if not rows:
+        return {field: np.zeros(size, dtype=np.int64) for field in fields}
+
+    columns = list(zip(*rows))
+    offsets = (
+        np.array(columns[0], dtype="datetime64[D]") - np.datetime64(date_from, "D")
+    ).astype(np.int64)
+    return {
+        field: np.bincount(
+            offsets, weights=np.array(values, dtype=np.float64), minlength=size
+        ).astype(np.int64)
+        for field, values in zip(fields, columns[1:])
+    }
+
+
+def moving_average(series, window=MOVING_AVERAGE_DAYS):
+    """Trailing mean over ``window`` days (shorter at the start)"""
+    sums = np.cumsum(series, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(1, len(series) + 1), window)
+    return sums / counts
+
+
+def trend(series):
+    """Least-squares line through the series: ``(slope per day, fitted values)``"""
+    if len(series) < 2:
+        return 0.0, series.astype(np.float64)
+    days = np.arange(len(series), dtype=np.float64)
+    slope, intercept = np.polyfit(days, series.astype(np.float64), 1)
+    return float(slope), slope * days + intercept
+
+
+def weekday_profile(series, date_from):
+    """Mean per weekday (Monday first)"""
+    weekdays = (np.arange(len(series)) + date_from.weekday()) % 7
+    totals = np.bincount(weekdays, weights=series, minlength=7)
+    counts = np.bincount(weekdays, minlength=7)
+    return np.divide(totals, counts, out=np.zeros(7), where=counts > 0)
+
+
+def _rounded(values, digits=2):
+    return np.round(values, digits).tolist()
+
+
+def _summary(series, date_from):
+    slope, fitted = trend(series)
+    return {
+        "total": int(series.sum()),
+        "daily": series.tolist(),
+        "moving_average": _rounded(moving_average(series)),
+        "trend": {"slope_per_day": round(slope, 4), "line": _rounded(fitted)},
+        "percentiles": dict(
+            zip(
+                (f"p{p}" for p in PERCENTILES),
+                _rounded(np.percentile(series, PERCENTILES)),
+            )
+        ),
+        "weekday_mean": dict(zip(WEEKDAYS, _rounded(weekday_profile(series, date_from)))),
+    }
+
+
+def _report(rows, date_from, date_to, fields):
+    series = _dense(rows, date_from, date_to, fields)
+    return {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "as_of": watermark(),
+        "series": {field: _summary(values, date_from) for field, values in series.items()},
+    }
+
+
+def circulation_report(date_from, date_to, department=None):
+    """Library-wide (or one department's) daily circulation with trends"""
+    fields = ("checkouts", "returns", "late_returns", "borrowers")
+    rows = DailyDepartmentCirculation.objects.filter(day__range=(date_from, date_to))
+    if department:
+        rows = rows.filter(department=department)
+    report = _report(list(rows.values_list("day", *fields)), date_from, date_to, fields)
+    report["departments"] = list(
+        DailyDepartmentCirculation.objects.filter(day__range=(date_from, date_to))
+        .values("department")
+        .annotate(checkouts=Sum("checkouts"), returns=Sum("returns"))
+        .order_by("-checkouts", "department")
+    )
+    return report
+
+
+def book_report(book, date_from, date_to):
+    """One book's daily circulation with trends"""
+    fields = ("checkouts", "returns", "late_returns")
+    rows = DailyBookCirculation.objects.filter(book=book, day__range=(date_from, date_to))
+    report = _report(list(rows.values_list("day", *fields)), date_from, date_to, fields)
+    report["book"] = {"id": book.pk, "title": book.title}
+    return report
+
+
+def top_books(date_from, date_to, limit=10):
+    """Most borrowed books in the date range"""
+    return list(
+        DailyBookCirculation.objects.filter(day__range=(date_from, date_to))
+        .values("book_id", "book__title")
+        .annotate(checkouts=Sum("checkouts"), returns=Sum("returns"))
+        .order_by("-checkouts", "book_id")[:limit]
+    )
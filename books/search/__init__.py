@@ -0,0 +1,42 @@
+"""
+Catalog search for ``Book``.
+
+Views never filter the catalog with ``icontains`` directly; they go through
+``search_books`` which delegates to the configured backend. The backend is
+chosen with the ``BOOK_SEARCH_BACKEND`` setting (a dotted path) and defaults
+to the SQLite FTS5 index when running on SQLite.
+"""
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+FTS_BACKEND = "books.search.backends.sqlite_fts.SQLiteFTSBackend"
+DATABASE_BACKEND = "books.search.backends.database.DatabaseSearchBackend"
+
+_backend = None
+
+
+def get_backend():
+    """Return the (cached) search backend instance"""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "BOOK_SEARCH_BACKEND", None)
+        if path is None:
+            path = FTS_BACKEND if connection.vendor == "sqlite" else DATABASE_BACKEND
+        _backend = import_string(path)()
+    return _backend
+
+
+def search_books(queryset, query, limit=None):
+    """Restrict ``queryset`` to books matching ``query``, best matches first"""
+    return get_backend().search(queryset, query, limit=limit)
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting == "BOOK_SEARCH_BACKEND":
+        _backend = None
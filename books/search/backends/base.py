@@ -0,0 +1,77 @@
+import re
+
+from django.db.models import Case, IntegerField, Value, When
+
+# Hyphens inside ISBNs ("978-0-385-50420-1") are dropped so the number is
+# matched as a single token.
+ISBN_HYPHEN_RE = re.compile(r"(?<=\d)-(?=\d)")
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into lowercase search terms"""
+    return TOKEN_RE.findall(ISBN_HYPHEN_RE.sub("", query.lower()))
+
+
+class BaseSearchBackend:
+    """
+    Interface every catalog search backend implements.
+
+    ``index``/``remove`` are called from the ``Book`` signals, ``rebuild``
+    from the ``rebuild_search_index`` command and ``search`` from the views.
+    """
+
+    # Upper bound on ranked hits returned to a view, counted after the
+    # caller's filters
+    result_limit = 200
+
+    def index(self, books):
+        """Add or refresh the given books in the index"""
+        raise NotImplementedError
+
+    def remove(self, book_ids):
+        """Drop the given book ids from the index"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Empty the index"""
+        raise NotImplementedError
+
+    def rebuild(self, queryset, batch_size=2000):
+        """Re-index every book in ``queryset``"""
+        self.clear()
+        batch = []
+        for book in queryset.only("id", "title", "author", "isbn").iterator(
+            chunk_size=batch_size
+        ):
+            batch.append(book)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+    def search_ids(self, query, limit, queryset=None):
+        """
+        Return matching book ids ordered by relevance.
+
+        With ``queryset``, only its books are ranked: the filter is applied
+        before ``limit``, not to the top ``limit`` hits of the whole index.
+        """
+        raise NotImplementedError
+
+    def search(self, queryset, query, limit=None):
+        """Filter ``queryset`` to the matches of ``query`` ordered by relevance"""
+        ids = self.search_ids(query, limit or self.result_limit, queryset=queryset)
+        if not ids:
+            return queryset.none()
+
+        ranking = Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return (
+            queryset.filter(pk__in=ids)
+            .annotate(search_rank=ranking)
+            .order_by("search_rank")
+        )
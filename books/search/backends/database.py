@@ -0,0 +1,41 @@
+from django.db.models import Q
+
+from .base import BaseSearchBackend
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend for databases without FTS5 (e.g. MySQL).
+
+    Keeps no index of its own and filters with ``icontains``, which is the
+    behaviour the dashboards had before the search index existed.
+    """
+
+    def index(self, books):
+        pass
+
+    def remove(self, book_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, queryset, batch_size=2000):
+        pass
+
+    def _filter(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query)
+            | Q(author__icontains=query)
+            | Q(isbn__icontains=query)
+        )
+
+    def search_ids(self, query, limit, queryset=None):
+        if queryset is None:
+            from books.models import Book
+
+            queryset = Book.objects.all()
+        return list(self._filter(queryset, query).values_list("pk", flat=True)[:limit])
+
+    def search(self, queryset, query, limit=None):
+        return self._filter(queryset, query)[: limit or self.result_limit]
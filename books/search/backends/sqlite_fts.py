@@ -0,0 +1,98 @@
+from django.db import connections
+
+from .base import BaseSearchBackend, tokenize
+
+TABLE = "books_book_fts"
+
+# bm25 column weights: title matches outrank author matches, which outrank ISBN
+TITLE_WEIGHT = 10.0
+AUTHOR_WEIGHT = 5.0
+ISBN_WEIGHT = 2.0
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index over ``title``, ``author`` and ``isbn``.
+
+    The FTS table keeps its own copy of the indexed columns with
+    ``rowid = books_book.id``, so refreshing a book is a delete + insert of
+    one row. Every query term is prefix-matched and results are ranked by
+    weighted bm25.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    def _cursor(self):
+        return connections[self.using].cursor()
+
+    def setup(self):
+        """Create the FTS table if it does not exist yet"""
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                "title, author, isbn, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def index(self, books):
+        rows = [(book.pk, book.title, book.author, book.isbn) for book in books]
+        if not rows:
+            return
+        with self._cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, title, author, isbn) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, book_ids):
+        with self._cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE rowid = %s", [(pk,) for pk in book_ids]
+            )
+
+    def clear(self):
+        with self._cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+
+    def rebuild(self, queryset, batch_size=2000):
+        """Re-index in one INSERT ... SELECT when indexing the whole table"""
+        self.setup()
+        if queryset.query.where:
+            return super().rebuild(queryset, batch_size=batch_size)
+
+        self.clear()
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, title, author, isbn) "
+                f"SELECT id, title, author, isbn FROM {queryset.model._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+    @staticmethod
+    def match_expression(query):
+        """Turn user input into an FTS5 query: every term, prefix matched"""
+        terms = tokenize(query)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search_ids(self, query, limit, queryset=None):
+        """Rank matches in one statement, restricted to ``queryset`` before the LIMIT"""
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        sql, params = f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [expression]
+        if queryset is not None and queryset.query.where:
+            subquery = queryset.order_by().values("pk").query
+            subquery_sql, subquery_params = subquery.get_compiler(self.using).as_sql()
+            sql += f" AND rowid IN ({subquery_sql})"
+            params.extend(subquery_params)
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"{sql} ORDER BY bm25({TABLE}, %s, %s, %s) LIMIT %s",
+                [*params, TITLE_WEIGHT, AUTHOR_WEIGHT, ISBN_WEIGHT, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,142 @@
+from collections import Counter
+
+from django.db.models.expressions import Combinable
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+
+from core.tasks import run_in_background
+
+from . import cache, stats
+from .models import Book, Hold, IssuedBook
+from .search import get_backend
+from .thumbnails import process_cover
+
+SEARCH_FIELDS = {"title", "author", "isbn"}
+
+# Fields each counted model is classified by, and the classifier to use
+COUNTED_MODELS = {
+    Book: (("quantity",), stats.book_counters),
+    IssuedBook: (("is_returned",), stats.loan_counters),
+    UserProfile: (("role", "status"), stats.profile_counters),
+}
+
+
+# ============= SEARCH INDEX =============
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the catalog search index in sync with the saved book"""
+    if raw:
+        return
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    get_backend().index([instance])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    """Drop a deleted book from the catalog search index"""
+    get_backend().remove([instance.pk])
+
+
+# ============= COVER THUMBNAILS =============
+
+
+@receiver(pre_save, sender=Book)
+def detect_cover_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Flag books whose cover is new or replaced so thumbnails are rebuilt"""
+    instance._cover_changed = False
+    if raw or (update_fields is not None and "cover_image" not in update_fields):
+        return
+    if not instance.cover_image:
+        return
+    if not instance._state.adding:
+        previous = (
+            sender._base_manager.filter(pk=instance.pk)
+            .values_list("cover_image", flat=True)
+            .first()
+        )
+        if previous == instance.cover_image.name:
+            return
+    instance._cover_changed = True
+    instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Book)
+def queue_thumbnails(sender, instance, raw=False, **kwargs):
+    """Render the cover thumbnails on a worker, never in the request"""
+    if raw or not getattr(instance, "_cover_changed", False):
+        return
+    run_in_background(process_cover, instance.cover_image.name)
+
+
+# ============= DASHBOARD CACHE =============
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_catalog(sender, instance, raw=False, **kwargs):
+    """Any book write invalidates cached catalog fragments"""
+    if not raw:
+        cache.catalog_changed()
+
+
+@receiver(post_save, sender=IssuedBook)
+@receiver(post_delete, sender=IssuedBook)
+@receiver(post_save, sender=Hold)
+@receiver(post_delete, sender=Hold)
+def invalidate_student_loans(sender, instance, raw=False, **kwargs):
+    """A loan or hold write invalidates that student's cached dashboard fragments"""
+    if not raw:
+        cache.loans_changed(instance.student_id)
+
+
+# ============= LIBRARY STATISTICS =============
+
+
+def _touches_counters(sender, update_fields):
+    fields, _ = COUNTED_MODELS[sender]
+    return update_fields is None or bool(set(fields).intersection(update_fields))
+
+
+def _classify(sender, instance):
+    fields, classify = COUNTED_MODELS[sender]
+    values = [getattr(instance, field) for field in fields]
+    if any(isinstance(value, Combinable) for value in values):
+        # Saved with an F() expression: read back the stored values
+        instance.refresh_from_db(fields=list(fields))
+        values = [getattr(instance, field) for field in fields]
+    return classify(*values)
+
+
+def snapshot_counters(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember how the row was counted before this save"""
+    instance._stats_before = Counter()
+    if raw or instance._state.adding or not _touches_counters(sender, update_fields):
+        return
+    fields, classify = COUNTED_MODELS[sender]
+    row = (
+        sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+    )
+    if row is not None:
+        instance._stats_before = classify(*row)
+
+
+def update_counters_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches_counters(sender, update_fields):
+        return
+    before = getattr(instance, "_stats_before", Counter())
+    stats.apply_delta(stats.diff(before, _classify(sender, instance)))
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    stats.apply_delta(stats.diff(_classify(sender, instance), Counter()))
+
+
+for _model in COUNTED_MODELS:
+    pre_save.connect(snapshot_counters, sender=_model)
+    post_save.connect(update_counters_on_save, sender=_model)
+    post_delete.connect(update_counters_on_delete, sender=_model)
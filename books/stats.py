@@ -0,0 +1,125 @@
+"""
+Incremental maintenance of the ``LibraryStats`` counters.
+
+Every write that can move a dashboard tile reports the change as a delta
+(``apply_delta``) instead of the dashboard re-counting the tables. The
+``*_counters`` helpers classify a single row; the delta for a change is
+simply ``counters(new) - counters(old)``.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from accounts.models import UserProfile
+
+from .models import Book, IssuedBook, LibraryStats
+
+COUNTER_FIELDS = (
+    "total_books",
+    "available_books",
+    "unavailable_books",
+    "total_students",
+    "active_borrowed",
+    "total_returned",
+    "pending_approvals",
+)
+
+
+# ============= ROW CLASSIFICATION =============
+
+
+def book_counters(quantity):
+    return Counter(
+        total_books=1,
+        available_books=int(quantity > 0),
+        unavailable_books=int(quantity == 0),
+    )
+
+
+def loan_counters(is_returned):
+    return Counter(
+        active_borrowed=int(not is_returned),
+        total_returned=int(bool(is_returned)),
+    )
+
+
+def profile_counters(role, status):
+    return Counter(
+        total_students=int(role == "student" and status == "approved"),
+        pending_approvals=int(status == "pending"),
+    )
+
+
+def diff(old, new):
+    """Counter delta between two classifications (either may be empty)"""
+    delta = Counter(new)
+    delta.subtract(old)
+    return delta
+
+
+# ============= APPLYING CHANGES =============
+
+
+def apply_delta(delta):
+    """Add ``delta`` to the stored counters in one UPDATE"""
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if not changes:
+        return
+    updated = LibraryStats.objects.filter(pk=LibraryStats.SINGLETON_ID).update(
+        updated_at=timezone.now(), **changes
+    )
+    if not updated:
+        # First write ever: the recount already includes this change
+        reconcile()
+
+
+def apply_profile_status_change(queryset, status):
+    """
+    Delta for moving every profile in ``queryset`` to ``status``.
+
+    Used by the set-based admin actions, which bypass model signals. Must be
+    called *before* the UPDATE so the current statuses can still be read.
+    """
+    delta = Counter()
+    rows = queryset.order_by().values("role", "status").annotate(n=Count("pk"))
+    for row in rows:
+        change = diff(
+            profile_counters(row["role"], row["status"]),
+            profile_counters(row["role"], status),
+        )
+        for field, value in change.items():
+            delta[field] += value * row["n"]
+    return delta
+
+
+# ============= RECONCILIATION =============
+
+
+def compute_counts():
+    """Recount every counter from the source tables"""
+    books = Book.objects.aggregate(
+        total_books=Count("pk"),
+        available_books=Count("pk", filter=Q(quantity__gt=0)),
+        unavailable_books=Count("pk", filter=Q(quantity=0)),
+    )
+    loans = IssuedBook.objects.aggregate(
+        active_borrowed=Count("pk", filter=Q(is_returned=False)),
+        total_returned=Count("pk", filter=Q(is_returned=True)),
+    )
+    profiles = UserProfile.objects.aggregate(
+        total_students=Count("pk", filter=Q(role="student", status="approved")),
+        pending_approvals=Count("pk", filter=Q(status="pending")),
+    )
+    return {**books, **loans, **profiles}
+
+
+@transaction.atomic
+def reconcile():
+    """Overwrite the counters with a fresh recount and return the row"""
+    stats, _ = LibraryStats.objects.update_or_create(
+        pk=LibraryStats.SINGLETON_ID, defaults=compute_counts()
+    )
+    return stats
@@ -0,0 +1,53 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from books.thumbnails import DENSITIES, THUMBNAIL_SIZES, thumbnail_name, webp_supported
+
+register = template.Library()
+
+
+def _srcset(source_name, preset, fmt):
+    return ", ".join(
+        f"{default_storage.url(thumbnail_name(source_name, preset, density, fmt))} {density}x"
+        for density in DENSITIES
+    )
+
+
+@register.simple_tag
+def cover_picture(book, preset="card", css_class="", style=""):
+    """
+    Lazy-loaded ``<picture>`` for a book cover at one of the thumbnail presets.
+
+    Serves WebP with a JPEG fallback at 1x/2x once the thumbnail worker has
+    run, and the original upload until then.
+
+    Usage: ``{% cover_picture book "small" style="border-radius: 4px;" %}``
+    """
+    width, height = THUMBNAIL_SIZES[preset]
+    attrs = format_html(
+        'alt="{}" width="{}" height="{}" loading="lazy" decoding="async" class="{}" style="{}"',
+        book.title,
+        width,
+        height,
+        css_class,
+        style,
+    )
+
+    if not book.thumbnails_ready:
+        return format_html('<img src="{}" {}>', book.cover_image.url, attrs)
+
+    name = book.cover_image.name
+    sources = ""
+    if webp_supported():
+        sources = format_html_join(
+            "", '<source type="image/webp" srcset="{}">', [(_srcset(name, preset, "webp"),)]
+        )
+    fallback = default_storage.url(thumbnail_name(name, preset, DENSITIES[0], "jpeg"))
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" {}></picture>',
+        sources,
+        fallback,
+        _srcset(name, preset, "jpeg"),
+        attrs,
+    )
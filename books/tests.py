@@ -1,3 +1,692 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+
+from . import circulation, rollups, stats
+from .models import (
+    Book,
+    BookCopy,
+    DailyBookCirculation,
+    DailyDepartmentCirculation,
+    Hold,
+    IssuedBook,
+    LibraryStats,
+)
+from .search import DATABASE_BACKEND, FTS_BACKEND, get_backend, search_books
+
+User = get_user_model()
+
+
+def make_student(username, department="CSE", status="approved"):
+    user = User.objects.create_user(username=username, email=f"{username}@example.com")
+    return UserProfile.objects.create(
+        user=user,
+        role="student",
+        status=status,
+        name=username.title(),
+        email=user.email,
+        phone_number="01700000000",
+        id_number=username,
+        department=department,
+    )
+
+
+def make_book(isbn, quantity=1, title=None, author="Author"):
+    return Book.objects.create(
+        title=title or f"Book {isbn}", author=author, isbn=isbn, quantity=quantity
+    )
+
+
+def shelf(book):
+    return Book.objects.values_list("quantity", flat=True).get(pk=book.pk)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.code = make_book("9780385504201", title="The Da Vinci Code", author="Dan Brown")
+        self.origin = make_book("9780385514231", title="Origin", author="Dan Brown")
+        self.fortress = make_book("9780312944926", title="Digital Fortress", quantity=0)
+
+    def titles(self, query, queryset=None):
+        books = search_books(Book.objects.all() if queryset is None else queryset, query)
+        return [book.title for book in books]
+
+    def test_terms_are_prefix_matched(self):
+        self.assertEqual(self.titles("vinc cod"), ["The Da Vinci Code"])
+        self.assertEqual(self.titles("!!"), [])
+
+    def test_title_matches_rank_above_author_matches(self):
+        make_book("9780000000001", title="Brown Bear", author="Eric Carle")
+
+        self.assertEqual(self.titles("brown")[0], "Brown Bear")
+
+    def test_hyphenated_isbns_match(self):
+        self.assertEqual(self.titles("978-0-312-94492-6"), ["Digital Fortress"])
+
+    def test_results_stay_within_the_queryset(self):
+        available = Book.objects.filter(quantity__gt=0)
+
+        self.assertEqual(self.titles("digital", available), [])
+
+    def test_filters_apply_before_the_result_limit(self):
+        # The best matches are all off the shelf
+        for n in range(3):
+            make_book(f"97800000001{n:02d}", title=f"Python {n}", quantity=0)
+        make_book("9780000000200", title="Snakes", author="Python Society")
+        available = Book.objects.filter(quantity__gt=0)
+
+        for path in (FTS_BACKEND, DATABASE_BACKEND):
+            with self.subTest(backend=path), override_settings(BOOK_SEARCH_BACKEND=path):
+                with mock.patch.object(get_backend(), "result_limit", 2):
+                    self.assertEqual(self.titles("python", available), ["Snakes"])
+                    self.assertEqual(len(self.titles("python")), 2)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.origin.title = "Inferno"
+        self.origin.save()
+        self.code.delete()
+
+        self.assertEqual(self.titles("origin"), [])
+        self.assertEqual(self.titles("inferno"), ["Inferno"])
+        self.assertEqual(self.titles("vinci"), [])
+
+    def test_rebuild_restores_the_index(self):
+        get_backend().clear()
+        self.assertEqual(self.titles("fortress"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(self.titles("fortress"), ["Digital Fortress"])
+
+    @override_settings(BOOK_SEARCH_BACKEND=DATABASE_BACKEND)
+    def test_database_backend_matches_substrings(self):
+        self.assertEqual(self.titles("inci co"), ["The Da Vinci Code"])
+
+
+class CirculationTests(TestCase):
+    def setUp(self):
+        self.alice = make_student("alice")
+        self.bob = make_student("bob")
+        self.book = make_book("1000000000001", quantity=2)
+
+    def test_checkout_never_oversells(self):
+        self.assertTrue(circulation.checkout(self.alice, self.book, 2).ok)
+
+        result = circulation.checkout(self.bob, self.book, 1)
+
+        self.assertEqual(result.status, circulation.INSUFFICIENT_STOCK)
+        self.assertEqual(shelf(self.book), 0)
+        self.assertEqual(IssuedBook.objects.count(), 1)
+
+    def test_checkout_of_more_than_the_shelf_changes_nothing(self):
+        result = circulation.checkout(self.alice, self.book, 3)
+
+        self.assertEqual(result.status, circulation.INSUFFICIENT_STOCK)
+        self.assertEqual(shelf(self.book), 2)
+        self.assertFalse(IssuedBook.objects.exists())
+
+    def test_checkout_rejects_non_positive_quantities(self):
+        result = circulation.checkout(self.alice, self.book, 0)
+
+        self.assertEqual(result.status, circulation.INVALID_QUANTITY)
+        self.assertEqual(shelf(self.book), 2)
+
+    def test_stale_book_instances_cannot_oversell(self):
+        stale = Book.objects.get(pk=self.book.pk)
+        circulation.checkout(self.alice, self.book, 2)
+
+        self.assertEqual(stale.quantity, 2)
+        self.assertFalse(circulation.checkout(self.bob, stale, 1).ok)
+        self.assertEqual(shelf(self.book), 0)
+
+    def test_returns_cannot_exceed_the_loan(self):
+        loan = circulation.checkout(self.alice, self.book, 2).loan
+
+        partial = circulation.return_(loan, 1)
+        self.assertEqual((partial.still_borrowed, partial.shelf_quantity), (1, 1))
+
+        self.assertEqual(circulation.return_(loan, 2).status, circulation.OVER_RETURN)
+        self.assertTrue(circulation.return_(loan).ok)
+        self.assertEqual(circulation.return_(loan, 1).status, circulation.ALREADY_RETURNED)
+
+        loan.refresh_from_db()
+        self.assertTrue(loan.is_returned)
+        self.assertEqual(loan.quantity, 0)
+        self.assertEqual(shelf(self.book), 2)
+
+    def test_bulk_checkout_serves_rows_in_order(self):
+        results = circulation.bulk_checkout(
+            [
+                (self.alice.pk, self.book.pk, 1),
+                (self.bob.pk, self.book.pk, 2),
+                (self.bob.pk, self.book.pk, 1),
+                (0, self.book.pk, 1),
+                (self.alice.pk, 0, 1),
+                (self.alice.pk, self.book.pk, 0),
+            ]
+        )
+
+        self.assertEqual(
+            [result.status for result in results],
+            [
+                circulation.OK,
+                circulation.INSUFFICIENT_STOCK,
+                circulation.OK,
+                circulation.UNKNOWN_STUDENT,
+                circulation.UNKNOWN_BOOK,
+                circulation.INVALID_QUANTITY,
+            ],
+        )
+        self.assertEqual(shelf(self.book), 0)
+        self.assertEqual(IssuedBook.objects.count(), 2)
+
+    def test_bulk_checkout_skips_students_awaiting_approval(self):
+        pending = make_student("pending", status="pending")
+
+        [result] = circulation.bulk_checkout([(pending.pk, self.book.pk, 1)])
+
+        self.assertEqual(result.status, circulation.UNKNOWN_STUDENT)
+        self.assertEqual(shelf(self.book), 2)
+
+    def test_bulk_return_counts_earlier_rows_for_the_same_loan(self):
+        loan = circulation.checkout(self.alice, self.book, 2).loan
+
+        results = circulation.bulk_return(
+            [(loan.pk, 1), (loan.pk, 2), (loan.pk, None), (loan.pk, 1), (0, 1)]
+        )
+
+        self.assertEqual(
+            [result.status for result in results],
+            [
+                circulation.OK,
+                circulation.OVER_RETURN,
+                circulation.OK,
+                circulation.ALREADY_RETURNED,
+                circulation.UNKNOWN_LOAN,
+            ],
+        )
+        loan.refresh_from_db()
+        self.assertEqual((loan.quantity, loan.is_returned), (0, True))
+        self.assertEqual(shelf(self.book), 2)
+
+
+class HoldTests(TestCase):
+    def setUp(self):
+        self.alice = make_student("alice")
+        self.bob = make_student("bob")
+        self.carol = make_student("carol")
+        self.book = make_book("1000000000002", quantity=1)
+        self.loan = circulation.checkout(self.alice, self.book, 1).loan
+
+    def hold(self, student):
+        return Hold.objects.get(
+            book=self.book, student=student, status__in=Hold.ACTIVE_STATUSES
+        )
+
+    def queue(self):
+        return circulation.place_hold(self.bob, self.book), circulation.place_hold(
+            self.carol, self.book
+        )
+
+    def test_holds_need_an_empty_shelf(self):
+        other = make_book("1000000000003", quantity=1)
+
+        self.assertEqual(
+            circulation.place_hold(self.bob, other).status, circulation.AVAILABLE
+        )
+
+    def test_queue_positions_and_duplicates(self):
+        bob, carol = self.queue()
+
+        self.assertEqual((bob.position, carol.position), (1, 2))
+        self.assertEqual(
+            circulation.place_hold(self.bob, self.book).status, circulation.ALREADY_HOLDING
+        )
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.holds_waiting, 2)
+
+    def test_return_goes_to_the_head_of_the_queue(self):
+        self.queue()
+
+        result = circulation.return_(self.loan)
+
+        self.assertEqual((result.reserved, result.shelf_quantity), (1, 0))
+        self.assertEqual(self.hold(self.bob).status, Hold.READY)
+        self.assertEqual(self.hold(self.carol).queue_rank, 1)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.quantity, self.book.holds_waiting), (0, 1))
+
+    def test_cancelling_a_waiting_hold_moves_the_queue_up(self):
+        bob, _ = self.queue()
+
+        self.assertTrue(circulation.cancel_hold(bob.hold).ok)
+
+        self.assertEqual(self.hold(self.carol).queue_rank, 1)
+        self.assertEqual(circulation.cancel_hold(bob.hold).status, circulation.NOT_ACTIVE)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.holds_waiting, 1)
+
+    def test_cancelling_a_ready_hold_passes_the_copy_on(self):
+        self.queue()
+        circulation.return_(self.loan)
+
+        circulation.cancel_hold(self.hold(self.bob))
+        self.assertEqual(self.hold(self.carol).status, Hold.READY)
+        self.assertEqual(shelf(self.book), 0)
+
+        circulation.cancel_hold(self.hold(self.carol))
+        self.assertEqual(shelf(self.book), 1)
+
+    def test_expired_pickups_go_to_the_next_student_then_the_shelf(self):
+        self.queue()
+        circulation.return_(self.loan)
+        later = timezone.now() + timedelta(days=30)
+
+        self.assertEqual(circulation.expire_holds(now=later), 1)
+        self.assertEqual(
+            Hold.objects.get(student=self.bob, book=self.book).status, Hold.EXPIRED
+        )
+        self.assertEqual(self.hold(self.carol).status, Hold.READY)
+        self.assertEqual(shelf(self.book), 0)
+
+        # Made ready by the last run, so not expired by it
+        self.assertEqual(circulation.expire_holds(now=later), 1)
+        self.assertEqual(shelf(self.book), 1)
+
+    def test_ready_holds_are_collected_once(self):
+        self.queue()
+        circulation.return_(self.loan)
+        hold = self.hold(self.bob)
+
+        result = circulation.collect_hold(hold)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.loan.student, self.bob)
+        self.assertEqual(circulation.collect_hold(hold).status, circulation.NOT_READY)
+        self.assertEqual(IssuedBook.objects.filter(student=self.bob).count(), 1)
+        self.assertEqual(shelf(self.book), 0)
+
+
+class DeskScanTests(TestCase):
+    def setUp(self):
+        self.alice = make_student("alice")
+        self.bob = make_student("bob")
+        self.carol = make_student("carol")
+        self.book = make_book("1000000000004", quantity=2)
+        self.first = BookCopy.objects.create(book=self.book, barcode="C-1")
+        self.second = BookCopy.objects.create(book=self.book, barcode="C-2")
+
+    def statuses(self):
+        return dict(BookCopy.objects.values_list("barcode", "status"))
+
+    def available_copies(self):
+        return BookCopy.objects.filter(book=self.book, status=BookCopy.AVAILABLE).count()
+
+    def test_scans_move_copies_in_and_out(self):
+        result = circulation.checkout_copy(self.alice, self.first)
+
+        self.assertTrue(result.ok)
+        self.assertEqual((result.loan.copy, result.remaining), (self.first, 1))
+        self.assertEqual(self.statuses(), {"C-1": BookCopy.ON_LOAN, "C-2": BookCopy.AVAILABLE})
+        self.assertEqual(
+            circulation.checkout_copy(self.bob, self.first).status, circulation.COPY_UNAVAILABLE
+        )
+
+        self.first.refresh_from_db()
+        self.assertTrue(circulation.return_copy(self.first).ok)
+
+        self.assertEqual(self.statuses()["C-1"], BookCopy.AVAILABLE)
+        self.assertTrue(IssuedBook.objects.get(pk=result.loan.pk).is_returned)
+        self.assertEqual(shelf(self.book), 2)
+        self.assertEqual(circulation.return_copy(self.first).status, circulation.NOT_ON_LOAN)
+
+    def test_returns_for_a_waiting_hold_go_to_the_hold_shelf(self):
+        circulation.checkout_copy(self.alice, self.first)
+        circulation.checkout_copy(self.alice, self.second)
+        hold = circulation.place_hold(self.bob, self.book).hold
+
+        self.assertEqual(circulation.return_copy(self.first).reserved, 1)
+        self.assertEqual(self.statuses()["C-1"], BookCopy.HELD)
+
+        result = circulation.checkout_copy(self.bob, self.first)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(Hold.objects.get(pk=hold.pk).status, Hold.FULFILLED)
+        self.assertEqual(self.statuses()["C-1"], BookCopy.ON_LOAN)
+        self.assertEqual(shelf(self.book), 0)
+
+    def test_copies_follow_holds(self):
+        circulation.checkout_copy(self.alice, self.first)
+        circulation.checkout_copy(self.alice, self.second)
+        hold = circulation.place_hold(self.bob, self.book).hold
+
+        circulation.return_copy(self.first)
+        self.assertEqual(self.statuses()["C-1"], BookCopy.HELD)
+        self.assertEqual(
+            circulation.checkout_copy(self.carol, self.first).status, circulation.COPY_HELD
+        )
+
+        circulation.cancel_hold(hold)
+        self.assertEqual(self.statuses()["C-1"], BookCopy.AVAILABLE)
+        self.assertEqual(self.available_copies(), shelf(self.book))
+
+    def test_collecting_with_a_shelf_copy_reshelves_the_held_one(self):
+        circulation.checkout_copy(self.alice, self.first)
+        circulation.checkout_copy(self.alice, self.second)
+        circulation.place_hold(self.bob, self.book)
+        circulation.return_copy(self.first)
+        circulation.return_copy(self.second)
+        self.assertEqual(self.statuses(), {"C-1": BookCopy.HELD, "C-2": BookCopy.AVAILABLE})
+
+        result = circulation.checkout_copy(self.bob, self.second)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(
+            self.statuses(), {"C-1": BookCopy.AVAILABLE, "C-2": BookCopy.ON_LOAN}
+        )
+        self.assertEqual(self.available_copies(), shelf(self.book))
+
+    def test_bulk_returns_of_scanned_loans_reshelve_the_copy(self):
+        loan = circulation.checkout_copy(self.alice, self.first).loan
+
+        circulation.bulk_return([(loan.pk, None)])
+
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.current_loan), (BookCopy.AVAILABLE, None))
+        self.assertEqual(self.available_copies(), shelf(self.book))
+        self.assertTrue(circulation.checkout_copy(self.bob, self.first).ok)
+
+    def test_quantity_returns_while_a_hold_waits_fill_the_hold_shelf(self):
+        loan = circulation.checkout(self.alice, self.book, 2).loan
+        self.assertEqual(self.statuses(), {"C-1": BookCopy.ON_LOAN, "C-2": BookCopy.ON_LOAN})
+        hold = circulation.place_hold(self.bob, self.book).hold
+
+        circulation.return_(loan, 1)
+
+        self.assertEqual(self.statuses(), {"C-1": BookCopy.HELD, "C-2": BookCopy.ON_LOAN})
+        collected = circulation.collect_hold(Hold.objects.get(pk=hold.pk))
+        self.assertEqual(self.statuses()["C-1"], BookCopy.ON_LOAN)
+        self.assertEqual(collected.loan.copy, self.first)
+
+        circulation.return_(loan)
+        circulation.return_copy(BookCopy.objects.get(barcode="C-1"))
+        self.assertEqual(self.statuses(), {"C-1": BookCopy.AVAILABLE, "C-2": BookCopy.AVAILABLE})
+        self.assertEqual(self.available_copies(), shelf(self.book))
+
+    def test_bulk_checkouts_take_copies_from_the_shelf(self):
+        results = circulation.bulk_checkout(
+            [(self.alice.pk, self.book.pk, 1), (self.bob.pk, self.book.pk, 1)]
+        )
+
+        loans = IssuedBook.objects.in_bulk([result.loan_id for result in results])
+        self.assertEqual(
+            {loan.copy.current_loan_id for loan in loans.values()}, set(loans)
+        )
+        self.assertEqual(self.available_copies(), shelf(self.book))
+
+    def test_scan_endpoint(self):
+        librarian = make_student("librarian")
+        UserProfile.objects.filter(pk=librarian.pk).update(role="librarian")
+        self.client.force_login(librarian.user)
+        url = reverse("scan")
+
+        def post(payload):
+            return self.client.post(url, payload, content_type="application/json")
+
+        checkout = post({"barcode": " C-1 ", "student": self.alice.pk})
+        self.assertEqual(
+            (checkout.status_code, checkout.json()["action"]), (200, "checkout")
+        )
+        self.assertEqual(post({"barcode": "C-1"}).json()["copy_status"], BookCopy.AVAILABLE)
+        self.assertEqual(post({"barcode": "C-2"}).status_code, 400)
+        self.assertEqual(post({"barcode": "C-9", "student": self.alice.pk}).status_code, 404)
+
+
+class StatsTests(TestCase):
+    def counters(self):
+        row = LibraryStats.load()
+        return {field: getattr(row, field) for field in stats.COUNTER_FIELDS}
+
+    def test_signal_deltas_match_a_recount(self):
+        alice = make_student("alice")
+        pending = make_student("pending", status="pending")
+        stats.reconcile()
+
+        book, other = make_book("1000000000001", quantity=2), make_book("1000000000002")
+        loan = IssuedBook.objects.create(student=alice, book=book)
+        IssuedBook.objects.create(student=alice, book=other)
+        other.quantity = 0
+        other.save()
+        loan.is_returned = True
+        loan.save()
+        pending.approve()
+        make_book("1000000000003").delete()
+
+        self.assertEqual(self.counters(), stats.compute_counts())
+
+    def test_status_changes_apply_one_delta(self):
+        profiles = [make_student(name) for name in ("ann", "ben", "cat")]
+        stats.reconcile()
+        queryset = UserProfile.objects.filter(pk__in=[profile.pk for profile in profiles])
+
+        stats.apply_delta(stats.apply_profile_status_change(queryset, "pending"))
+        queryset.update(status="pending")
+
+        self.assertEqual(self.counters(), stats.compute_counts())
+
+    def test_first_write_builds_the_row(self):
+        make_book("1000000000004")
+
+        self.assertEqual(self.counters(), stats.compute_counts())
+
+    def test_circulation_deltas_match_a_recount(self):
+        alice, bob = make_student("alice"), make_student("bob")
+        stats.reconcile()
+        book = make_book("1000000000005", quantity=2)
+
+        loan = circulation.checkout(alice, book, 2).loan
+        circulation.place_hold(bob, book)
+        circulation.return_(loan, 1)
+        circulation.return_(loan)
+        other = make_book("1000000000006")
+        results = circulation.bulk_checkout([(alice.pk, other.pk, 1), (bob.pk, book.pk, 1)])
+        circulation.bulk_return([(results[0].loan_id, None)])
+
+        self.assertEqual(self.counters(), stats.compute_counts())
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.alice = make_student("alice", department="CSE")
+        self.bob = make_student("bob", department="EEE")
+        self.book = make_book("1000000000007", quantity=5)
+        today = timezone.localdate()
+        for student, days_ago in ((self.alice, 3), (self.bob, 3), (self.alice, 1)):
+            loan = circulation.checkout(student, self.book, 1).loan
+            IssuedBook.objects.filter(pk=loan.pk).update(
+                issue_date=today - timedelta(days=days_ago)
+            )
+        circulation.return_(loan)
+
+    def rollup_rows(self):
+        return (
+            sorted(
+                DailyBookCirculation.objects.values_list(
+                    "day", "book_id", "checkouts", "returns", "late_returns"
+                )
+            ),
+            sorted(
+                DailyDepartmentCirculation.objects.values_list(
+                    "day", "department", "checkouts", "returns", "borrowers"
+                )
+            ),
+        )
+
+    def test_rerunning_over_the_watermark_changes_nothing(self):
+        first = rollups.refresh()
+        rows, mark = self.rollup_rows(), rollups.watermark()
+
+        # Starts before the watermark, so it sees the same loans again
+        again = rollups.refresh()
+
+        self.assertEqual(first.loans, 3)
+        self.assertEqual(again.loans, 3)
+        self.assertEqual(self.rollup_rows(), rows)
+        self.assertEqual(rollups.watermark(), mark)
+
+    def test_incremental_runs_match_a_rebuild(self):
+        rollups.refresh()
+        circulation.checkout(self.bob, self.book, 1)
+        circulation.return_(IssuedBook.objects.filter(is_returned=False).first())
+
+        rollups.refresh()
+        incremental = self.rollup_rows()
+        rollups.refresh(rebuild=True)
+
+        self.assertEqual(self.rollup_rows(), incremental)
+        today = timezone.localdate()
+        self.assertIn((today, self.book.pk, 1, 2, 0), incremental[0])
+
+
+class CatalogApiTests(TestCase):
+    def setUp(self):
+        # Cached catalog data is keyed by version, not by test database
+        cache.clear()
+        self.book = make_book("1000000000008", quantity=3)
+        self.url = reverse("catalog_api")
+
+    def test_unchanged_catalog_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        # Answered from the cached fingerprint alone
+        with self.assertNumQueries(0):
+            response_304 = self.client.get(
+                self.url, headers={"if-none-match": response.headers["ETag"]}
+            )
+        self.assertEqual(response_304.status_code, 304)
+        self.assertEqual(
+            self.client.get(
+                self.url, headers={"if-modified-since": response.headers["Last-Modified"]}
+            ).status_code,
+            304,
+        )
+
+    def test_etag_depends_on_the_query(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        response = self.client.get(
+            self.url, {"status": "available"}, headers={"if-none-match": etag}
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_book_changes_invalidate_the_etag(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            circulation.checkout(make_student("alice"), self.book, 1)
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["quantity"], 2)
+
+    def test_pages_follow_the_cursor(self):
+        make_book("1000000000009")
+
+        first = self.client.get(self.url, {"limit": 1}).json()
+        second = self.client.get(self.url, {"limit": 1, "cursor": first["next"]}).json()
+
+        self.assertEqual(
+            [book["isbn"] for book in first["results"] + second["results"]],
+            ["1000000000009", "1000000000008"],
+        )
+        self.assertIsNone(second["next"])
+
+
+class ImportBooksTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_books", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_rows_are_upserted_on_isbn(self):
+        make_book("9780385504201", title="Old title")
+        path = self.write(
+            "books.csv",
+            "isbn,title,author,quantity\n"
+            "978-0-385-50420-1,The Da Vinci Code,Dan Brown,4\n"
+            "9780385514231,Origin,Dan Brown,2\n"
+            "9780385514231,Origin again,Dan Brown,2\n"
+            ",No isbn,Nobody,1\n"
+            "9780312944926,Digital Fortress,Dan Brown,-1\n",
+        )
+
+        out, err = self.run_import(path)
+
+        self.assertIn("inserted=1, updated=1, skipped=2, duplicates=1", out)
+        self.assertIn("row 4: missing or invalid isbn", err)
+        self.assertEqual(Book.objects.get(isbn="9780385504201").title, "The Da Vinci Code")
+        self.assertEqual(
+            [book.title for book in search_books(Book.objects.all(), "origin")], ["Origin"]
+        )
+        self.assertEqual(LibraryStats.load().total_books, 2)
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_resume_skips_committed_rows(self):
+        path = self.write(
+            "books.jsonl",
+            "\n".join(
+                json.dumps({"isbn": f"100000000000{n}", "title": f"T{n}", "author": "A"})
+                for n in range(1, 5)
+            )
+            + "\nnot json\n",
+        )
+        self.write("books.jsonl.checkpoint", json.dumps({"offset": 2}))
+
+        out, err = self.run_import(path, "--resume", "--batch-size", "1")
+
+        self.assertIn("Resuming after row 2", out)
+        self.assertIn("row 5: unparseable row", err)
+        self.assertEqual(
+            sorted(Book.objects.values_list("isbn", flat=True)),
+            ["1000000000003", "1000000000004"],
+        )
+
+    def test_reimports_leave_shelf_stock_alone(self):
+        book = make_book("9780385504201", quantity=3)
+        circulation.checkout(make_student("alice"), book, 2)
+        path = self.write(
+            "books.csv",
+            "isbn,title,author,quantity\n"
+            "9780385504201,The Da Vinci Code,Dan Brown,3\n"
+            "9780385514231,Origin,Dan Brown,4\n",
+        )
+
+        self.run_import(path)
+
+        self.assertEqual(shelf(book), 1)
+        self.assertEqual(Book.objects.get(isbn="9780385514231").quantity, 4)
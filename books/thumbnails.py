@@ -0,0 +1,127 @@
+"""
+Fixed-size derivatives of ``Book.cover_image``.
+
+Every cover gets one file per preset, pixel density and format, stored next
+to the original under ``book_covers/thumbs/``. Names are derived from the
+full source path (stem plus a hash of the path, so ``a/foo.jpg`` and
+``b/foo.png`` do not collide), so books sharing a cover (e.g. the default
+one) share their thumbnails and the template tag can build URLs without
+touching the storage. A source replaced under the same name is detected by
+its modification time and its thumbnails are rebuilt.
+"""
+
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+# Preset name -> CSS box (width, height) the cover is displayed at
+THUMBNAIL_SIZES = {
+    "mini": (40, 60),  # librarian dashboard loan rows
+    "small": (50, 75),  # book list table
+    "card": (200, 300),  # catalog grids
+}
+DENSITIES = (1, 2)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+
+THUMBS_DIR = "book_covers/thumbs"
+
+logger = logging.getLogger(__name__)
+
+
+def webp_supported():
+    return features.check("webp")
+
+
+def formats():
+    return ("webp", "jpeg") if webp_supported() else ("jpeg",)
+
+
+def thumbnail_name(source_name, preset, density, fmt):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    digest = hashlib.sha1(source_name.encode()).hexdigest()[:10]
+    extension = "webp" if fmt == "webp" else "jpg"
+    return f"{THUMBS_DIR}/{stem}-{digest}-{preset}@{density}x.{extension}"
+
+
+def _modified_time(name):
+    try:
+        return default_storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        return None
+
+
+def _is_current(name, source_modified):
+    """The derivative exists and is not older than the source"""
+    if not default_storage.exists(name):
+        return False
+    if source_modified is None:
+        return True
+    modified = _modified_time(name)
+    return modified is None or modified >= source_modified
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(source_name, force=False):
+    """
+    Render every derivative of ``source_name``.
+
+    Existing files are kept unless ``force`` is set or the source is newer
+    than them. Returns the number of files written; raises ``OSError`` if the
+    source cannot be read.
+    """
+    with default_storage.open(source_name, "rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original = original.convert("RGB")
+    source_modified = _modified_time(source_name)
+
+    written = 0
+    for preset, (width, height) in THUMBNAIL_SIZES.items():
+        for density in DENSITIES:
+            resized = None
+            for fmt in formats():
+                name = thumbnail_name(source_name, preset, density, fmt)
+                if not force and _is_current(name, source_modified):
+                    continue
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                if resized is None:
+                    resized = ImageOps.fit(
+                        original, (width * density, height * density), Image.LANCZOS
+                    )
+                default_storage.save(name, ContentFile(_encode(resized, fmt)))
+                written += 1
+    return written
+
+
+def process_cover(source_name, force=False):
+    """
+    Background task: build the thumbnails and flag the books using them.
+
+    A missing source file is logged and skipped (the books keep serving the
+    original URL); returns whether the thumbnails were built.
+    """
+    from .cache import catalog_changed
+    from .models import Book
+
+    try:
+        generate_thumbnails(source_name, force=force)
+    except FileNotFoundError:
+        logger.warning("Cover %s does not exist; no thumbnails generated", source_name)
+        return False
+    Book.objects.filter(cover_image=source_name).update(thumbnails_ready=True)
+    catalog_changed()
+    return True
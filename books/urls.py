@@ -2,8 +2,34 @@ from django.urls import path
 
 from .views import (
     home,
+    catalog_api,
+    cache_stats,
+    bulk_checkout,
+    bulk_return,
+    export_loans,
+    circulation_report,
+    book_report,
+    scan,
+    place_hold,
+    cancel_hold,
+    collect_hold,
 )
 
 urlpatterns = [
     path("", home, name="home"),
+
+    path("api/books/", catalog_api, name="catalog_api"),
+    path("api/cache-stats/", cache_stats, name="cache_stats"),
+
+    path("circulation/bulk-checkout/", bulk_checkout, name="bulk_checkout"),
+    path("circulation/bulk-return/", bulk_return, name="bulk_return"),
+    path("circulation/scan/", scan, name="scan"),
+    path("circulation/export.<str:fmt>", export_loans, name="export_loans"),
+
+    path("reports/circulation/", circulation_report, name="circulation_report"),
+    path("reports/books/<int:book_id>/", book_report, name="book_report"),
+
+    path("holds/<int:book_id>/place/", place_hold, name="place_hold"),
+    path("holds/<int:hold_id>/cancel/", cancel_hold, name="cancel_hold"),
+    path("holds/<int:hold_id>/collect/", collect_hold, name="collect_hold"),
 ]
@@ -1,10 +1,23 @@
-from django.shortcuts import render, redirect
+import hashlib
+import json
+from datetime import timedelta
+
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.db.models import Q
-from .models import UserProfile, Book, IssuedBook
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+from core import cache as query_cache
+from core.db_routers import read_from_replica
+from . import cache, circulation, exports, queries, reporting
+from .models import UserProfile, Book, BookCopy, Hold, IssuedBook
 from .forms import BookForm, IssuedBookForm, ReturnBookForm
 from .models import UserProfile
 
@@ -46,6 +59,438 @@ def home(request):
         return redirect("login")
 
 
+# ============= BULK CIRCULATION API =============
+
+# Largest batch accepted by one bulk request
+MAX_BULK_ROWS = 5000
+
+
+def _librarian_required(request):
+    """Return an error response unless the user is an approved librarian"""
+    profile = getattr(request.user, "profile", None)
+    if profile is None or not profile.is_librarian or not profile.is_approved():
+        return JsonResponse(
+            {"error": "Only approved librarians can use this endpoint."}, status=403
+        )
+    return None
+
+
+def _read_rows(request, key, fields):
+    """Parse ``{key: [{field: int, ...}, ...]}`` from a JSON request body"""
+    try:
+        payload = json.loads(request.body)
+        items = payload[key]
+        if not isinstance(items, list):
+            raise TypeError(key)
+        rows = []
+        for item in items:
+            row = []
+            for field, required in fields:
+                value = item.get(field)
+                if value is None and not required:
+                    row.append(None)
+                    continue
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise TypeError(field)
+                row.append(value)
+            rows.append(tuple(row))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None, JsonResponse(
+            {"error": f"Expected a JSON object with a '{key}' list of integer rows."},
+            status=400,
+        )
+    if len(rows) > MAX_BULK_ROWS:
+        return None, JsonResponse(
+            {"error": f"At most {MAX_BULK_ROWS} rows per request."}, status=400
+        )
+    return rows, None
+
+
+def _bulk_response(results):
+    succeeded = sum(result.ok for result in results)
+    return JsonResponse(
+        {
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": [
+                {"row": result.row, "status": result.status, "loan": result.loan_id}
+                for result in results
+            ],
+        }
+    )
+
+
+@login_required(login_url="librarian_login")
+@require_POST
+def bulk_checkout(request):
+    """Issue many loans from one JSON request; failures are reported per row"""
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+
+    rows, error = _read_rows(
+        request, "loans", [("student", True), ("book", True), ("quantity", True)]
+    )
+    if error:
+        return error
+    return _bulk_response(circulation.bulk_checkout(rows))
+
+
+@login_required(login_url="librarian_login")
+@require_POST
+def bulk_return(request):
+    """Return many loans from one JSON request; failures are reported per row"""
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+
+    rows, error = _read_rows(request, "returns", [("loan", True), ("quantity", False)])
+    if error:
+        return error
+    return _bulk_response(circulation.bulk_return(rows))
+
+
+# ============= DESK SCANS =============
+
+
+def _scan_response(copy, action, result):
+    loan = result.loan
+    return JsonResponse(
+        {
+            "action": action,
+            "status": result.status,
+            "barcode": copy.barcode,
+            "copy_status": copy.status,
+            "book": {"id": copy.book_id, "title": copy.book.title},
+            "loan": loan.pk if loan else None,
+            "due_date": loan.due_date.isoformat() if loan and action == "checkout" else None,
+        },
+        status=200 if result.ok else 409,
+    )
+
+
+@login_required(login_url="librarian_login")
+@require_POST
+def scan(request):
+    """
+    Check a scanned copy in or out: ``{"barcode": "...", "student": id}``.
+
+    A copy on loan is returned; any other copy is issued to ``student``. The
+    scan resolves to the copy, its book and its current loan in one lookup
+    on the barcode index.
+    """
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+
+    try:
+        payload = json.loads(request.body)
+        barcode = payload["barcode"]
+        student_id = payload.get("student")
+        if not isinstance(barcode, str):
+            raise TypeError("barcode")
+        if student_id is not None and (
+            not isinstance(student_id, int) or isinstance(student_id, bool)
+        ):
+            raise TypeError("student")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse(
+            {"error": "Expected a JSON object with a 'barcode' string and optional 'student' id."},
+            status=400,
+        )
+
+    copy = queries.copy_by_barcode(barcode.strip()).first()
+    if copy is None:
+        return JsonResponse({"error": f"Unknown barcode {barcode!r}."}, status=404)
+
+    if copy.status == BookCopy.ON_LOAN:
+        return _scan_response(copy, "return", circulation.return_copy(copy))
+
+    if student_id is None:
+        return JsonResponse({"error": "Scan a student card to check this copy out."}, status=400)
+    student = UserProfile.objects.filter(
+        pk=student_id, role="student", status="approved"
+    ).first()
+    if student is None:
+        return JsonResponse({"error": "Unknown or unapproved student."}, status=404)
+    return _scan_response(copy, "checkout", circulation.checkout_copy(student, copy))
+
+
+# ============= HOLDS =============
+
+
+def _holds_tab():
+    return f"{reverse('student_dashboard')}?tab=holds"
+
+
+def _approved_student(request):
+    profile = getattr(request.user, "profile", None)
+    if profile is None or not profile.is_student or not profile.is_approved():
+        return None
+    return profile
+
+
+@login_required(login_url="student_login")
+@require_POST
+def place_hold(request, book_id):
+    """Join the hold queue for a book with no copy on the shelf"""
+    student = _approved_student(request)
+    if student is None:
+        messages.error(request, "❌ Only approved students can place holds.")
+        return redirect("home")
+
+    book = get_object_or_404(Book, pk=book_id)
+    result = circulation.place_hold(student, book)
+    if result.ok:
+        messages.success(
+            request, f"📌 You are #{result.position} in the queue for “{book.title}”."
+        )
+    elif result.status == circulation.AVAILABLE:
+        messages.info(
+            request, f"✓ “{book.title}” is on the shelf. Ask at the desk to borrow it."
+        )
+    else:
+        messages.warning(request, f"You already have a hold on “{book.title}”.")
+    return redirect(_holds_tab())
+
+
+@login_required(login_url="student_login")
+@require_POST
+def cancel_hold(request, hold_id):
+    """Leave a hold queue, or give up a copy waiting for pickup"""
+    student = _approved_student(request)
+    if student is None:
+        messages.error(request, "❌ Only approved students can manage holds.")
+        return redirect("home")
+
+    hold = get_object_or_404(Hold.objects.select_related("book"), pk=hold_id, student=student)
+    if circulation.cancel_hold(hold).ok:
+        messages.success(request, f"Your hold on “{hold.book.title}” was cancelled.")
+    else:
+        messages.warning(request, "That hold is no longer active.")
+    return redirect(_holds_tab())
+
+
+@login_required(login_url="librarian_login")
+@require_POST
+def collect_hold(request, hold_id):
+    """Issue the copy set aside for a ready hold (at the desk)"""
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+
+    hold = get_object_or_404(Hold, pk=hold_id)
+    result = circulation.collect_hold(hold)
+    return JsonResponse(
+        {
+            "status": result.status,
+            "loan": result.loan.pk if result.loan else None,
+        },
+        status=200 if result.ok else 409,
+    )
+
+
+# ============= CATALOG API =============
+
+CATALOG_API_PAGE_SIZE = 50
+CATALOG_API_MAX_PAGE_SIZE = 200
+
+
+def _catalog_filters(request):
+    """The same search/status filters as the student dashboard"""
+    return request.GET.get("status", "all"), request.GET.get("search", "").strip()
+
+
+def _catalog_fingerprint(request):
+    """
+    ``(max updated_at, row count)`` of the filtered catalog.
+
+    One cached aggregate, memoized on the request because both the ETag and
+    the Last-Modified header are derived from it.
+    """
+    if not hasattr(request, "_catalog_fingerprint"):
+        request._catalog_fingerprint = cache.catalog_fingerprint(*_catalog_filters(request))
+    return request._catalog_fingerprint
+
+
+def _catalog_etag(request):
+    fingerprint = _catalog_fingerprint(request)
+    last_modified = fingerprint["last_modified"]
+    parts = [
+        last_modified.isoformat() if last_modified else "-",
+        str(fingerprint["count"]),
+        request.GET.urlencode(),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+def _catalog_last_modified(request):
+    return _catalog_fingerprint(request)["last_modified"]
+
+
+def _book_json(book):
+    return {
+        "id": book.pk,
+        "title": book.title,
+        "author": book.author,
+        "isbn": book.isbn,
+        "quantity": book.quantity,
+        "available": book.quantity > 0,
+        "cover_image": book.cover_image.url if book.cover_image else None,
+        "updated_at": book.updated_at.isoformat(),
+    }
+
+
+@read_from_replica
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
+def catalog_api(request):
+    """
+    Read-only JSON catalog for kiosks and the mobile app.
+
+    Supports ``search``, ``status`` (all/available/unavailable), ``limit``
+    and ``cursor``. Conditional GETs are answered with 304 from a single
+    (cached) aggregate, without loading any rows; pages, search results and
+    rows are cached under the catalog version.
+    """
+    try:
+        limit = int(request.GET.get("limit", CATALOG_API_PAGE_SIZE))
+    except ValueError:
+        limit = CATALOG_API_PAGE_SIZE
+    limit = max(1, min(limit, CATALOG_API_MAX_PAGE_SIZE))
+
+    filter_status, search_query = _catalog_filters(request)
+
+    if search_query:
+        # Ranked search results are capped, not paginated
+        results = cache.search_results(filter_status, search_query, limit=limit)
+        next_cursor = previous_cursor = None
+    else:
+        page = cache.catalog_page(filter_status, request.GET.get("cursor"), limit)
+        results, next_cursor, previous_cursor = (
+            page.object_list,
+            page.next_cursor,
+            page.previous_cursor,
+        )
+
+    return JsonResponse(
+        {
+            "results": [_book_json(book) for book in results],
+            "next": next_cursor,
+            "previous": previous_cursor,
+        }
+    )
+
+
+@login_required(login_url="librarian_login")
+@require_GET
+def cache_stats(request):
+    """Hit/miss counters of the query cache in this worker process"""
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+    return JsonResponse({"namespaces": query_cache.stats()})
+
+
+# ============= REPORTS =============
+
+REPORT_DEFAULT_DAYS = 365
+REPORT_MAX_DAYS = 3 * 366
+
+
+def _report_range(request):
+    """``(from, to)`` from the query string (the last year by default), or an error response"""
+    today = timezone.localdate()
+    date_to = parse_date(request.GET.get("to", "")) or today
+    date_from = parse_date(request.GET.get("from", "")) or (
+        date_to - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    )
+    if date_from > date_to or (date_to - date_from).days >= REPORT_MAX_DAYS:
+        return None, JsonResponse(
+            {"error": f"'from' must be before 'to', at most {REPORT_MAX_DAYS} days apart."},
+            status=400,
+        )
+    return (date_from, date_to), None
+
+
+@login_required(login_url="librarian_login")
+@read_from_replica
+@require_GET
+def circulation_report(request):
+    """
+    Daily checkouts, returns and borrowers with trends and percentiles.
+
+    Supports ``from``/``to`` (YYYY-MM-DD) and ``department``; read from the
+    rollups, so as fresh as the last ``rollup_circulation`` run (``as_of``).
+    """
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+    date_range, error = _report_range(request)
+    if error:
+        return error
+
+    report = reporting.circulation_report(*date_range, request.GET.get("department"))
+    report["top_books"] = reporting.top_books(*date_range)
+    return JsonResponse(report)
+
+
+@login_required(login_url="librarian_login")
+@read_from_replica
+@require_GET
+def book_report(request, book_id):
+    """One book's daily circulation with trends, for ``from``/``to``"""
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+    date_range, error = _report_range(request)
+    if error:
+        return error
+
+    book = get_object_or_404(Book, pk=book_id)
+    return JsonResponse(reporting.book_report(book, *date_range))
+
+
+# ============= CIRCULATION EXPORT =============
+
+
+@login_required(login_url="librarian_login")
+@require_GET
+def export_loans(request, fmt):
+    """
+    Stream the circulation history as CSV or JSON Lines.
+
+    Optional filters: ``from``/``to`` (issue date, YYYY-MM-DD), ``student``
+    (profile id) and ``department``.
+    """
+    denied = _librarian_required(request)
+    if denied:
+        return denied
+    if fmt not in exports.EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+
+    filters = {}
+    for param, key in (("from", "date_from"), ("to", "date_to")):
+        value = request.GET.get(param)
+        if value:
+            filters[key] = parse_date(value)
+            if filters[key] is None:
+                return JsonResponse({"error": f"Invalid '{param}' date."}, status=400)
+    student = request.GET.get("student")
+    if student:
+        if not student.isdigit():
+            return JsonResponse({"error": "Invalid 'student' id."}, status=400)
+        filters["student_id"] = int(student)
+    filters["department"] = request.GET.get("department") or None
+
+    lines, content_type = exports.EXPORT_FORMATS[fmt]
+    rows = exports.iter_rows(exports.filtered_loans(**filters))
+    response = StreamingHttpResponse(lines(rows), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="circulation.{fmt}"'
+    return response
+
+
 # # ============= BOOK VIEWS =============
 # @login_required(login_url="myapp:login")
 # def book_list(request):
@@ -1,3 +1,29 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "recipient", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("recipient", "subject")
+    readonly_fields = (
+        "recipient",
+        "subject",
+        "body",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
+    exclude = ("claimed_by",)
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,39 @@
+"""
+Helpers for async views.
+
+Django's async ORM methods (``aget``, ``acount``...) run every query on the
+one thread shared by all sync code of the request, so ``asyncio.gather``
+over them still executes the queries one after another. ``gather_queries``
+instead runs each independent query on its own worker thread with its own
+database connection, so they really overlap on the database.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _isolated(func):
+    def run():
+        # Same connection lifecycle as a request: reuse persistent
+        # connections (CONN_MAX_AGE), drop expired or broken ones
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def gather_queries(**funcs):
+    """
+    Call the zero-argument ``funcs`` concurrently; returns ``{name: result}``.
+
+    Each function must return fully evaluated data (e.g. ``list(queryset)``),
+    and must not depend on the others or on an open transaction.
+    """
+    names = list(funcs)
+    results = await asyncio.gather(*[_isolated(funcs[name])() for name in names])
+    return dict(zip(names, results))
@@ -0,0 +1,67 @@
+"""
+Small helpers shared by the ``bench_*`` management commands.
+
+Benchmarks report plain JSON so runs can be diffed or archived; latency
+samples are collected in seconds and reported in milliseconds.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples):
+    """p50/p95/p99/mean/max of latency samples, in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def ms(value):
+        return round(value * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": ms(sum(ordered) / len(ordered)),
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]),
+    }
+
+
+def run_concurrently(worker, workers):
+    """
+    Run ``worker(index)`` on ``workers`` threads released at the same moment.
+
+    Each thread gets its own database connections, which are closed when the
+    thread finishes. Returns ``(results, elapsed_seconds)``.
+    """
+    barrier = threading.Barrier(workers)
+
+    def run(index):
+        try:
+            barrier.wait()
+            return worker(index)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, range(workers)))
+    return results, time.perf_counter() - started
+
+
+def dump(report):
+    """Serialize a benchmark report"""
+    return json.dumps(report, indent=2, sort_keys=True, default=str)
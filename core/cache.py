@@ -0,0 +1,205 @@
+"""
+Version stamps for write-driven cache invalidation.
+
+Cached data is keyed with the current version of the thing it depends on
+(e.g. one student's loans, or the catalog). Writers bump the version instead
+of deleting keys, so every fragment built from the old state simply stops
+being looked up and ages out of the cache.
+
+``cached`` and ``cached_many`` cache query results under those versions,
+with stampede protection and per-namespace hit/miss counters (``stats``).
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_PREFIX = "version:"
+
+
+def _fresh_version():
+    # Time-based so a version key evicted from the cache never comes back
+    # with a value that was already used for cached data
+    return time.time_ns()
+
+
+def get_version(name):
+    """Current version stamp of ``name``"""
+    key = VERSION_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Invalidate everything cached under the current version of ``name``"""
+    key = VERSION_PREFIX + name
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def bump_version_on_commit(*names):
+    """Bump ``names`` once the current transaction commits"""
+    names = set(names)
+
+    def bump():
+        for name in names:
+            bump_version(name)
+
+    transaction.on_commit(bump)
+
+
+# ============= CACHED QUERIES =============
+
+LOCK_PREFIX = "lock:"
+# Seconds between checks while waiting for another caller's result
+POLL_INTERVAL = 0.05
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _count(namespace, outcome, n=1):
+    # Counted per kind of namespace ("student:12" -> "student")
+    with _counts_lock:
+        _counts[namespace.split(":", 1)[0], outcome] += n
+
+
+def stats():
+    """
+    Lookups by namespace since this process started (or ``reset_stats``).
+
+    ``hits`` were fresh, ``stale`` were served past their refresh time while
+    another caller refreshed them, ``waits`` waited for another caller's
+    result and ``misses`` computed the value.
+    """
+    with _counts_lock:
+        counts = dict(_counts)
+    report = {}
+    for (namespace, outcome), n in counts.items():
+        report.setdefault(
+            namespace, {"hits": 0, "stale": 0, "waits": 0, "misses": 0}
+        )[outcome] = n
+    for row in report.values():
+        served = row["hits"] + row["stale"] + row["waits"]
+        row["hit_rate"] = round(served / (served + row["misses"]), 3)
+    return report
+
+
+def reset_stats():
+    with _counts_lock:
+        _counts.clear()
+
+
+def versioned_key(namespace, key, version=None):
+    """Cache key of ``key`` under the current (or given) version of ``namespace``"""
+    if version is None:
+        version = get_version(namespace)
+    return f"{namespace}:{version}:{key}"
+
+
+def _timeouts(timeout):
+    """``(refresh after, keep for)`` in seconds for a value cached now"""
+    from .db_routers import fragment_timeout
+
+    if timeout is None:
+        timeout = getattr(settings, "QUERY_CACHE_TIMEOUT", 300)
+    timeout = fragment_timeout(timeout)
+    return timeout, timeout + getattr(settings, "QUERY_CACHE_STALE_GRACE", 30)
+
+
+def _store(key, value, timeout):
+    refresh_after, keep_for = _timeouts(timeout)
+    cache.set(key, (time.time() + refresh_after, value), keep_for)
+
+
+def cached(namespace, key, compute, timeout=None):
+    """
+    ``compute()``, cached under the current version of ``namespace``.
+
+    Only one caller at a time computes a value (per process with locmem,
+    across processes with a shared backend). Once a value is ``timeout``
+    seconds old the first caller refreshes it while the others keep getting
+    the old one, which is safe because the namespace version, and so the
+    data, has not changed. When nothing is cached (first use, or just after
+    a version bump) the others wait for the result instead of all running
+    the same query at once.
+    """
+    full_key = versioned_key(namespace, key)
+    lock_key = LOCK_PREFIX + full_key
+    lock_timeout = getattr(settings, "QUERY_CACHE_LOCK_TIMEOUT", 10)
+
+    entry = cache.get(full_key)
+    if entry is not None:
+        refresh_at, value = entry
+        if time.time() < refresh_at:
+            _count(namespace, "hits")
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            _count(namespace, "stale")
+            return value
+    elif not cache.add(lock_key, 1, lock_timeout):
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(full_key)
+            if entry is not None:
+                _count(namespace, "waits")
+                return entry[1]
+        # The caller computing it died or is stuck; don't wait any longer
+        _count(namespace, "misses")
+        return compute()
+
+    _count(namespace, "misses")
+    try:
+        value = compute()
+        _store(full_key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def cached_many(namespace, keys, compute_missing, timeout=None):
+    """
+    Values of ``keys`` under the current version of ``namespace``, as a dict.
+
+    For cheap per-row values: the missing ones are computed together by
+    ``compute_missing(missing_keys)`` (returning a dict) and stored with one
+    ``set_many``, without the stampede protection of ``cached``.
+    """
+    version = get_version(namespace)
+    full_keys = {versioned_key(namespace, key, version): key for key in keys}
+    found = cache.get_many(list(full_keys))
+
+    values = {full_keys[full_key]: value for full_key, (_, value) in found.items()}
+    missing = [key for full_key, key in full_keys.items() if full_key not in found]
+    _count(namespace, "hits", len(values))
+    if missing:
+        _count(namespace, "misses", len(missing))
+        computed = compute_missing(missing)
+        store_many(namespace, computed, timeout, version=version)
+        values.update(computed)
+    return values
+
+
+def store_many(namespace, values, timeout=None, version=None):
+    """Cache ``{key: value}`` under the current version of ``namespace``"""
+    if version is None:
+        version = get_version(namespace)
+    refresh_after, keep_for = _timeouts(timeout)
+    refresh_at = time.time() + refresh_after
+    cache.set_many(
+        {
+            versioned_key(namespace, key, version): (refresh_at, value)
+            for key, value in values.items()
+        },
+        keep_for,
+    )
@@ -0,0 +1,210 @@
+"""
+Read-replica routing.
+
+Only views marked with ``read_from_replica`` (the dashboards and the
+catalog) read from the aliases in ``REPLICA_DATABASES``; everything else,
+and every write, uses ``default``. Within such a view:
+
+* one replica serves all reads of the request, so they see one snapshot;
+* replicas more than ``REPLICA_MAX_LAG`` seconds behind, or unreachable,
+  are skipped, falling back to the primary;
+* reads go to the primary once the request has written anything, and for
+  ``REPLICA_PIN_SECONDS`` after any write by the same client
+  (``core.middleware.ReplicaPinMiddleware``), so users see their own writes.
+
+Lag comes from ``pg_last_xact_replay_timestamp()`` on PostgreSQL standbys
+and from the ``ReplicaHeartbeat`` row written by ``manage.py sync_replicas``
+elsewhere (e.g. SQLite copies). It is re-measured at most every
+``REPLICA_LAG_CHECK_INTERVAL`` seconds per alias.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Apps whose data is always read from the primary (sessions, outbox...)
+PRIMARY_ONLY_APPS = {"core", "sessions"}
+
+
+class ReadScope:
+    """Routing state of one request inside ``read_from_replica``"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.alias = None
+
+
+_scope = ContextVar("replica_read_scope", default=None)
+# Set by the middleware: this client wrote recently
+_pinned = ContextVar("replica_pinned", default=False)
+# Per request (set by the middleware): labels of the models written to
+_writes = ContextVar("replica_writes", default=None)
+
+_lag_lock = threading.Lock()
+_lag_checks = {}  # alias -> (monotonic time of check, lag in seconds or None)
+
+
+def replicas():
+    return list(getattr(settings, "REPLICA_DATABASES", []))
+
+
+def _measure_lag(alias):
+    """Seconds ``alias`` is behind the primary, or ``None`` if unknown/unreachable"""
+    from .models import ReplicaHeartbeat
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+                )
+                lag = cursor.fetchone()[0]
+            return 0.0 if lag is None else max(float(lag), 0.0)
+
+        beat_at = (
+            ReplicaHeartbeat.objects.using(alias)
+            .filter(pk=ReplicaHeartbeat.SINGLETON_ID)
+            .values_list("beat_at", flat=True)
+            .first()
+        )
+    except DatabaseError as exc:
+        logger.warning("Replica %s unavailable: %s", alias, exc)
+        return None
+    if beat_at is None:
+        return None
+    return max((timezone.now() - beat_at).total_seconds(), 0.0)
+
+
+def replica_lag(alias):
+    """Current lag estimate for ``alias``; cached between checks"""
+    interval = getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 2)
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checks.get(alias)
+    if checked is None or now - checked[0] >= interval:
+        checked = (now, _measure_lag(alias))
+        with _lag_lock:
+            _lag_checks[alias] = checked
+    checked_at, lag = checked
+    # Time since the check only adds to how far behind it can be
+    return None if lag is None else lag + (now - checked_at)
+
+
+def healthy_replicas():
+    max_lag = getattr(settings, "REPLICA_MAX_LAG", 10)
+    return [
+        alias
+        for alias in replicas()
+        if (lag := replica_lag(alias)) is not None and lag <= max_lag
+    ]
+
+
+def _replica_for_scope(scope):
+    if scope.pinned or _pinned.get() or _writes.get():
+        return None
+    if scope.alias is None:
+        candidates = healthy_replicas()
+        scope.alias = random.choice(candidates) if candidates else DEFAULT_DB_ALIAS
+    return None if scope.alias == DEFAULT_DB_ALIAS else scope.alias
+
+
+def reading_from_replica():
+    """True if reads in the current context are served by a replica"""
+    scope = _scope.get()
+    return scope is not None and _replica_for_scope(scope) is not None
+
+
+def fragment_timeout(timeout):
+    """
+    Cache timeout for data read in the current context.
+
+    Fragments built from replica data are cached under version stamps that
+    may already include writes the replica has not seen yet, so they must
+    not outlive the replica's allowed lag.
+    """
+    if reading_from_replica():
+        return min(timeout, getattr(settings, "REPLICA_MAX_LAG", 10))
+    return timeout
+
+
+def read_from_replica(view):
+    """Serve the view's reads from a replica when one is healthy (sync or async views)"""
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            token = _scope.set(ReadScope())
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                _scope.reset(token)
+
+    else:
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            token = _scope.set(ReadScope())
+            try:
+                return view(*args, **kwargs)
+            finally:
+                _scope.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads inside ``read_from_replica`` go to a replica; all writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        scope = _scope.get()
+        if scope is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return _replica_for_scope(scope)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        writes = _writes.get()
+        if writes is not None:
+            writes.append(model._meta.label)
+        scope = _scope.get()
+        if scope is not None:
+            scope.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replicas()
+
+
+def track_request(pinned):
+    """
+    Start routing state for a request; returns ``(writes, reset)``.
+
+    ``writes`` collects the labels of models the request writes to.
+    ``reset()`` must be called when the request is done.
+    """
+    writes = []
+    pinned_token = _pinned.set(pinned)
+    writes_token = _writes.set(writes)
+
+    def reset():
+        _writes.reset(writes_token)
+        _pinned.reset(pinned_token)
+
+    return writes, reset
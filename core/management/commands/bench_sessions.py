@@ -0,0 +1,106 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from core.benchmarks import dump, summarize
+
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached": "core.sessions",
+}
+SESSION_TABLES = ('"django_session"', '"core_session"')
+
+
+class Command(BaseCommand):
+    help = (
+        "Log a student in and replay authenticated requests under the stock "
+        "database session engine and core.sessions, reporting session queries "
+        "and latency per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests per engine")
+        parser.add_argument("--path", help="URL to request (defaults to the student dashboard)")
+        parser.add_argument(
+            "--save-every-request",
+            action="store_true",
+            help="Run with SESSION_SAVE_EVERY_REQUEST so every request touches its session",
+        )
+        parser.add_argument("--password", default="library-seed-1", help="Password of the student")
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        email = (
+            UserProfile.objects.filter(role="student", status="approved")
+            .order_by("pk")
+            .values_list("email", flat=True)
+            .first()
+        )
+        if email is None:
+            raise CommandError("No approved student found; run seed_library first.")
+        path = options["path"] or reverse("student_dashboard")
+
+        report = {
+            "requests": options["requests"],
+            "save_every_request": options["save_every_request"],
+            "engines": {},
+        }
+        for name, engine in ENGINES.items():
+            with override_settings(
+                SESSION_ENGINE=engine,
+                SESSION_SAVE_EVERY_REQUEST=options["save_every_request"],
+            ):
+                report["engines"][name] = self._measure(
+                    email, options["password"], path, options["requests"]
+                )
+            self.stderr.write(f"  {name}: done")
+
+        output = dump(report)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output)
+
+    def _measure(self, email, password, path, requests):
+        # A fresh client loads the middleware, and so the engine, again
+        client = Client()
+        with CaptureQueriesContext(connection) as captured:
+            client.post(reverse("login"), {"email": email, "password": password})
+        login_session_queries = self._session_queries(captured)
+        if "_auth_user_id" not in client.session:
+            raise CommandError(f"Could not log in as {email}.")
+
+        latencies, totals, session_queries = [], [], []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(path)
+                latencies.append(time.perf_counter() - started)
+            totals.append(len(captured))
+            session_queries.append(self._session_queries(captured))
+
+        result = summarize(latencies)
+        result.update(
+            {
+                "login_session_queries": login_session_queries,
+                "session_queries_per_request": round(sum(session_queries) / requests, 3),
+                "queries_per_request": round(sum(totals) / requests, 3),
+            }
+        )
+        return result
+
+    def _session_queries(self, captured):
+        return sum(
+            1
+            for query in captured.captured_queries
+            if any(table in query["sql"] for table in SESSION_TABLES)
+        )
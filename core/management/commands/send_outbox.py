@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued outbox emails in batches over one connection per batch, "
+        "retrying failures with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Emails per connection")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, polling for new emails (for a worker process)",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5, help="Seconds between polls with --loop"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            report = outbox.deliver(batch_size=options["batch_size"])
+            if report.sent or report.retried or report.failed or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Sent {report.sent}, retrying {report.retried}, "
+                        f"failed {report.failed}"
+                    )
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
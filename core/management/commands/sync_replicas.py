@@ -0,0 +1,61 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from core.db_routers import replicas
+from core.models import ReplicaHeartbeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto every SQLite replica in "
+        "REPLICA_DATABASES, stamping the replication heartbeat first. Stands "
+        "in for real replication when testing replica routing locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep copying every --interval seconds")
+        parser.add_argument("--interval", type=float, default=2, help="Seconds between copies with --loop")
+
+    def _sqlite_path(self, alias):
+        connection = connections[alias]
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                f"'{alias}' is not SQLite; real replicas replicate on their own."
+            )
+        return str(connection.settings_dict["NAME"])
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError("REPLICA_DATABASES is empty.")
+        source = self._sqlite_path(DEFAULT_DB_ALIAS)
+        targets = {alias: self._sqlite_path(alias) for alias in aliases}
+
+        while True:
+            started = time.perf_counter()
+            # Everything committed before this stamp is in the copies below,
+            # so on a replica `now - beat_at` is an upper bound on its lag
+            ReplicaHeartbeat.objects.update_or_create(
+                pk=ReplicaHeartbeat.SINGLETON_ID, defaults={"beat_at": timezone.now()}
+            )
+            for alias, path in targets.items():
+                # The online backup API copies a consistent snapshot while
+                # other connections keep reading and writing
+                src, dst = sqlite3.connect(source), sqlite3.connect(path)
+                try:
+                    src.backup(dst)
+                finally:
+                    dst.close()
+                    src.close()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Copied to {', '.join(targets)} in {time.perf_counter() - started:.2f}s"
+                )
+            )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
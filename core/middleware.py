@@ -0,0 +1,52 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import db_routers
+
+PIN_COOKIE = "primary_pin"
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes for replica routing (see ``core.db_routers``).
+
+    A request that writes sets a short-lived cookie; while it is present the
+    client's reads stay on the primary.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        writes, reset = db_routers.track_request(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset()
+        return self._pin(response, writes)
+
+    async def __acall__(self, request):
+        writes, reset = db_routers.track_request(PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset()
+        return self._pin(response, writes)
+
+    def _pin(self, response, writes):
+        if writes and db_routers.replicas():
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
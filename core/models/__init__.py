@@ -0,0 +1,6 @@
+from .outbox import OutboxEmail
+from .replica import ReplicaHeartbeat
+from .session import VersionedSession
+from .time_stamp import TimestampedModel
+
+__all__ = ["OutboxEmail", "ReplicaHeartbeat", "TimestampedModel", "VersionedSession"]
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class ReplicaHeartbeat(models.Model):
+    """
+    Time of the last write replicated to a copy of the database.
+
+    ``manage.py sync_replicas`` stamps the primary right before copying it,
+    so on a replica ``now - beat_at`` bounds how far behind it is. Used for
+    replicas that cannot report their own lag (SQLite copies).
+    """
+
+    SINGLETON_ID = 1
+
+    beat_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "core_replica_heartbeat"
+
+    def __str__(self):
+        return f"Replica heartbeat {self.beat_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,22 @@
+from django.contrib.sessions.base_session import AbstractBaseSession
+from django.db import models
+
+
+class VersionedSession(AbstractBaseSession):
+    """
+    Session row for ``core.sessions``.
+
+    ``version`` is bumped on every data write, so a worker holding a decoded
+    copy of the session can tell whether another worker changed it.
+    """
+
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta(AbstractBaseSession.Meta):
+        db_table = "core_session"
+
+    @classmethod
+    def get_session_store_class(cls):
+        from core.sessions import SessionStore
+
+        return SessionStore
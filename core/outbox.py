@@ -0,0 +1,163 @@
+"""
+Transactional email outbox.
+
+Code that needs to notify someone calls ``enqueue`` inside its own
+transaction; nothing touches SMTP there. ``deliver`` (run by ``manage.py
+send_outbox``) claims due rows in batches and sends each batch over one
+open backend connection, so a thousand approvals cost a thousand INSERTs
+in the admin request and a handful of SMTP sessions later.
+
+Failed sends are retried with exponential backoff (``OUTBOX_RETRY_DELAY``
+doubling per attempt, capped at ``OUTBOX_MAX_RETRY_DELAY``) and marked
+failed after ``OUTBOX_MAX_ATTEMPTS``. Any email backend works, including
+``locmem`` and ``filebased`` for tests.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch becomes due again if its worker dies before finishing
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+@dataclass(frozen=True)
+class DeliveryReport:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def enqueue(messages):
+    """
+    Queue ``(recipient, subject, body)`` triples in one INSERT.
+
+    Call it inside the transaction making the change the emails announce.
+    """
+    emails = [
+        OutboxEmail(recipient=recipient, subject=subject, body=body)
+        for recipient, subject, body in messages
+        if recipient
+    ]
+    return OutboxEmail.objects.bulk_create(emails)
+
+
+def retry_delay(attempts):
+    """Backoff before the next try of an email that has failed ``attempts`` times"""
+    base = getattr(settings, "OUTBOX_RETRY_DELAY", 60)
+    cap = getattr(settings, "OUTBOX_MAX_RETRY_DELAY", 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim(batch_size, now=None):
+    """Take up to ``batch_size`` due emails for this worker"""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        due = list(
+            OutboxEmail.objects.filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not due:
+            return []
+        # Conditional on still being due, so two workers never share a row
+        OutboxEmail.objects.filter(
+            pk__in=due, status=OutboxEmail.PENDING, next_attempt_at__lte=now
+        ).update(claimed_by=token, next_attempt_at=now + CLAIM_TIMEOUT)
+    return list(OutboxEmail.objects.filter(claimed_by=token).order_by("id"))
+
+
+def _send_batch(emails, connection):
+    """Send ``emails`` over ``connection``; returns ``(sent, failures)``"""
+    sent, failures = [], {}
+    for email in emails:
+        # From DEFAULT_FROM_EMAIL
+        message = EmailMessage(
+            email.subject, email.body, to=[email.recipient], connection=connection
+        )
+        try:
+            message.send()
+        except Exception as exc:
+            failures[email.pk] = f"{type(exc).__name__}: {exc}"
+        else:
+            sent.append(email.pk)
+    return sent, failures
+
+
+def _record(emails, sent, failures):
+    now = timezone.now()
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        status=OutboxEmail.SENT,
+        sent_at=now,
+        claimed_by="",
+        attempts=F("attempts") + 1,
+    )
+
+    retried = failed = 0
+    changed = []
+    for email in emails:
+        if email.pk not in failures:
+            continue
+        email.attempts += 1
+        email.last_error = failures[email.pk]
+        email.claimed_by = ""
+        if email.attempts >= max_attempts:
+            email.status = OutboxEmail.FAILED
+            failed += 1
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+            retried += 1
+        changed.append(email)
+    OutboxEmail.objects.bulk_update(
+        changed, ["attempts", "last_error", "claimed_by", "status", "next_attempt_at"]
+    )
+    return retried, failed
+
+
+def deliver(batch_size=100, max_batches=None):
+    """
+    Send due emails until none are left (or ``max_batches`` batches).
+
+    Each batch reuses one backend connection. Returns a ``DeliveryReport``.
+    """
+    sent = retried = failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        emails = claim(batch_size)
+        if not emails:
+            break
+        batches += 1
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            # Server unreachable: the whole batch goes back with a backoff
+            logger.warning("Outbox: cannot open email connection: %s", exc)
+            error = f"{type(exc).__name__}: {exc}"
+            batch_retried, batch_failed = _record(
+                emails, [], {email.pk: error for email in emails}
+            )
+            return DeliveryReport(sent, retried + batch_retried, failed + batch_failed)
+        try:
+            batch_sent, failures = _send_batch(emails, connection)
+        finally:
+            connection.close()
+
+        batch_retried, batch_failed = _record(emails, batch_sent, failures)
+        sent += len(batch_sent)
+        retried += batch_retried
+        failed += batch_failed
+    return DeliveryReport(sent, retried, failed)
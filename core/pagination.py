@@ -0,0 +1,168 @@
+"""
+Keyset (cursor) pagination.
+
+Unlike ``django.core.paginator.Paginator`` this never issues ``COUNT(*)`` or
+``OFFSET``: every page is fetched with a ``WHERE (key) < (last key)`` seek on
+an ordered index, so page 1 and page 10,000 cost the same. Cursors are opaque
+URL-safe tokens encoding the boundary key and the direction of travel.
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_key_value(value):
+    # Full isoformat: DjangoJSONEncoder truncates microseconds, which would
+    # make the seek skip rows sharing a millisecond.
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+class KeysetPage:
+    """One page of results plus the cursors needed to move away from it"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on a unique, totally ordered key.
+
+    ``ordering`` lists the key fields in ``order_by`` syntax and must end with
+    a unique field (normally ``"-id"``), e.g. ``("-created_at", "-id")``.
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    # ----- cursor encoding -----
+
+    def encode_cursor(self, direction, obj):
+        values = [getattr(obj, name) for name in self.fields]
+        payload = json.dumps([direction, values], default=_encode_key_value)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ("next", "prev") or len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            opts = self.queryset.model._meta
+            values = [
+                opts.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError) as exc:
+            raise InvalidCursor(cursor) from exc
+        return direction, values
+
+    # ----- querying -----
+
+    def _is_descending(self, index, reverse):
+        return self.ordering[index].startswith("-") != reverse
+
+    def _seek(self, values, reverse):
+        """
+        Rows strictly after ``values`` in the (possibly reversed) ordering.
+
+        Written as ``a <= x AND (a < x OR (a = x AND b < y) ...)`` so the
+        leading range on the first key lets the database seek the index.
+        """
+        first_op = "lte" if self._is_descending(0, reverse) else "gte"
+        leading = Q(**{f"{self.fields[0]}__{first_op}": values[0]})
+
+        after = Q()
+        for index, name in enumerate(self.fields):
+            op = "lt" if self._is_descending(index, reverse) else "gt"
+            condition = Q(**{f"{name}__{op}": values[index]})
+            for prev_name, prev_value in zip(self.fields[:index], values[:index]):
+                condition &= Q(**{prev_name: prev_value})
+            after |= condition
+
+        return leading & after
+
+    def _order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(
+            name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering
+        )
+
+    def page_queryset(self, direction="next", values=None):
+        """The sliced queryset fetching one page (plus one look-ahead row)"""
+        reverse = direction == "prev"
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+        return queryset[: self.per_page + 1]
+
+    def page(self, cursor=None):
+        """Return the page after/before ``cursor`` (the first page if omitted)"""
+        direction, values = ("next", None)
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        reverse = direction == "prev"
+
+        # One extra row tells us whether there is anything beyond this page
+        rows = list(self.page_queryset(direction, values))
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([])
+
+        has_next = values is not None if reverse else has_more
+        has_previous = has_more if reverse else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor("next", rows[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor("prev", rows[0]) if has_previous else None
+            ),
+        )
+
+    def page_or_first(self, cursor=None):
+        """Like ``page`` but falls back to the first page on a bad cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,332 @@
+"""
+Database session engine with a per-process LRU of decoded sessions.
+
+Enable with ``SESSION_ENGINE = "core.sessions"``. Compared with the stock
+``django.contrib.sessions.backends.db`` engine:
+
+* Reads are served from a bounded in-process LRU (``SESSION_LRU_SIZE``
+  entries). An entry younger than ``SESSION_LRU_TTL`` seconds is used as is;
+  an older one is revalidated with a ``SELECT version`` and only re-fetched
+  and re-decoded when another worker has written the session since.
+* Data writes bump ``VersionedSession.version``. The UPDATE is conditional on
+  the version this worker last saw, so a concurrent write elsewhere is
+  detected and this worker's cached copy is dropped.
+* Saves that change nothing but the expiry date ("touches", e.g. with
+  ``SESSION_SAVE_EVERY_REQUEST``) are coalesced per session and written in one
+  batched UPDATE on a background thread, at most
+  ``SESSION_TOUCH_FLUSH_INTERVAL`` seconds after the first of them was queued
+  (a timer, so a worker that goes quiet still writes them) or as soon as
+  ``SESSION_TOUCH_BATCH`` sessions are waiting. A worker killed without
+  running its exit hook loses at most that interval of expiry extensions.
+* New sessions are inserted when they are first saved instead of when the
+  key is generated, so a login costs one INSERT instead of INSERT + UPDATE.
+
+Other workers may serve a session that was changed or deleted elsewhere for
+up to ``SESSION_LRU_TTL`` seconds: a logout ends the session at once in the
+worker that handled it and within that time in the others, which find the
+row gone when they revalidate. Keep it to a few seconds; 0 revalidates on
+every request.
+"""
+
+import atexit
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import VALID_KEY_CHARS, CreateError, UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("data", "expire_date", "version", "checked_at")
+
+    def __init__(self, data, expire_date, version):
+        self.data = data
+        self.expire_date = expire_date
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+class SessionLRU:
+    """Thread-safe LRU of decoded sessions, keyed by session key"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        limit = getattr(settings, "SESSION_LRU_SIZE", 10000)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TouchQueue:
+    """Expiry-only session updates waiting to be written in one batch"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._timer = None
+
+    def add(self, key, expire_date):
+        """Queue a touch; repeated touches of one session collapse into one"""
+        timer = None
+        with self._lock:
+            self._pending[key] = expire_date
+            full = len(self._pending) >= getattr(settings, "SESSION_TOUCH_BATCH", 500)
+            schedule = full and not self._scheduled
+            if schedule:
+                self._scheduled = True
+            if self._timer is None:
+                # Bounds how long a queued touch waits, however quiet the worker
+                timer = self._timer = threading.Timer(
+                    getattr(settings, "SESSION_TOUCH_FLUSH_INTERVAL", 30), self._flush_due
+                )
+                timer.daemon = True
+        if timer is not None:
+            timer.start()
+        if schedule:
+            run_in_background(self.flush)
+
+    def _flush_due(self):
+        # Runs on the timer's own thread, with its own connection
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write pending session touches")
+        finally:
+            connections.close_all()
+
+    def discard(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self):
+        """Write all queued expiry dates; returns the number of sessions touched"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+        if not pending:
+            return 0
+
+        model = SessionStore.get_model_class()
+        using = router.db_for_write(model)
+        keys = list(pending)
+        batch_size = getattr(settings, "SESSION_TOUCH_BATCH", 500)
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start : start + batch_size]
+            model.objects.using(using).filter(session_key__in=batch).update(
+                expire_date=Case(
+                    *[When(session_key=key, then=Value(pending[key])) for key in batch],
+                    output_field=DateTimeField(),
+                )
+            )
+        return len(pending)
+
+
+sessions = SessionLRU()
+touches = TouchQueue()
+
+
+@atexit.register
+def _flush_touches_on_exit():
+    try:
+        touches.flush()
+    except Exception:
+        logger.exception("Could not write pending session touches on exit")
+
+
+class SessionStore(DBStore):
+    """Database-backed sessions cached per process (see module docstring)"""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Set by create(): the row is inserted on the first save()
+        self._unsaved = False
+
+    @classmethod
+    def get_model_class(cls):
+        from core.models import VersionedSession
+
+        return VersionedSession
+
+    # ----- reading -----
+
+    def load(self):
+        key = self.session_key
+        entry = sessions.get(key) if key else None
+        if entry is not None and entry.expire_date > timezone.now():
+            if time.monotonic() - entry.checked_at < getattr(settings, "SESSION_LRU_TTL", 5):
+                return copy.deepcopy(entry.data)
+            version = (
+                self.model.objects.filter(session_key=key)
+                .values_list("version", flat=True)
+                .first()
+            )
+            if version == entry.version:
+                entry.checked_at = time.monotonic()
+                return copy.deepcopy(entry.data)
+
+        sessions.discard(key)
+        row = self._get_session_from_db()
+        if row is None:
+            return {}
+        data = self.decode(row.session_data)
+        sessions.put(key, _Entry(copy.deepcopy(data), row.expire_date, row.version))
+        return data
+
+    def exists(self, session_key):
+        entry = sessions.get(session_key)
+        if entry is not None and time.monotonic() - entry.checked_at < getattr(
+            settings, "SESSION_LRU_TTL", 5
+        ):
+            return True
+        return super().exists(session_key)
+
+    # ----- writing -----
+
+    def _get_new_session_key(self):
+        # Collisions surface as CreateError on insert, so skip the stock
+        # engine's exists() query per new key
+        return get_random_string(32, VALID_KEY_CHARS)
+
+    def create(self):
+        self._session_key = self._get_new_session_key()
+        self._unsaved = True
+        self.modified = True
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            self.create()
+        if self._unsaved or must_create:
+            # Nothing to load: looking the new key up would only drop it
+            return self._insert(no_load=True)
+
+        key = self.session_key
+        data = self._get_session()
+        expire_date = self.get_expiry_date()
+        entry = sessions.get(key)
+
+        if entry is not None and entry.data == data:
+            # Only the expiry moved: write it later, together with others
+            entry.expire_date = expire_date
+            touches.add(key, expire_date)
+            return
+
+        queryset = self.model.objects.using(router.db_for_write(self.model)).filter(
+            session_key=key
+        )
+        values = {
+            "session_data": self.encode(data),
+            "expire_date": expire_date,
+            "version": F("version") + 1,
+        }
+        updated = 0
+        if entry is not None:
+            updated = queryset.filter(version=entry.version).update(**values)
+        if updated:
+            sessions.put(key, _Entry(copy.deepcopy(data), expire_date, entry.version + 1))
+        else:
+            # Written by another worker since we cached it (or not cached
+            # here): last write wins, as with the stock engine
+            sessions.discard(key)
+            if not queryset.update(**values):
+                raise UpdateError
+        # The write above carries the latest expiry
+        touches.discard(key)
+
+    def _insert(self, no_load=False):
+        data = self._get_session(no_load=no_load)
+        expire_date = self.get_expiry_date()
+        using = router.db_for_write(self.model)
+        while True:
+            try:
+                with transaction.atomic(using=using):
+                    self.model.objects.using(using).create(
+                        session_key=self.session_key,
+                        session_data=self.encode(data),
+                        expire_date=expire_date,
+                        version=1,
+                    )
+            except IntegrityError:
+                if not self._unsaved:
+                    raise CreateError
+                # Key collision on a deferred create: pick another key
+                self._session_key = self._get_new_session_key()
+                continue
+            break
+        self._unsaved = False
+        sessions.put(self.session_key, _Entry(copy.deepcopy(data), expire_date, 1))
+
+    def delete(self, session_key=None):
+        key = session_key if session_key is not None else self.session_key
+        if key is None:
+            return
+        sessions.discard(key)
+        touches.discard(key)
+        if session_key is None and self._unsaved:
+            # Never written
+            self._unsaved = False
+            return
+        self.model.objects.filter(session_key=key).delete()
+
+    # The async API goes through the synchronous paths so it shares the
+    # cache and the version checks
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def acreate(self):
+        self.create()
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        touches.flush()
+        super().clear_expired()
+
+    @classmethod
+    async def aclear_expired(cls):
+        await sync_to_async(cls.clear_expired)()
+
@@ -0,0 +1,46 @@
+"""
+SQLite connection tuning.
+
+Every new SQLite connection gets the PRAGMAs in ``SQLITE_PRAGMAS`` (none
+by default), applied in order by a ``connection_created`` hook. The
+'Root App.settings_production' profile sets ``PRODUCTION_PRAGMAS``:
+
+* ``journal_mode=WAL``: readers no longer block the writer nor it them;
+  only writers queue behind each other. The mode is stored in the file.
+* ``synchronous=NORMAL``: with WAL, fsync only at checkpoints. A power cut
+  can lose the last commits but never corrupts the database.
+* ``busy_timeout``: a connection finding the database locked retries for
+  this many milliseconds instead of failing with "database is locked".
+* ``mmap_size``, ``cache_size``, ``temp_store``: read pages through memory
+  mapping, keep a larger page cache, and sort/group in memory.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRODUCTION_PRAGMAS = {
+    # First, so switching the journal mode also waits for other connections
+    "busy_timeout": 5000,  # milliseconds
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -64 * 1024,  # negative: KiB, i.e. 64 MiB per connection
+    "temp_store": "MEMORY",
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """Run ``PRAGMA name = value`` for each of ``pragmas`` on ``connection``"""
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if pragmas:
+        apply_pragmas(connection, pragmas)
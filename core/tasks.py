@@ -0,0 +1,50 @@
+"""
+Minimal in-process background work queue.
+
+Work is handed to a small thread pool *after* the surrounding transaction
+commits, so request handlers return without waiting for it. Set
+``BACKGROUND_TASKS_EAGER = True`` to run tasks inline (useful in scripts and
+tests); ``BACKGROUND_TASK_WORKERS`` sizes the pool.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 2),
+                thread_name_prefix="library-task",
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, "__name__", func))
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` on a worker thread once the transaction commits"""
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
@@ -1,3 +1,430 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.http import HttpResponse
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book
+
+from . import cache as query_cache
+from . import db_routers, outbox
+from .middleware import PIN_COOKIE, ReplicaPinMiddleware
+from .models import OutboxEmail, VersionedSession
+from .pagination import InvalidCursor, KeysetPaginator
+from .sessions import SessionStore, sessions, touches
+
+User = get_user_model()
+
+
+class RefusingBackend(BaseEmailBackend):
+    """Accepts the connection and rejects every message"""
+
+    def send_messages(self, email_messages):
+        raise OSError("550 mailbox unavailable")
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise OSError("connection refused")
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.users = User.objects.bulk_create(
+            [User(username=f"user{n}") for n in range(7)]
+        )
+        # Ties on the leading key are broken by id
+        User.objects.update(date_joined=timezone.now())
+        self.paginator = KeysetPaginator(
+            User.objects.all(), ("-date_joined", "-id"), per_page=3
+        )
+
+    def ids(self, page):
+        return [user.pk for user in page]
+
+    def test_pages_cover_every_row_once(self):
+        seen, page = [], self.paginator.page()
+        while True:
+            seen.extend(self.ids(page))
+            if not page.has_next:
+                break
+            page = self.paginator.page(page.next_cursor)
+
+        self.assertEqual(seen, sorted((user.pk for user in self.users), reverse=True))
+
+    def test_previous_cursor_returns_to_the_same_page(self):
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor)
+
+        back = self.paginator.page(second.previous_cursor)
+
+        self.assertEqual(self.ids(back), self.ids(first))
+        self.assertFalse(first.has_previous)
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_last_page_has_no_next_cursor(self):
+        page = self.paginator.page()
+        page = self.paginator.page(page.next_cursor)
+        page = self.paginator.page(page.next_cursor)
+
+        self.assertEqual(len(page), 1)
+        self.assertIsNone(page.next_cursor)
+        self.assertTrue(page.has_previous)
+
+    def test_rows_added_meanwhile_do_not_shift_later_pages(self):
+        first = self.paginator.page()
+        User.objects.create(username="newcomer")
+
+        second = self.paginator.page(first.next_cursor)
+
+        expected = sorted((user.pk for user in self.users), reverse=True)[3:6]
+        self.assertEqual(self.ids(second), expected)
+
+    def test_bad_cursors(self):
+        # Garbage, and a well-formed payload with an unknown direction
+        for cursor in ("not-a-cursor", "WyJ1cCIsIFtdXQ"):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                self.paginator.page(cursor)
+
+        self.assertEqual(
+            self.ids(self.paginator.page_or_first("not-a-cursor")),
+            self.ids(self.paginator.page()),
+        )
+
+
+@override_settings(
+    OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_RETRY_DELAY=3600, OUTBOX_MAX_ATTEMPTS=3
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        [self.email] = outbox.enqueue([("reader@example.com", "Approved", "Welcome")])
+
+    def make_due(self):
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(
+            [outbox.retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 7, 20)],
+            [60, 120, 240, 3600, 3600],
+        )
+
+    def test_sent_emails_are_not_sent_again(self):
+        self.assertEqual(outbox.deliver(), outbox.DeliveryReport(sent=1))
+        self.assertEqual(outbox.deliver(), outbox.DeliveryReport())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), (OutboxEmail.SENT, 1))
+
+    @override_settings(EMAIL_BACKEND="core.tests.RefusingBackend")
+    def test_failures_back_off_then_give_up(self):
+        for attempts, delay in ((1, 60), (2, 120)):
+            before = timezone.now()
+            self.assertEqual(outbox.deliver(), outbox.DeliveryReport(retried=1))
+            # Not due again until the backoff has passed
+            self.assertEqual(outbox.deliver(), outbox.DeliveryReport())
+
+            self.email.refresh_from_db()
+            self.assertEqual(self.email.attempts, attempts)
+            self.assertGreaterEqual(
+                self.email.next_attempt_at, before + timedelta(seconds=delay)
+            )
+            self.assertIn("550 mailbox unavailable", self.email.last_error)
+            self.make_due()
+
+        self.assertEqual(outbox.deliver(), outbox.DeliveryReport(failed=1))
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), (OutboxEmail.FAILED, 3))
+
+    @override_settings(EMAIL_BACKEND="core.tests.UnreachableBackend")
+    def test_unreachable_server_retries_the_whole_batch(self):
+        outbox.enqueue([("other@example.com", "Approved", "Welcome")])
+
+        with self.assertLogs("core.outbox", "WARNING"):
+            self.assertEqual(outbox.deliver(), outbox.DeliveryReport(retried=2))
+        self.assertFalse(
+            OutboxEmail.objects.filter(next_attempt_at__lte=timezone.now()).exists()
+        )
+
+
+@override_settings(
+    SESSION_LRU_TTL=60,
+    # Flushed by hand below; the timer must not fire mid-test
+    SESSION_TOUCH_FLUSH_INTERVAL=3600,
+    SESSION_TOUCH_BATCH=500,
+    BACKGROUND_TASKS_EAGER=True,
+)
+class SessionTouchTests(TestCase):
+    def setUp(self):
+        sessions.clear()
+        self.stop_timer()
+        touches.flush()
+        self.addCleanup(touches.flush)
+        self.addCleanup(self.stop_timer)
+        self.session = SessionStore()
+        self.session["cart"] = [1]
+        self.session.save()
+        self.key = self.session.session_key
+
+    def stop_timer(self):
+        if touches._timer is not None:
+            touches._timer.cancel()
+            touches._timer = None
+
+    def stored(self, field="expire_date"):
+        return VersionedSession.objects.values_list(field, flat=True).get(
+            session_key=self.key
+        )
+
+    def resave(self):
+        session = SessionStore(self.key)
+        session.load()
+        session.save()
+
+    def test_new_sessions_are_inserted_on_first_save(self):
+        session = SessionStore()
+        session.create()
+        self.assertFalse(VersionedSession.objects.filter(session_key=session.session_key))
+
+        session.save()
+
+        self.assertTrue(VersionedSession.objects.filter(session_key=session.session_key))
+
+    def test_expiry_only_saves_are_coalesced(self):
+        stored = self.stored()
+
+        for _ in range(3):
+            self.resave()
+
+        self.assertEqual(self.stored(), stored)
+        self.assertEqual(touches.flush(), 1)
+        self.assertGreater(self.stored(), stored)
+
+    def test_first_touch_arms_the_flush_timer(self):
+        stored = self.stored()
+        self.resave()
+        timer = touches._timer
+        self.resave()
+
+        self.assertEqual(timer.interval, 3600)
+        self.assertIs(touches._timer, timer)
+
+        timer.cancel()
+        # As the timer thread would, minus closing the test connection
+        with mock.patch("core.sessions.connections"):
+            touches._flush_due()
+        self.assertIsNone(touches._timer)
+        self.assertGreater(self.stored(), stored)
+
+    @override_settings(SESSION_TOUCH_BATCH=2)
+    def test_a_full_batch_is_written_at_once(self):
+        other = SessionStore()
+        other.save()
+        stored = self.stored()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resave()
+            SessionStore(other.session_key).save()
+
+        self.assertGreater(self.stored(), stored)
+        self.assertEqual(touches.flush(), 0)
+
+    def test_data_writes_carry_the_expiry(self):
+        self.resave()
+        session = SessionStore(self.key)
+        session["cart"] = [1, 2]
+        session.save()
+
+        self.assertEqual(touches.flush(), 0)
+        self.assertEqual(self.stored("version"), 2)
+        self.assertEqual(SessionStore(self.key).load()["cart"], [1, 2])
+
+    def test_deleted_sessions_drop_pending_touches(self):
+        self.resave()
+
+        SessionStore(self.key).delete()
+
+        self.assertEqual(touches.flush(), 0)
+        self.assertFalse(VersionedSession.objects.filter(session_key=self.key).exists())
+
+    def test_writes_from_other_workers_are_seen_on_revalidation(self):
+        # As if another worker saved the session, then logged it out
+        other = SessionStore(self.key)
+        VersionedSession.objects.filter(session_key=self.key).update(
+            session_data=other.encode({"cart": [3]}), version=F("version") + 1
+        )
+        self.assertEqual(SessionStore(self.key).load()["cart"], [1])
+
+        with override_settings(SESSION_LRU_TTL=0):
+            self.assertEqual(SessionStore(self.key).load()["cart"], [3])
+            VersionedSession.objects.filter(session_key=self.key).delete()
+            self.assertEqual(SessionStore(self.key).load(), {})
+
+    def test_exists_revalidates_after_the_ttl(self):
+        VersionedSession.objects.filter(session_key=self.key).delete()
+
+        self.assertTrue(SessionStore().exists(self.key))
+        with override_settings(SESSION_LRU_TTL=0):
+            self.assertFalse(SessionStore().exists(self.key))
+
+
+@override_settings(
+    REPLICA_DATABASES=["replica"], REPLICA_MAX_LAG=10, REPLICA_LAG_CHECK_INTERVAL=60
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        db_routers._lag_checks.clear()
+        self.addCleanup(db_routers._lag_checks.clear)
+        patcher = mock.patch.object(db_routers, "_measure_lag", return_value=1.0)
+        self.measure_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_routers.ReplicaRouter()
+
+    def read_alias(self, model=Book):
+        return self.router.db_for_read(model)
+
+    def in_view(self, body, pinned=False):
+        """Run ``body`` as a replica-read view behind the pin middleware"""
+        result = []
+
+        @db_routers.read_from_replica
+        def view(request):
+            result.append(body())
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(view)(self.request(pinned))
+        return result[0], response
+
+    def request(self, pinned=False):
+        request = RequestFactory().get("/")
+        if pinned:
+            request.COOKIES[PIN_COOKIE] = "1"
+        return request
+
+    def test_only_marked_views_read_from_a_replica(self):
+        self.assertIsNone(self.read_alias())
+        self.assertEqual(self.in_view(self.read_alias)[0], "replica")
+        # Sessions and the outbox always come from the primary
+        self.assertIsNone(self.in_view(lambda: self.read_alias(OutboxEmail))[0])
+
+    def test_writes_pin_the_request_and_the_client(self):
+        def write_then_read():
+            self.assertEqual(self.read_alias(), "replica")
+            self.assertEqual(self.router.db_for_write(Book), "default")
+            return self.read_alias()
+
+        alias, response = self.in_view(write_then_read)
+
+        self.assertIsNone(alias)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertIsNone(self.in_view(self.read_alias, pinned=True)[0])
+
+    def test_reads_alone_do_not_pin(self):
+        _, response = self.in_view(self.read_alias)
+
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def fragment_timeout(self):
+        return db_routers.fragment_timeout(300)
+
+    def test_lagging_or_unreachable_replicas_are_skipped(self):
+        for lag in (30.0, None):
+            db_routers._lag_checks.clear()
+            self.measure_lag.return_value = lag
+            with self.subTest(lag=lag):
+                self.assertIsNone(self.in_view(self.read_alias)[0])
+                self.assertEqual(self.in_view(self.fragment_timeout)[0], 300)
+
+    def test_replica_fragments_do_not_outlive_the_allowed_lag(self):
+        self.assertEqual(self.in_view(self.fragment_timeout)[0], 10)
+        self.assertEqual(self.fragment_timeout(), 300)
+
+    def test_lag_is_measured_once_per_interval(self):
+        for _ in range(3):
+            self.in_view(self.read_alias)
+
+        self.measure_lag.assert_called_once_with("replica")
+
+
+class CachedQueryTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        query_cache.reset_stats()
+        self.addCleanup(query_cache.reset_stats)
+        self.compute = mock.Mock(return_value="fresh")
+
+    def lookup(self, timeout=None):
+        return query_cache.cached("catalog", "page", self.compute, timeout)
+
+    def hold_lock(self):
+        cache.add(query_cache.LOCK_PREFIX + query_cache.versioned_key("catalog", "page"), 1)
+
+    def outcomes(self):
+        row = query_cache.stats()["catalog"]
+        return {outcome: row[outcome] for outcome in ("hits", "stale", "waits", "misses")}
+
+    def test_values_are_computed_once_per_version(self):
+        self.assertEqual([self.lookup() for _ in range(3)], ["fresh"] * 3)
+        query_cache.bump_version("catalog")
+        self.lookup()
+
+        self.assertEqual(self.compute.call_count, 2)
+        self.assertEqual(self.outcomes(), {"hits": 2, "stale": 0, "waits": 0, "misses": 2})
+        self.assertEqual(query_cache.stats()["catalog"]["hit_rate"], 0.5)
+
+    def test_expired_values_are_served_while_another_caller_refreshes(self):
+        self.lookup(timeout=0)
+        self.compute.return_value = "refreshed"
+        self.hold_lock()
+
+        self.assertEqual(self.lookup(), "fresh")
+        self.assertEqual(self.compute.call_count, 1)
+
+        cache.clear()
+        self.assertEqual(self.lookup(), "refreshed")
+
+    def test_expired_values_are_refreshed_by_the_first_caller(self):
+        self.lookup(timeout=0)
+        self.compute.return_value = "refreshed"
+
+        self.assertEqual(self.lookup(), "refreshed")
+        self.assertEqual(self.lookup(), "refreshed")
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_missing_values_are_waited_for_instead_of_recomputed(self):
+        self.hold_lock()
+
+        def other_caller_finishes(seconds):
+            query_cache._store(query_cache.versioned_key("catalog", "page"), "theirs", None)
+
+        with mock.patch.object(query_cache.time, "sleep", side_effect=other_caller_finishes):
+            self.assertEqual(self.lookup(), "theirs")
+
+        self.compute.assert_not_called()
+        self.assertEqual(self.outcomes()["waits"], 1)
+
+    @override_settings(QUERY_CACHE_LOCK_TIMEOUT=0)
+    def test_a_stuck_lock_holder_is_not_waited_on_forever(self):
+        self.hold_lock()
+
+        self.assertEqual(self.lookup(), "fresh")
+        self.compute.assert_called_once()
+
+    def test_many_values_compute_only_the_missing_keys(self):
+        def rows(keys):
+            return {key: key * 10 for key in keys}
+
+        compute_missing = mock.Mock(side_effect=rows)
+        query_cache.cached_many("book", [1, 2], compute_missing)
+
+        values = query_cache.cached_many("book", [1, 2, 3], compute_missing)
+
+        self.assertEqual(values, {1: 10, 2: 20, 3: 30})
+        self.assertEqual(compute_missing.call_args_list, [mock.call([1, 2]), mock.call([3])])
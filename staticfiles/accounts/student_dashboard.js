@@ -47,16 +47,26 @@ function resetBrowseFilter(event) {
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function () {
-  // Check if we should show browse tab (from URL parameter)
+  // Re-open the tab named in the URL (browse filters and pager links set it)
   const urlParams = new URLSearchParams(window.location.search);
-  if (urlParams.has('tab') && urlParams.get('tab') === 'browse') {
-    // Activate browse tab
-    const browseTab = document.querySelector('button[onclick*="browse"]');
-    if (browseTab) {
-      browseTab.click();
+  const tabName = urlParams.get('tab');
+  if (tabName === 'browse' || tabName === 'history' || tabName === 'holds') {
+    const tabButton = document.querySelector(`button[onclick*="'${tabName}'"]`);
+    if (tabButton) {
+      tabButton.click();
     }
   }
 
+  // Hold and cancel buttons live in cached fragments, so they borrow this page's token
+  document.querySelectorAll('.hold-form').forEach(function (form) {
+    form.addEventListener('submit', function () {
+      const token = document.querySelector('[name=csrfmiddlewaretoken]');
+      if (token && !form.querySelector('[name=csrfmiddlewaretoken]')) {
+        form.appendChild(token.cloneNode());
+      }
+    });
+  });
+
   // Auto-submit form when filter changes
   const filterSelect = document.getElementById('browseStatus');
   if (filterSelect) {